@@ -0,0 +1,40 @@
+import math
+import os
+import threading
+
+# /predict requests admitted and not yet answered; past this, new ones get 429 + Retry-After
+ADMISSION_MAX_DEPTH = int(os.getenv("ADMISSION_MAX_DEPTH", "64"))
+# Default time budget of a /predict request (the request body may set its own timeout_s);
+# a request still queued for the model when it runs out is dropped with 504
+PREDICT_TIMEOUT_S = float(os.getenv("PREDICT_TIMEOUT_S", "60"))
+
+
+class AdmissionQueue:
+    """Bounded admission for interactive requests.
+
+    Counts requests between admission and response and refuses new ones once
+    `max_depth` are in, so a burst backs off at the client instead of piling up in
+    the server. A moving average of service time gives the Retry-After hint.
+    """
+    def __init__(self, max_depth=ADMISSION_MAX_DEPTH):
+        self.max_depth = max_depth
+        self.depth = 0
+        self._avg_s = 1.0
+        self._lock = threading.Lock()
+
+    def try_acquire(self):
+        with self._lock:
+            if self.depth >= self.max_depth:
+                return False
+            self.depth += 1
+            return True
+
+    def release(self, elapsed_s=None):
+        with self._lock:
+            self.depth -= 1
+            if elapsed_s is not None:
+                self._avg_s = 0.9 * self._avg_s + 0.1 * elapsed_s
+
+    def retry_after(self):
+        """Whole seconds a refused client should wait before retrying."""
+        return max(1, math.ceil(self._avg_s))
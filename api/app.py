@@ -1,25 +1,38 @@
-from fastapi import FastAPI, HTTPException, File, UploadFile, Form
+import time
+# Start of the API's own startup, for the phase breakdown in /ready
+APP_STARTED = time.perf_counter()
+from fastapi import FastAPI, HTTPException, File, UploadFile, Form, Request, Response
 from fastapi.responses import HTMLResponse, StreamingResponse, FileResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 import sys
 import os
 from prometheus_fastapi_instrumentator import Instrumentator
-from prometheus_fastapi_instrumentator import Instrumentator
 from prometheus_client import Counter, Gauge, Histogram, generate_latest, CONTENT_TYPE_LATEST
 import threading
 import subprocess
-import time
-import pandas as pd
 import io
-import time
 import traceback
+import asyncio
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
 
 # Add project root and qwen_3b to sys.path so we can import inference module
 sys.path.append(os.path.abspath(os.path.dirname(__file__)))
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "qwen_3b")))
 
-from inference import get_model
+from pool import MODEL_WORKERS, ModelPool, PoolUnavailable
+from admission import AdmissionQueue, PREDICT_TIMEOUT_S
+from capture import CAPTURE_SAMPLE_RATE, TrafficCapture
+from batching import DeadlineExceeded, PREDICT_MODES, PRIORITY_CLASSES
+from jobs import JobManager, OUTPUT_FORMATS, find_transcript_column, read_table
+from streaming import STREAM_INPUTS, STREAM_OUTPUT_FORMATS, format_rows, iter_transcript_chunks, spool_upload
+from startup import startup_timer
+
+startup_timer.add("imports", time.perf_counter() - APP_STARTED)
+# Load the model in a background thread so the server is up (/health) while it loads;
+# /ready answers 200 once it is loaded and warmed up. 0 = load before serving anything.
+MODEL_BACKGROUND_LOAD = os.getenv("MODEL_BACKGROUND_LOAD", "1") == "1"
 
 app = FastAPI(title="Disposition Extraction API", version="1.0")
 Instrumentator().instrument(app).expose(app)
@@ -28,7 +41,45 @@ Instrumentator().instrument(app).expose(app)
 REQUEST_COUNT = Counter("disposition_requests_total", "Total number of /predict requests")
 REQUEST_ERRORS = Counter("disposition_request_errors_total", "Total number of failed /predict requests")
 INFERENCE_TIME = Histogram("disposition_inference_seconds", "Inference latency in seconds")
+BATCH_SIZE = Histogram("disposition_batch_size", "Size of the batch each prediction was served in", buckets=(1, 2, 4, 8, 16, 32))
+QUEUE_WAIT = Histogram("disposition_queue_wait_seconds", "Time a prediction waited for its batch to start")
+TOKEN_BUCKETS = (8, 16, 32, 64, 96, 128, 192, 256, 384, 512)
+GENERATED_TOKENS = Histogram("disposition_generated_tokens", "Tokens in the generated response per prediction", buckets=TOKEN_BUCKETS)
+DECODE_STEPS = Histogram("disposition_decode_steps", "Model forward passes spent per prediction", buckets=TOKEN_BUCKETS)
+FORCED_TOKENS = Histogram("disposition_forced_tokens", "Scaffold tokens appended without sampling per prediction (jump-forward)", buckets=TOKEN_BUCKETS)
+TRANSCRIPT_TOKENS = Histogram("disposition_transcript_tokens", "Transcript tokens before and after compaction / truncation", ["stage"],
+                              buckets=(32, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768))
+TOKENS_PER_STEP = Histogram("disposition_tokens_per_step", "Generated tokens per model forward pass with prompt-lookup decoding", ["language"],
+                            buckets=(1, 1.25, 1.5, 1.75, 2, 2.5, 3, 4, 6, 8))
+DRAFT_TOKENS = Counter("disposition_draft_tokens_total", "Prompt-lookup draft tokens by language and whether the model accepted them", ["language", "outcome"])
+TRANSCRIPT_WINDOWS = Histogram("disposition_transcript_windows", "Windows per long transcript in map-reduce mode", buckets=(2, 3, 4, 6, 8, 12, 16, 24, 32))
+# Per-request time in each stage, by the path that answered (model, rules, near_dup, cache) and
+# language. Only model answers have the STAGES; every path has "total" (time inside the model object).
+STAGES = ("queue_wait", "tokenize", "ttft", "decode", "clean_output")
+STAGE_SECONDS = Histogram("disposition_stage_seconds", "Time a request spent in each inference stage", ["stage", "path", "language"],
+                          buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40))
+TOKEN_USAGE = Counter("disposition_token_usage_total", "Prompt tokens prefilled and tokens generated", ["kind", "path", "language"])
+DECODE_SPEED = Histogram("disposition_decode_tokens_per_second", "Generated tokens per second of decode time per request", ["path", "language"],
+                         buckets=(1, 2, 5, 10, 20, 35, 50, 75, 100, 150, 200, 300, 500))
+CACHE_REQUESTS = Counter("disposition_cache_requests_total", "Prediction cache lookups by result (hit, miss, coalesced)", ["result"])
+NEAR_DUP_REQUESTS = Counter("disposition_near_dup_requests_total", "Near-duplicate index lookups by result (hit, miss)", ["result"])
+INFERENCE_PATH = Counter("disposition_inference_path_total", "Requests by the stage that produced the result (rules, near_dup, model, cache)", ["path"])
+RULE_HITS = Counter("disposition_rule_hits_total", "Rule fast-path matches by rule and language", ["rule"])
+RULE_AGREEMENT = Counter("disposition_rule_agreement_total", "Shadow-mode rule matches by whether the model agreed", ["rule", "agrees"])
+WORKER_UP = Gauge("disposition_worker_up", "Whether a model pool worker is connected and serving (1/0)", ["worker"])
+WORKER_IN_FLIGHT = Gauge("disposition_worker_in_flight", "Requests in flight on a model pool worker", ["worker"])
+WORKER_IN_FLIGHT_TOKENS = Gauge("disposition_worker_in_flight_tokens", "Estimated prompt tokens in flight on a model pool worker", ["worker"])
+WORKER_UTILIZATION = Gauge("disposition_worker_utilization", "Share of the last poll period a model pool worker had requests in flight", ["worker"])
+WORKER_REQUESTS = Counter("disposition_worker_requests_total", "Calls answered by a model pool worker", ["worker"])
+WORKER_RESTARTS = Counter("disposition_worker_restarts_total", "Model pool worker restarts after an exit", ["worker"])
+CLASS_QUEUE_WAIT = Histogram("disposition_class_queue_wait_seconds", "Time a prediction waited for its batch to start, by priority class", ["priority"])
+CLASS_LATENCY = Histogram("disposition_class_model_latency_seconds", "Time from queueing for the model to result, by priority class", ["priority"],
+                          buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 80, 160))
+ADMISSION_DEPTH = Gauge("disposition_admission_depth", "/predict requests admitted and not yet answered")
+CAPTURED_REQUESTS = Counter("disposition_captured_requests_total", "Sampled /predict requests for traffic capture, by whether they were queued for writing or dropped", ["result"])
+DROPPED_REQUESTS = Counter("disposition_dropped_requests_total", "/predict requests not served, by reason (loading, queue_full, unavailable, deadline, disconnected)", ["reason"])
 MODEL_LOADED = Gauge("disposition_model_loaded", "Whether the model is loaded (1 = loaded)")
+STARTUP_SECONDS = Gauge("disposition_startup_seconds", "Time spent in each startup phase of this process (ready = start of app.py to ready)", ["phase"])
 GPU_AVAILABLE = Gauge("disposition_gpu_available", "Whether CUDA GPU is available (1/0)")
 # Per-GPU metrics will be labeled by index
 GPU_UTIL = Gauge("disposition_gpu_util_percent", "GPU utilization percent", ["gpu"])
@@ -75,6 +126,13 @@ from datetime import date
 class TranscriptRequest(BaseModel):
     transcript: str
     current_date: str | None = None
+    # "generate" (full JSON) or "classify" (label scoring only, no remarks / ptp_details)
+    mode: str = "generate"
+    # Seconds the caller is willing to wait (default PREDICT_TIMEOUT_S); a request still
+    # queued for the model after that is dropped with 504
+    timeout_s: float | None = None
+    # Scheduling class: "interactive" (default), "batch" or "backfill"
+    priority: str = "interactive"
 
 # Nested Model for Ptp Details
 class PtpDetails(BaseModel):
@@ -90,13 +148,80 @@ class DispositionResponse(BaseModel):
     remarks: str | None = None
     confidence_score: float | None = None
 
-print("Loading model for API...")
-# Initialize model on startup
-model = get_model()
+# Set by load_model(): in-process, or a pool of worker processes (MODEL_WORKERS > 1)
+model = None
+model_ready = threading.Event()
+
+def collect_worker_metrics(period_s: int = 5):
+    """Background thread: export per-worker load of the model pool."""
+    last, last_t = {}, time.monotonic()
+    while True:
+        time.sleep(period_s)
+        now = time.monotonic()
+        for w in model.stats():
+            label = str(w["worker"])
+            prev = last.get(label, {"served": 0, "restarts": 0, "busy_s": 0.0})
+            WORKER_UP.labels(worker=label).set(1 if w["ready"] else 0)
+            WORKER_IN_FLIGHT.labels(worker=label).set(w["in_flight"])
+            WORKER_IN_FLIGHT_TOKENS.labels(worker=label).set(w["in_flight_tokens"])
+            WORKER_UTILIZATION.labels(worker=label).set(min(1.0, (w["busy_s"] - prev["busy_s"]) / (now - last_t)))
+            WORKER_REQUESTS.labels(worker=label).inc(w["served"] - prev["served"])
+            WORKER_RESTARTS.labels(worker=label).inc(w["restarts"] - prev["restarts"])
+            last[label] = w
+        last_t = now
+
+def load_model():
+    global model
+    print("Loading model for API...")
+    if MODEL_WORKERS > 1:
+        with startup_timer.phase("workers"):
+            model = ModelPool()
+        threading.Thread(target=collect_worker_metrics, args=(5,), daemon=True).start()
+    else:
+        # Imported here: torch and the model stack load only in the process that runs the model
+        from inference import get_model
+        model = get_model()
+    startup_timer.add("ready", time.perf_counter() - APP_STARTED)
+    for phase, seconds in startup_timer.phases.items():
+        STARTUP_SECONDS.labels(phase=phase).set(seconds)
+    MODEL_LOADED.set(1)
+    model_ready.set()
+    print(f"API ready: {startup_timer.report()}")
+
+def load_model_in_background():
+    try:
+        load_model()
+    except Exception:
+        traceback.print_exc()
+        print("Model failed to load, exiting")
+        os._exit(1)
+
+if MODEL_BACKGROUND_LOAD:
+    threading.Thread(target=load_model_in_background, name="model-load", daemon=True).start()
+else:
+    load_model()
+
+def require_ready():
+    if not model_ready.is_set():
+        raise HTTPException(status_code=503, detail="Model is loading, retry later", headers={"Retry-After": "5"})
 
 @app.get("/health")
 def health_check():
-    return {"status": "ok", "model": "unsloth/Qwen2.5-7B-Instruct-bnb-4bit"}
+    """Liveness: the process is up and serving (the model may still be loading, see /ready)."""
+    return {"status": "ok", "model": "unsloth/Qwen2.5-7B-Instruct-bnb-4bit", "ready": model_ready.is_set()}
+
+@app.get("/ready")
+def readiness_check(response: Response):
+    """Readiness: 200 once the model is loaded and warmed up (and, with a pool, a worker is
+    up); 503 before that. Includes the time each startup phase took."""
+    status = "loading"
+    if model_ready.is_set():
+        status = "ready"
+        if isinstance(model, ModelPool) and not any(w["ready"] for w in model.stats()):
+            status = "no_workers"
+    if status != "ready":
+        response.status_code = 503
+    return {"status": status, "startup_s": {phase: round(seconds, 3) for phase, seconds in startup_timer.phases.items()}}
 
 @app.get("/")
 def read_root():
@@ -107,84 +232,254 @@ def read_root():
     return {"status": "running", "message": "Disposition Extraction API is active. Use /predict for inference or /docs for documentation."}
 
 
-@app.post("/upload")
-async def upload_and_process(file: UploadFile = File(...), output_format: str = Form("csv")):
-    """Accepts CSV/Excel/JSON file with a transcript column, runs model.predict on each row, and returns a downloadable file."""
+# Scheduling classes an upload may ask for; interactive is reserved for /predict
+UPLOAD_PRIORITIES = ("batch", "backfill")
+
+def process_upload_rows(transcripts, mode, priority="batch"):
+    """Predict a block of bulk-upload rows (length-bucketed, deduplicated), flattened for the output file.
+
+    A failed predict_many() raises, so upload jobs retry the block instead of checkpointing error rows."""
+    # Jobs resumed or submitted while the model loads wait for it here
+    model_ready.wait()
+    preds, metas = model.predict_many(transcripts, mode=mode, priority=priority)
+    rows = []
+    for transcript, pred, meta in zip(transcripts, preds, metas):
+        record_inference_meta(meta)
+        # Flatten prediction into a dict row
+        if isinstance(pred, dict):
+            out = pred.copy()
+        else:
+            out = {"raw": str(pred)}
+        out["_inference_path"] = meta.get("path", "cache")
+        out["_original_transcript"] = transcript
+        rows.append(out)
+    return rows
+
+jobs = JobManager(process_upload_rows)
+
+@app.post("/upload", status_code=202)
+async def upload_and_process(file: UploadFile = File(...), output_format: str = Form("csv"), mode: str = Form("generate"),
+                             priority: str = Form("batch")):
+    """Accepts CSV/Excel/JSON file with a transcript column and queues it for background processing.
+
+    Returns a job ID right away; poll /jobs/{id} for progress and fetch /jobs/{id}/download when done."""
+    if mode not in PREDICT_MODES:
+        raise HTTPException(status_code=400, detail=f"Unsupported mode: {mode}")
+    if output_format not in OUTPUT_FORMATS:
+        raise HTTPException(status_code=400, detail="Unsupported output format")
+    if priority not in UPLOAD_PRIORITIES:
+        raise HTTPException(status_code=400, detail=f"Unsupported priority; use one of {', '.join(UPLOAD_PRIORITIES)}")
     filename = file.filename or f"upload_{int(time.time())}"
     body = await file.read()
     try:
-        if filename.lower().endswith(".csv"):
-            df = pd.read_csv(io.BytesIO(body))
-        elif filename.lower().endswith(('.xls', '.xlsx')):
-            df = pd.read_excel(io.BytesIO(body))
-        elif filename.lower().endswith('.json'):
-            df = pd.read_json(io.BytesIO(body))
-        else:
-            # Try CSV by default
-            df = pd.read_csv(io.BytesIO(body))
+        # Parsing a large file is slow; keep it off the event loop serving /predict
+        df = await run_in_threadpool(read_table, io.BytesIO(body), filename)
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to parse uploaded file: {e}")
 
-    # Find transcript column
-    transcript_col = None
-    for c in df.columns:
-        if 'transcript' in str(c).lower() or 'text' in str(c).lower() or 'conversation' in str(c).lower():
-            transcript_col = c
-            break
-    if transcript_col is None:
+    if find_transcript_column(df) is None:
         raise HTTPException(status_code=400, detail="No transcript/text column found in uploaded file.")
 
-    results = []
-    for _, row in df.iterrows():
+    return jobs.submit(filename, body, output_format, mode, total=len(df), priority=priority)
+
+@app.post("/upload/stream")
+async def upload_stream(file: UploadFile = File(...), output_format: str = Form("ndjson"), mode: str = Form("generate"),
+                        priority: str = Form("batch")):
+    """Streaming variant of /upload for very large CSV / NDJSON exports.
+
+    The upload is spooled to disk and read a chunk at a time; each chunk is predicted
+    with model.predict_many() and its results
+    are written to the response as soon as it finishes, so memory use does not grow
+    with the file size."""
+    if mode not in PREDICT_MODES:
+        raise HTTPException(status_code=400, detail=f"Unsupported mode: {mode}")
+    if output_format not in STREAM_OUTPUT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported output format; use one of {', '.join(STREAM_OUTPUT_FORMATS)}")
+    if priority not in UPLOAD_PRIORITIES:
+        raise HTTPException(status_code=400, detail=f"Unsupported priority; use one of {', '.join(UPLOAD_PRIORITIES)}")
+    if not (file.filename or "").lower().endswith(STREAM_INPUTS):
+        raise HTTPException(status_code=400, detail=f"Streaming needs a {', '.join(STREAM_INPUTS)} file")
+    require_ready()
+
+    path = await spool_upload(file)
+    chunks = iter_transcript_chunks(path)
+
+    def cleanup():
+        # Runs from the stream's end, the response's background task or an early error,
+        # so the spooled file is removed however the request ends
+        chunks.close()
         try:
-            transcript = str(row.get(transcript_col, '') or '')
-            pred = model.predict(transcript)
-            # Flatten prediction into a dict row
-            if isinstance(pred, dict):
-                out = pred.copy()
-            else:
-                out = {"raw": str(pred)}
-        except Exception as e:
-            out = {"error": str(e)}
-        # Keep original columns if needed
-        out["_original_transcript"] = transcript
-        results.append(out)
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    try:
+        # Read the first chunk up front so a bad file still gets a 400, not a broken stream
+        first = await run_in_threadpool(next, chunks, [])
+    except Exception as e:
+        cleanup()
+        raise HTTPException(status_code=400, detail=f"Failed to parse uploaded file: {e}")
+    except BaseException:
+        cleanup()  # cancelled before the response started
+        raise
 
-    out_df = pd.DataFrame(results)
+    async def results():
+        try:
+            chunk, header = first, True
+            while chunk:
+                try:
+                    rows = await run_in_threadpool(process_upload_rows, chunk, mode, priority)
+                except Exception as e:
+                    # The response is already streaming; report the chunk's rows as failed
+                    rows = [{"error": str(e), "_original_transcript": t} for t in chunk]
+                yield format_rows(rows, output_format, header=header)
+                chunk, header = await run_in_threadpool(next, chunks, []), False
+            if header and output_format == "csv":
+                yield format_rows([], output_format, header=True)
+        finally:
+            cleanup()
 
-    buf = io.BytesIO()
+    media_type = "application/x-ndjson" if output_format == "ndjson" else "text/csv"
     output_filename = f"predictions_{int(time.time())}.{output_format}"
-    if output_format == 'csv':
-        out_df.to_csv(buf, index=False)
-        buf.seek(0)
-        media_type = 'text/csv'
-    elif output_format in ('xlsx', 'xls'):
-        out_writer = pd.ExcelWriter(buf, engine='openpyxl')
-        out_df.to_excel(out_writer, index=False)
-        out_writer.close()
-        buf.seek(0)
-        media_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    elif output_format == 'json':
-        buf.write(out_df.to_json(orient='records').encode())
-        buf.seek(0)
-        media_type = 'application/json'
-    else:
-        raise HTTPException(status_code=400, detail="Unsupported output format")
+    return StreamingResponse(results(), media_type=media_type, headers={"Content-Disposition": f"attachment; filename={output_filename}"},
+                             background=BackgroundTask(cleanup))
+
+@app.get("/jobs/{job_id}")
+def job_status(job_id: str):
+    info = jobs.status(job_id)
+    if info is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    return info
+
+@app.get("/jobs/{job_id}/download")
+def job_download(job_id: str):
+    info = jobs.status(job_id)
+    if info is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    path = jobs.output_path(job_id)
+    if path is None:
+        raise HTTPException(status_code=409, detail=f"Job is {info['status']}, results are not ready")
+    media_types = {
+        "csv": "text/csv",
+        "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        "xls": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        "json": "application/json",
+    }
+    output_filename = f"predictions_{job_id}.{info['output_format']}"
+    return FileResponse(path, media_type=media_types[info["output_format"]], filename=output_filename)
+
+def record_inference_meta(meta):
+    """Export the per-request stats returned by model.predict_with_meta()."""
+    if "cache" in meta:
+        CACHE_REQUESTS.labels(result=meta["cache"]).inc()
+    if "near_dup" in meta:
+        NEAR_DUP_REQUESTS.labels(result=meta["near_dup"]).inc()
+    # Cache hits and coalesced requests carry no path of their own
+    INFERENCE_PATH.labels(path=meta.get("path", "cache")).inc()
+    if "rule" in meta:
+        RULE_HITS.labels(rule=meta["rule"]).inc()
+        if "rule_agrees" in meta:
+            RULE_AGREEMENT.labels(rule=meta["rule"], agrees=str(meta["rule_agrees"]).lower()).inc()
+    # Cache, rule and near-duplicate hits and coalesced requests never reached the batcher
+    if "batch_size" in meta:
+        BATCH_SIZE.observe(meta["batch_size"])
+        QUEUE_WAIT.observe(meta["queue_wait_s"])
+        priority = meta.get("priority", "interactive")
+        CLASS_QUEUE_WAIT.labels(priority=priority).observe(meta["queue_wait_s"])
+        CLASS_LATENCY.labels(priority=priority).observe(meta["model_latency_s"])
+        GENERATED_TOKENS.observe(meta["generated_tokens"])
+        DECODE_STEPS.observe(meta["decode_steps"])
+        FORCED_TOKENS.observe(meta["forced_tokens"])
+        TRANSCRIPT_TOKENS.labels(stage="before").observe(meta["transcript_tokens_in"])
+        TRANSCRIPT_TOKENS.labels(stage="after").observe(meta["transcript_tokens_out"])
+    if "accepted_tokens" in meta:
+        language = meta.get("language", "unknown")
+        TOKENS_PER_STEP.labels(language=language).observe(meta["generated_tokens"] / max(1, meta["decode_steps"]))
+        DRAFT_TOKENS.labels(language=language, outcome="accepted").inc(meta["accepted_tokens"])
+        DRAFT_TOKENS.labels(language=language, outcome="rejected").inc(meta["drafted_tokens"] - meta["accepted_tokens"])
+    if "windows" in meta:
+        TRANSCRIPT_WINDOWS.observe(meta["windows"])
+    record_stage_meta(meta)
+
+def record_stage_meta(meta):
+    """Stage timings and token counts, labelled by path and language."""
+    labels = {"path": meta.get("path", "cache"), "language": meta.get("language", "unknown")}
+    if "latency_s" in meta:
+        STAGE_SECONDS.labels(stage="total", **labels).observe(meta["latency_s"])
+    for stage in STAGES:
+        if f"{stage}_s" in meta:
+            STAGE_SECONDS.labels(stage=stage, **labels).observe(meta[f"{stage}_s"])
+    if "prompt_tokens" in meta:
+        TOKEN_USAGE.labels(kind="prompt", **labels).inc(meta["prompt_tokens"])
+    if "generated_tokens" in meta:
+        TOKEN_USAGE.labels(kind="generated", **labels).inc(meta["generated_tokens"])
+        if meta["generated_tokens"] and meta.get("decode_s"):
+            DECODE_SPEED.labels(**labels).observe(meta["generated_tokens"] / meta["decode_s"])
+
+admission = AdmissionQueue()
+# Sampled /predict traffic for benchmarks/replay.py (CAPTURE_SAMPLE_RATE > 0)
+capture = TrafficCapture() if CAPTURE_SAMPLE_RATE > 0 else None
 
-    return StreamingResponse(buf, media_type=media_type, headers={"Content-Disposition": f"attachment; filename={output_filename}"})
+def capture_request(request, arrived, status, meta=None):
+    """Queue a sampled /predict request for the capture writer (meta is None if it was not answered)."""
+    queued = capture.record(
+        ts=arrived, transcript=request.transcript, current_date=request.current_date, mode=request.mode,
+        priority=request.priority, timeout_s=request.timeout_s, status=status, latency_s=time.time() - arrived,
+        path=meta.get("path", "cache") if meta is not None else None, language=meta.get("language") if meta is not None else None,
+    )
+    CAPTURED_REQUESTS.labels(result="queued" if queued else "dropped").inc()
+
+async def await_unless_disconnected(http_request, coro, poll_s=0.5):
+    """Await `coro`, cancelling it if the client disconnects first (returns None then)."""
+    task = asyncio.ensure_future(coro)
+    while True:
+        done, _ = await asyncio.wait({task}, timeout=poll_s)
+        if done:
+            return task.result()
+        if await http_request.is_disconnected():
+            task.cancel()
+            return None
 
 @app.post("/predict", response_model=DispositionResponse)
-def predict_disposition(request: TranscriptRequest):
+async def predict_disposition(request: TranscriptRequest, response: Response, http_request: Request):
     REQUEST_COUNT.inc()
     if not request.transcript.strip():
         REQUEST_ERRORS.inc()
         raise HTTPException(status_code=400, detail="Transcript is empty")
+    if request.mode not in PREDICT_MODES:
+        REQUEST_ERRORS.inc()
+        raise HTTPException(status_code=400, detail=f"Unsupported mode: {request.mode}")
+    if request.priority not in PRIORITY_CLASSES:
+        REQUEST_ERRORS.inc()
+        raise HTTPException(status_code=400, detail=f"Unsupported priority: {request.priority}")
+    if not model_ready.is_set():
+        DROPPED_REQUESTS.labels(reason="loading").inc()
+        require_ready()
+    start_t = time.time()
+    sampled = capture is not None and capture.sample()
+    if not admission.try_acquire():
+        DROPPED_REQUESTS.labels(reason="queue_full").inc()
+        if sampled:
+            capture_request(request, start_t, 429)
+        raise HTTPException(status_code=429, detail="Too many requests in flight, retry later",
+                            headers={"Retry-After": str(admission.retry_after())})
 
     pred_date = request.current_date or str(date.today())
-    start_t = time.time()
+    out = None
+    deadline = time.monotonic() + (request.timeout_s or PREDICT_TIMEOUT_S)
+    ADMISSION_DEPTH.set(admission.depth)
     try:
         with INFERENCE_TIME.time():
-            result = model.predict(request.transcript, current_date=pred_date)
+            out = await await_unless_disconnected(
+                http_request, model.predict_async(request.transcript, current_date=pred_date, mode=request.mode,
+                                                 deadline=deadline, priority=request.priority))
+        if out is None:
+            # Client is gone; nothing will read the response
+            DROPPED_REQUESTS.labels(reason="disconnected").inc()
+            return Response(status_code=499)
+        result, meta = out
+        record_inference_meta(meta)
+        response.headers["X-Inference-Path"] = meta.get("path", "cache")
 
         if isinstance(result, dict) and "error" in result:
             REQUEST_ERRORS.inc()
@@ -193,11 +488,24 @@ def predict_disposition(request: TranscriptRequest):
         return result
     except HTTPException:
         raise
+    except DeadlineExceeded:
+        DROPPED_REQUESTS.labels(reason="deadline").inc()
+        raise HTTPException(status_code=504, detail="Request timed out waiting for the model")
+    except PoolUnavailable as e:
+        DROPPED_REQUESTS.labels(reason="unavailable").inc()
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(admission.retry_after())})
     except Exception as e:
         REQUEST_ERRORS.inc()
         print(f"ERROR in /predict: {str(e)}")
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        admission.release(time.time() - start_t)
+        ADMISSION_DEPTH.set(admission.depth)
+        if sampled:
+            error = sys.exc_info()[1]
+            status = getattr(error, "status_code", 500) if error is not None else (200 if out is not None else 499)
+            capture_request(request, start_t, status, out[1] if out is not None else None)
 
 @app.get('/metrics')
 def metrics():
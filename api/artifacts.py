@@ -0,0 +1,66 @@
+import hashlib
+import json
+import os
+
+import torch
+
+# Tokenizer-derived lookup tables are cached here, keyed by a hash of the tokenizer,
+# so a restart does not have to walk the whole vocabulary again.
+ARTIFACT_DIR = os.getenv("ARTIFACT_CACHE_DIR", os.path.expanduser("~/.cache/disposition_model"))
+
+
+def tokenizer_hash(tokenizer) -> str:
+    """Stable fingerprint of a tokenizer's vocabulary, merges and added tokens."""
+    h = hashlib.sha256(type(tokenizer).__name__.encode())
+    backend = getattr(tokenizer, "backend_tokenizer", None)
+    if backend is not None:
+        h.update(backend.to_str().encode())
+    else:
+        h.update(json.dumps(sorted(tokenizer.get_vocab().items())).encode())
+    h.update(json.dumps(sorted(str(t) for t in tokenizer.all_special_tokens)).encode())
+    return h.hexdigest()[:16]
+
+
+def load_or_build(name, tokenizer, build_fn):
+    """Return the cached artifact `name` for this tokenizer, building and saving it on a miss."""
+    key = getattr(tokenizer, "_artifact_hash", None)
+    if key is None:
+        key = tokenizer_hash(tokenizer)
+        tokenizer._artifact_hash = key
+    path = os.path.join(ARTIFACT_DIR, f"{name}-{key}.pt")
+    if os.path.exists(path):
+        try:
+            return torch.load(path)
+        except Exception as e:
+            print(f"Ignoring unreadable artifact {path}: {e}")
+
+    value = build_fn()
+    try:
+        os.makedirs(ARTIFACT_DIR, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        torch.save(value, tmp_path)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Could not cache artifact {path}: {e}")
+    return value
+
+
+def token_strings(tokenizer):
+    """Decoded text of every token ID, as one list indexed by ID."""
+    def build():
+        # One batched decode call instead of len(tokenizer) separate decode() calls
+        return tokenizer.batch_decode([[tid] for tid in range(len(tokenizer))])
+    return load_or_build("token_strings", tokenizer, build)
+
+
+def brace_counts(tokenizer):
+    """(opens, closes): number of '{' and '}' characters in each token, as int tensors indexed by ID."""
+    def build():
+        import numpy as np
+        strings = np.array(token_strings(tokenizer), dtype=object).astype(str)
+        return {
+            "opens": torch.from_numpy(np.char.count(strings, "{").astype(np.int16)),
+            "closes": torch.from_numpy(np.char.count(strings, "}").astype(np.int16)),
+        }
+    table = load_or_build("brace_counts", tokenizer, build)
+    return table["opens"], table["closes"]
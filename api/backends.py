@@ -0,0 +1,162 @@
+import json
+import os
+import time
+
+# How the model is loaded and run: "unsloth" (CUDA, 4-bit bitsandbytes), "transformers"
+# (plain Hugging Face model on CUDA if present, else CPU) or "cpu_int8" (CPU, Linear layers
+# dynamically quantized to int8). The CPU backends need a full-precision checkpoint, or
+# an adapter whose base model loads without bitsandbytes.
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "unsloth")
+# torch intra-op threads for the CPU backends (0 = torch's default)
+CPU_THREADS = int(os.getenv("CPU_THREADS", "0"))
+# Local safetensors snapshot of the model with adapters merged (written by export_snapshot.py).
+# When it holds a snapshot of QWEN_MODEL it is loaded instead, memory-mapped and without Hub
+# requests or adapter merging; empty = always load QWEN_MODEL.
+MODEL_SNAPSHOT_DIR = os.getenv("MODEL_SNAPSHOT_DIR", "")
+SNAPSHOT_MANIFEST = "snapshot.json"
+
+
+def snapshot_path(model_path, snapshot_dir=MODEL_SNAPSHOT_DIR):
+    """Where to load `model_path` from: the snapshot if it was exported from it, else model_path."""
+    if not snapshot_dir:
+        return model_path
+    manifest = os.path.join(snapshot_dir, SNAPSHOT_MANIFEST)
+    if not os.path.exists(manifest):
+        print(f"No model snapshot in {snapshot_dir}; loading {model_path} (run export_snapshot.py to create one)")
+        return model_path
+    with open(manifest, encoding="utf-8") as f:
+        source = json.load(f).get("source")
+    if source != model_path:
+        print(f"Model snapshot in {snapshot_dir} is of {source}, not {model_path}; ignoring it")
+        return model_path
+    return snapshot_dir
+
+
+class Backend:
+    """Loads a causal LM and runs its primitives for DispositionModel.
+
+    The prompt, stop criteria, grammar constraints and clean_output stay in
+    DispositionModel, so every backend produces the same response format; a backend
+    only decides how weights are loaded and where tensors live. `score` is a plain
+    forward pass (prefix cache, label scoring, jump-forward decoding all call it)."""
+    name = "base"
+
+    def __init__(self):
+        self.model, self.tokenizer, self.device = None, None, "cpu"
+
+    def load(self, model_path, max_seq_len):
+        raise NotImplementedError
+
+    def attach(self, model, tokenizer, device):
+        """Use an already loaded model (e.g. a tiny CPU checkpoint for local testing)."""
+        self.model, self.tokenizer, self.device = model, tokenizer, device
+        return self
+
+    def tokenize(self, texts, **kwargs):
+        return self.tokenizer(texts, return_tensors="pt", **kwargs).to(self.device)
+
+    def generate(self, **kwargs):
+        return self.model.generate(**kwargs)
+
+    def score(self, **kwargs):
+        return self.model(**kwargs)
+
+    def _save_weights(self, out_dir):
+        self.model.save_pretrained(out_dir, safe_serialization=True)
+        self.tokenizer.save_pretrained(out_dir)
+
+    def save_snapshot(self, out_dir, source):
+        """Write the loaded (merged) model as a safetensors snapshot that snapshot_path() accepts.
+
+        The manifest is written last, so an interrupted export is never picked up."""
+        os.makedirs(out_dir, exist_ok=True)
+        manifest = os.path.join(out_dir, SNAPSHOT_MANIFEST)
+        if os.path.exists(manifest):
+            os.remove(manifest)
+        self._save_weights(out_dir)
+        with open(manifest, "w", encoding="utf-8") as f:
+            json.dump({"source": source, "backend": self.name, "created_at": time.strftime("%Y-%m-%dT%H:%M:%S")}, f, indent=2)
+
+
+class UnslothBackend(Backend):
+    name = "unsloth"
+
+    def load(self, model_path, max_seq_len):
+        import torch
+        from unsloth import FastLanguageModel
+        if not torch.cuda.is_available():
+            raise RuntimeError("CUDA is not available. The unsloth backend requires a GPU; "
+                               "set INFERENCE_BACKEND=transformers or cpu_int8 to run on CPU.")
+        self.device = "cuda"
+        print(f"Using device: {self.device}")
+        self.model, self.tokenizer = FastLanguageModel.from_pretrained(
+            model_name=model_path,
+            max_seq_length=max_seq_len,
+            dtype=None,  # Auto
+            load_in_4bit=True,
+        )
+        FastLanguageModel.for_inference(self.model)
+        return self
+
+    def _save_weights(self, out_dir):
+        # LoRA merged into 16-bit weights; loading re-quantizes them to 4-bit on the GPU
+        self.model.save_pretrained_merged(out_dir, self.tokenizer, save_method="merged_16bit")
+
+
+def load_hf_model(model_path, dtype):
+    """Tokenizer and eval-mode model; a LoRA adapter checkpoint is merged into its base model."""
+    from transformers import AutoModelForCausalLM, AutoTokenizer
+    tokenizer = AutoTokenizer.from_pretrained(model_path)
+    if os.path.isdir(model_path) and not os.path.exists(os.path.join(model_path, "adapter_config.json")):
+        # Local full checkpoint (e.g. a snapshot): safetensors weights are memory-mapped as loaded
+        return tokenizer, AutoModelForCausalLM.from_pretrained(model_path, torch_dtype=dtype).eval()
+    try:
+        from peft import AutoPeftModelForCausalLM
+        model = AutoPeftModelForCausalLM.from_pretrained(model_path, torch_dtype=dtype).merge_and_unload()
+    except (ImportError, ValueError, OSError):
+        # No peft, or not an adapter checkpoint
+        model = AutoModelForCausalLM.from_pretrained(model_path, torch_dtype=dtype)
+    return tokenizer, model.eval()
+
+
+class TransformersBackend(Backend):
+    name = "transformers"
+
+    def load(self, model_path, max_seq_len):
+        import torch
+        if CPU_THREADS:
+            torch.set_num_threads(CPU_THREADS)
+        self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        print(f"Using device: {self.device}")
+        dtype = torch.float16 if self.device == "cuda" else torch.float32
+        self.tokenizer, self.model = load_hf_model(model_path, dtype)
+        self.model.to(self.device)
+        return self
+
+
+class CpuInt8Backend(Backend):
+    name = "cpu_int8"
+
+    def load(self, model_path, max_seq_len):
+        import torch
+        if CPU_THREADS:
+            torch.set_num_threads(CPU_THREADS)
+        self.device = "cpu"
+        print("Using device: cpu (int8 dynamic quantization)")
+        self.tokenizer, model = load_hf_model(model_path, torch.float32)
+        # Weights of every Linear layer are stored in int8; activations are quantized per call
+        self.model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        return self
+
+    def _save_weights(self, out_dir):
+        raise ValueError("Dynamically quantized weights cannot be saved as a snapshot; export with "
+                         "INFERENCE_BACKEND=transformers and load that snapshot with cpu_int8")
+
+
+BACKENDS = {cls.name: cls for cls in (UnslothBackend, TransformersBackend, CpuInt8Backend)}
+
+
+def get_backend(name=INFERENCE_BACKEND):
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown INFERENCE_BACKEND {name!r}; expected one of {', '.join(BACKENDS)}")
+    return BACKENDS[name]()
@@ -0,0 +1,197 @@
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+
+class DeadlineExceeded(TimeoutError):
+    """The item's deadline passed while it was still queued; it never reached the model."""
+
+
+def pack_by_length(lengths, token_budget, max_rows):
+    """Group row indices into batches of similar length.
+
+    Rows are sorted by length and a batch grows while rows * longest row stays within
+    `token_budget` and it has at most `max_rows` rows. A row longer than the budget
+    gets a batch of its own. Returns lists of indices into `lengths`."""
+    batches, batch = [], []
+    for i in sorted(range(len(lengths)), key=lengths.__getitem__):
+        if batch and ((len(batch) + 1) * lengths[i] > token_budget or len(batch) >= max_rows):
+            batches.append(batch)
+            batch = []
+        batch.append(i)
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+PRIORITY_CLASSES = ("interactive", "batch", "backfill")
+# predict() modes: "generate" produces the full JSON, "classify" only scores the
+# disposition / payment labels (no remarks, ptp_details or generated confidence)
+PREDICT_MODES = ("generate", "classify")
+
+
+class ClassQueue:
+    """FIFO queues of (entries, sealed) groups per priority class, with a share-aware pick.
+
+    get() serves the highest-priority class that has work waiting, except that a class
+    in `min_shares` whose share of recent model time has fallen below its minimum is
+    served first, so e.g. bulk rows keep moving while interactive traffic is heavy.
+    Model time per class is tracked with exponential decay (record())."""
+    def __init__(self, min_shares=None, decay=0.95):
+        self.min_shares = dict(min_shares or {})
+        self.decay = decay
+        self._queues = {c: deque() for c in PRIORITY_CLASSES}
+        self._served = dict.fromkeys(PRIORITY_CLASSES, 0.0)
+        self._cond = threading.Condition()
+
+    def put(self, group, priority):
+        with self._cond:
+            self._queues[priority].append(group)
+            self._cond.notify_all()
+
+    def _waiting(self):
+        return [c for c in PRIORITY_CLASSES if self._queues[c]]
+
+    def _pick(self, waiting):
+        total = sum(self._served.values())
+        for c in waiting:
+            if total > 0 and self._served[c] / total < self.min_shares.get(c, 0.0):
+                return c
+        return waiting[0]
+
+    def get(self, timeout=None):
+        """Next (priority, group) by the policy above; raises queue.Empty after `timeout`."""
+        with self._cond:
+            if not self._cond.wait_for(self._waiting, timeout):
+                raise queue.Empty
+            priority = self._pick(self._waiting())
+            return priority, self._queues[priority].popleft()
+
+    def get_unsealed(self, priority, timeout):
+        """The next group of `priority` if it is unsealed, waiting up to `timeout`; else None."""
+        with self._cond:
+            q = self._queues[priority]
+            if not self._cond.wait_for(lambda: q, max(0.0, timeout)) or q[0][1]:
+                return None  # nothing came, or a sealed group that runs as its own batch
+            return q.popleft()
+
+    def record(self, priority, seconds):
+        with self._cond:
+            for c in self._served:
+                self._served[c] *= self.decay
+            self._served[priority] += seconds
+
+    def qsize(self):
+        with self._cond:
+            return sum(len(q) for q in self._queues.values())
+
+
+class MicroBatcher:
+    """Collects concurrent submissions and runs them through one `batch_fn` call.
+
+    A batch closes when `max_batch_size` items are waiting or `window_ms` has passed
+    since its first item arrived, whichever comes first. `batch_fn` receives a list of
+    items and must return one result per item, in order. Each caller gets a Future;
+    once it resolves, `future.queue_wait` and `future.batch_size` describe how the
+    item was scheduled.
+
+    submit_batch() hands over a batch the caller already packed (e.g. length-sorted
+    bulk rows); it runs as-is, without being merged with other submissions.
+
+    Items whose Future was cancelled, or whose `deadline` (time.monotonic()) has
+    passed by the time their batch starts, are dropped before `batch_fn` sees them;
+    the latter fail with DeadlineExceeded.
+
+    Every submission has a priority class (PRIORITY_CLASSES); a batch holds one class
+    and the next class to run is chosen by ClassQueue, which guarantees the classes in
+    `min_shares` a minimum share of model time. `future.priority` and
+    `future.latency` (queueing to result) are set as well.
+    """
+    def __init__(self, batch_fn, max_batch_size=8, window_ms=25, name="micro-batcher", min_shares=None):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.window_s = max(0.0, window_ms / 1000.0)
+        self._queue = ClassQueue(min_shares)
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    @staticmethod
+    def _future(deadline, priority):
+        if priority not in PRIORITY_CLASSES:
+            raise ValueError(f"Unknown priority {priority!r}; expected one of {', '.join(PRIORITY_CLASSES)}")
+        fut = Future()
+        fut.deadline, fut.priority = deadline, priority
+        return fut
+
+    def submit(self, item, deadline=None, priority="interactive") -> Future:
+        fut = self._future(deadline, priority)
+        self._queue.put(([(item, fut, time.monotonic())], False), priority)
+        return fut
+
+    def submit_batch(self, items, deadline=None, priority="batch"):
+        """Queue `items` to run together as one batch; returns one Future per item."""
+        now = time.monotonic()
+        entries = [(item, self._future(deadline, priority), now) for item in items]
+        self._queue.put((entries, True), priority)
+        return [fut for _, fut, _ in entries]
+
+    @staticmethod
+    def _admit(entry, now):
+        """Whether a collected entry should run: not cancelled and not past its deadline."""
+        fut = entry[1]
+        if not fut.set_running_or_notify_cancel():
+            return False
+        if fut.deadline is not None and fut.deadline < now:
+            fut.set_exception(DeadlineExceeded(f"Deadline passed {now - fut.deadline:.3f}s before the batch started"))
+            return False
+        return True
+
+    def qsize(self):
+        return self._queue.qsize()
+
+    def _collect(self):
+        """Next batch and its priority class: a sealed group as-is, or unsealed groups
+        of one class gathered until the batch is full or the window closes."""
+        priority, (batch, sealed) = self._queue.get()
+        if sealed:
+            return priority, batch
+        deadline = batch[0][2] + self.window_s
+        while len(batch) < self.max_batch_size:
+            # Once the window is over, still take whatever already queued up meanwhile
+            group = self._queue.get_unsealed(priority, deadline - time.monotonic())
+            if group is None:
+                break
+            batch.extend(group[0])
+        return priority, batch
+
+    def _run(self):
+        while True:
+            priority, batch = self._collect()
+            # Drop callers that cancelled or ran out of time while waiting
+            now = time.monotonic()
+            batch = [entry for entry in batch if self._admit(entry, now)]
+            if not batch:
+                continue
+
+            started = time.monotonic()
+            for _, fut, enqueued in batch:
+                fut.queue_wait = started - enqueued
+                fut.batch_size = len(batch)
+
+            try:
+                results = self.batch_fn([item for item, _, _ in batch])
+                if len(results) != len(batch):
+                    raise RuntimeError(f"batch_fn returned {len(results)} results for {len(batch)} items")
+            except Exception as e:
+                for _, fut, _ in batch:
+                    fut.set_exception(e)
+                continue
+            finally:
+                self._queue.record(priority, time.monotonic() - started)
+
+            finished = time.monotonic()
+            for (_, fut, enqueued), res in zip(batch, results):
+                fut.latency = finished - enqueued
+                fut.set_result(res)
@@ -0,0 +1,177 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+def normalize_transcript(transcript):
+    """Canonical form used for cache keys: NFC unicode, collapsed whitespace."""
+    return " ".join(unicodedata.normalize("NFC", str(transcript)).split())
+
+
+class PredictionCache:
+    """Bounded LRU + TTL cache for predictions, with single-flight request coalescing.
+
+    Values are stored as JSON so callers always get their own copy. An optional SQLite
+    file acts as a second tier that survives restarts. Concurrent get_or_compute()
+    calls for the same key share one computation instead of each running inference.
+    """
+    def __init__(self, max_entries=10000, ttl_s=86400, db_path=None):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self._entries = OrderedDict()  # key -> (expires_at, json)
+        self._inflight = {}  # key -> Future of the leader's computation
+        self._lock = threading.Lock()
+        self._db = None
+        self._db_lock = threading.Lock()
+        if db_path:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            with self._db_lock, self._db:
+                self._db.execute("CREATE TABLE IF NOT EXISTS predictions (key TEXT PRIMARY KEY, expires_at REAL, value TEXT)")
+                self._db.execute("DELETE FROM predictions WHERE expires_at < ?", (time.time(),))
+
+    @staticmethod
+    def make_key(transcript, current_date, mode, model_version, prompt_version):
+        raw = json.dumps([normalize_transcript(transcript), current_date, mode, model_version, prompt_version], ensure_ascii=False)
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def _get_memory(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def _put_memory(self, key, expires_at, value):
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _get_db(self, key):
+        if self._db is None:
+            return None
+        with self._db_lock:
+            row = self._db.execute("SELECT expires_at, value FROM predictions WHERE key = ?", (key,)).fetchone()
+        if row is None or row[0] < time.time():
+            return None
+        return row
+
+    def get(self, key):
+        with self._lock:
+            value = self._get_memory(key)
+        if value is None:
+            row = self._get_db(key)
+            if row is None:
+                return None
+            with self._lock:
+                self._put_memory(key, row[0], row[1])
+            value = row[1]
+        return json.loads(value)
+
+    def put(self, key, value):
+        expires_at = time.time() + self.ttl_s
+        data = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            self._put_memory(key, expires_at, data)
+        if self._db is not None:
+            with self._db_lock, self._db:
+                self._db.execute("INSERT OR REPLACE INTO predictions VALUES (?, ?, ?)", (key, expires_at, data))
+
+    def get_or_compute(self, key, compute, cacheable=lambda value: True):
+        """Return (value, status) where status is "hit", "miss" or "coalesced".
+
+        Only the first caller for a key runs `compute`; callers arriving while it runs
+        wait for and share its result (or its exception)."""
+        with self._lock:
+            value = self._get_memory(key)
+            if value is not None:
+                return json.loads(value), "hit"
+            fut = self._inflight.get(key)
+            leader = fut is None
+            if leader:
+                fut = Future()
+                self._inflight[key] = fut
+        if not leader:
+            return json.loads(json.dumps(fut.result())), "coalesced"
+
+        try:
+            row = self._get_db(key)
+            if row is not None:
+                with self._lock:
+                    self._put_memory(key, row[0], row[1])
+                value, status = json.loads(row[1]), "hit"
+            else:
+                value, status = compute(), "miss"
+                if cacheable(value):
+                    self.put(key, value)
+            if not fut.done():
+                fut.set_result(value)
+            return value, status
+        except BaseException as e:
+            if not fut.done():
+                fut.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    async def get_or_compute_async(self, key, compute, cacheable=lambda value: True):
+        """get_or_compute() for coroutines: `compute` is an async callable and followers
+        await the leader's result instead of blocking a thread on it. The SQLite tier
+        is read and written in the loop's executor."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            value = self._get_memory(key)
+            if value is not None:
+                return json.loads(value), "hit"
+            fut = self._inflight.get(key)
+            leader = fut is None
+            if leader:
+                fut = Future()
+                self._inflight[key] = fut
+        if not leader:
+            # Shielded: a follower that is cancelled (client gone) must not cancel the
+            # shared future the leader and the other followers are waiting on
+            return json.loads(json.dumps(await asyncio.shield(asyncio.wrap_future(fut)))), "coalesced"
+
+        try:
+            row = await loop.run_in_executor(None, self._get_db, key)
+            if row is not None:
+                with self._lock:
+                    self._put_memory(key, row[0], row[1])
+                value, status = json.loads(row[1]), "hit"
+            else:
+                value, status = await compute(), "miss"
+            # Followers get the value before the (possibly slow) SQLite write
+            if not fut.done():
+                fut.set_result(value)
+            if status == "miss" and cacheable(value):
+                await loop.run_in_executor(None, self.put, key, value)
+            return value, status
+        except asyncio.CancelledError:
+            # The leader's client went away; followers get an error, not a cancellation
+            if not fut.done():
+                fut.set_exception(RuntimeError("The request computing this prediction was cancelled"))
+            raise
+        except BaseException as e:
+            if not fut.done():
+                fut.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
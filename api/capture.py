@@ -0,0 +1,141 @@
+import atexit
+import glob
+import gzip
+import json
+import os
+import queue
+import random
+import re
+import threading
+import time
+import zlib
+
+# Share of /predict requests recorded for replay (0 = capture off)
+CAPTURE_SAMPLE_RATE = float(os.getenv("CAPTURE_SAMPLE_RATE", "0"))
+CAPTURE_DIR = os.getenv("CAPTURE_DIR", os.path.expanduser("~/.cache/disposition_model/capture"))
+# Ring of gzipped JSONL files: a file is closed at CAPTURE_FILE_MB compressed and the
+# oldest is deleted once there are more than CAPTURE_MAX_FILES
+CAPTURE_FILE_MB = float(os.getenv("CAPTURE_FILE_MB", "64"))
+CAPTURE_MAX_FILES = int(os.getenv("CAPTURE_MAX_FILES", "16"))
+# Replace phone numbers, emails / UPI IDs and ID or account numbers in captured transcripts
+CAPTURE_MASK_PII = os.getenv("CAPTURE_MASK_PII", "1") == "1"
+# Records waiting for the writer thread; when it falls behind, new records are dropped
+CAPTURE_QUEUE_SIZE = int(os.getenv("CAPTURE_QUEUE_SIZE", "10000"))
+
+PII_PATTERNS = [
+    (re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)*"), "<EMAIL>"),  # also UPI IDs (name@okaxis)
+    (re.compile(r"(?<!\d)(?:\+?91[\s-]?)?[6-9]\d{4}[\s-]?\d{5}(?!\d)"), "<PHONE>"),
+    (re.compile(r"(?<!\d)\d{4}[\s-]\d{4}[\s-]\d{4}(?!\d)"), "<ID>"),  # Aadhaar
+    (re.compile(r"\b[A-Z]{5}\d{4}[A-Z]\b"), "<ID>"),  # PAN
+    (re.compile(r"(?<!\d)\d{9,18}(?!\d)"), "<NUMBER>"),  # account / loan numbers
+]
+
+
+def mask_pii(text):
+    """Mask contact details and ID numbers. Amounts and dates (short numbers) are kept
+    since they shape the model's work; names are not detected."""
+    for pattern, token in PII_PATTERNS:
+        text = pattern.sub(token, text)
+    return text
+
+
+def read_capture(paths):
+    """Records from capture files (glob patterns or directories), oldest arrival first.
+
+    A file still being written (or cut off by a crash) is read up to its last flush."""
+    files = []
+    for path in paths:
+        files.extend(sorted(glob.glob(os.path.join(path, "*.jsonl.gz"))) if os.path.isdir(path) else sorted(glob.glob(path)))
+    records = []
+    for file in files:
+        try:
+            with gzip.open(file, "rt", encoding="utf-8") as f:
+                for line in f:
+                    records.append(json.loads(line))
+        except (EOFError, json.JSONDecodeError):
+            # Unfinished gzip stream or half-written last line
+            pass
+    records.sort(key=lambda r: r["ts"])
+    return records
+
+
+class TrafficCapture:
+    """Samples /predict traffic into a ring of gzipped JSONL files for replay.
+
+    record() only enqueues; a writer thread does the masking, compression and file
+    rotation, so capture never blocks a request. Each record has the arrival time
+    (`ts`), the request fields, the transcript's size and how it was answered
+    (status, latency_s, path, language)."""
+    def __init__(self, sample_rate=CAPTURE_SAMPLE_RATE, capture_dir=CAPTURE_DIR, file_mb=CAPTURE_FILE_MB,
+                 max_files=CAPTURE_MAX_FILES, mask=CAPTURE_MASK_PII, queue_size=CAPTURE_QUEUE_SIZE):
+        self.sample_rate = sample_rate
+        self.capture_dir = capture_dir
+        self.file_bytes = int(file_mb * 1024 * 1024)
+        self.max_files = max_files
+        self.mask = mask
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._raw, self._gz = None, None
+        os.makedirs(capture_dir, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="traffic-capture", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def sample(self):
+        return random.random() < self.sample_rate
+
+    def record(self, **fields):
+        """Queue a record; returns False when the writer is behind and it was dropped."""
+        try:
+            self._queue.put_nowait(fields)
+            return True
+        except queue.Full:
+            return False
+
+    def _open(self):
+        name = time.strftime("capture-%Y%m%d-%H%M%S") + f"-{time.time_ns() % 10**9:09d}.jsonl.gz"
+        self._raw = open(os.path.join(self.capture_dir, name), "wb")
+        self._gz = gzip.GzipFile(fileobj=self._raw, mode="wb")
+        files = sorted(glob.glob(os.path.join(self.capture_dir, "capture-*.jsonl.gz")))
+        for old in files[:max(0, len(files) - self.max_files)]:
+            os.remove(old)
+
+    def _close_file(self):
+        if self._gz is not None:
+            self._gz.close()
+            self._raw.close()
+            self._raw, self._gz = None, None
+
+    def _write(self, fields):
+        transcript = fields.get("transcript", "")
+        fields["chars"] = len(transcript)
+        if self.mask:
+            fields["transcript"] = mask_pii(transcript)
+        if self._gz is None:
+            self._open()
+        self._gz.write((json.dumps(fields, ensure_ascii=False) + "\n").encode("utf-8"))
+        if self._raw.tell() >= self.file_bytes:
+            self._close_file()
+
+    def _run(self):
+        while True:
+            try:
+                fields = self._queue.get(timeout=1.0)
+            except queue.Empty:
+                # Idle: make what was written so far readable without closing the file
+                if self._gz is not None:
+                    self._gz.flush(zlib.Z_SYNC_FLUSH)
+                continue
+            if fields is None:
+                self._close_file()
+                return
+            try:
+                self._write(fields)
+            except Exception as e:
+                print(f"Traffic capture write failed: {e}")
+                self._close_file()
+
+    def close(self, timeout=5.0):
+        """Write out queued records and finish the current file."""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout)
@@ -0,0 +1,76 @@
+import re
+import unicodedata
+
+# Speaker tags that start a turn in diarized transcripts ("Agent:", "SPEAKER_01:", ...)
+SPEAKER_TAG = re.compile(r"\b(?:agent|borrower|customer|caller|speaker[ _]?\d+)\s*:", re.IGNORECASE)
+# Non-speech markers and timestamps left by ASR / diarization
+NOISE = re.compile(
+    r"[\[<(]\s*(?:noise|music|inaudible|unk|unintelligible|laughter|laughs|crosstalk|silence|beep|cough|breathing|background[^\]>)]*)\s*[\]>)]"
+    r"|\d{1,2}:\d{2}:\d{2}[.,]\d+\s*-->\s*\d{1,2}:\d{2}:\d{2}[.,]\d+"
+    r"|[\[(]\d{1,2}:\d{2}(?::\d{2})?(?:[.,]\d+)?[\])]",
+    re.IGNORECASE,
+)
+# Words that carry no content on their own; a run of turns made only of these is kept once
+FILLER_WORDS = {
+    "hello", "hallo", "helo", "hi", "hey", "hmm", "hm", "hmmm", "uh", "um", "umm", "ah", "oh", "ok", "okay",
+    "haan", "han", "haa", "ha", "ji", "hanji", "achha", "acha", "accha", "theek", "thik", "sir", "madam", "mam",
+    "हेलो", "हैलो", "हाँ", "हां", "जी", "हम्म", "अच्छा", "ठीक", "सर",
+}
+
+
+def _strip_punctuation(word):
+    start, end = 0, len(word)
+    while start < end and unicodedata.category(word[start])[0] in "PS":
+        start += 1
+    while end > start and unicodedata.category(word[end - 1])[0] in "PS":
+        end -= 1
+    return word[start:end]
+
+
+def _words(text):
+    """Whitespace-separated words with surrounding punctuation removed. (Not \\w+, which
+    splits Devanagari and other Indic scripts at every vowel sign.)"""
+    words = (_strip_punctuation(w) for w in re.split(r"[\s,;]+", text.lower()))
+    return [w for w in words if w]
+
+
+def _is_filler(text):
+    words = _words(text)
+    return bool(words) and all(w in FILLER_WORDS for w in words)
+
+
+def content_words(text):
+    """The words of `text` that are not filler ("hello", "haan ji", ...)."""
+    return [w for w in _words(text) if w not in FILLER_WORDS]
+
+
+def split_turns(transcript):
+    """Split a transcript into (speaker tag, text) turns; text before the first tag has tag ''."""
+    turns, pos, tag = [], 0, ""
+    for m in SPEAKER_TAG.finditer(transcript):
+        turns.append((tag, transcript[pos:m.start()]))
+        tag, pos = m.group(0), m.end()
+    turns.append((tag, transcript[pos:]))
+    return [(tag, " ".join(text.split())) for tag, text in turns]
+
+
+def compact_transcript(transcript):
+    """Remove tokens that do not inform the disposition.
+
+    Strips ASR / diarization noise markers and subtitle-style timestamps, drops turns
+    left empty, keeps one turn out of each run of consecutive filler-only turns
+    ("hello? / hello? / haan ji"), drops a turn that repeats the previous one
+    verbatim, and collapses whitespace. Speaker tags and all content words are kept."""
+    turns = split_turns(NOISE.sub(" ", str(transcript)))
+    kept = []
+    for tag, text in turns:
+        if not text:
+            continue
+        if kept:
+            prev_tag, prev_text = kept[-1]
+            if text.lower() == prev_text.lower() and tag.lower() == prev_tag.lower():
+                continue
+            if _is_filler(text) and _is_filler(prev_text):
+                continue
+        kept.append((tag, text))
+    return " ".join(f"{tag} {text}".strip() if tag else text for tag, text in kept)
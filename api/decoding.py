@@ -0,0 +1,361 @@
+import copy
+import time
+
+import torch
+
+from artifacts import brace_counts
+
+
+def prefill(model, inputs, extra_ids=None):
+    """Prefill a batch prepared by DispositionModel.model_inputs(), optionally followed by
+    `extra_ids` (the same tokens appended to every row).
+
+    Returns (last-position logits, KV cache, attention mask, next position per row)."""
+    input_ids, attention_mask = inputs["input_ids"], inputs["attention_mask"]
+    past_key_values = inputs.get("past_key_values")
+    cached = past_key_values.get_seq_length() if past_key_values is not None else 0
+    if extra_ids:
+        extra = torch.tensor([extra_ids] * input_ids.shape[0], dtype=input_ids.dtype, device=input_ids.device)
+        input_ids = torch.cat([input_ids, extra], dim=1)
+        attention_mask = torch.cat([attention_mask, torch.ones_like(extra, dtype=attention_mask.dtype)], dim=1)
+
+    position_ids = (attention_mask.long().cumsum(-1) - 1).clamp(min=0)
+    out = model(
+        input_ids=input_ids[:, cached:],
+        attention_mask=attention_mask,
+        position_ids=position_ids[:, cached:],
+        past_key_values=past_key_values,
+        use_cache=True,
+    )
+    return out.logits[:, -1, :], out.past_key_values, attention_mask, position_ids[:, -1] + 1
+
+
+@torch.inference_mode()
+def score_continuations(model, prefilled, continuations, pad_token_id, contexts=None, chunk_rows=32):
+    """Log-likelihood of candidate continuations after each prefilled prompt.
+
+    `prefilled` is the result of prefill(); `continuations[row]` is a list of token ID
+    lists to score after that row's prompt, each optionally preceded by the unscored
+    tokens `contexts[row]`. The prompt's KV cache is reused (copied per chunk of
+    candidates), so only context and candidate tokens go through the model.
+    Returns one list of summed log-probabilities per row."""
+    last_logits, past_key_values, attention_mask, next_pos = prefilled
+    device = last_logits.device
+    contexts = contexts or [[] for _ in continuations]
+    first_logprobs = torch.log_softmax(last_logits.float(), dim=-1)
+    flat = [(row, i, contexts[row] + cand, len(contexts[row]))
+            for row, cands in enumerate(continuations) for i, cand in enumerate(cands)]
+    scores = [[0.0] * len(cands) for cands in continuations]
+
+    for start in range(0, len(flat), chunk_rows):
+        chunk = flat[start:start + chunk_rows]
+        rows = torch.tensor([row for row, _, _, _ in chunk], device=device)
+        width = max(len(ids) for _, _, ids, _ in chunk)
+        ids = torch.full((len(chunk), width), pad_token_id, dtype=torch.long, device=device)
+        real = torch.zeros((len(chunk), width), dtype=attention_mask.dtype, device=device)
+        scored = torch.zeros((len(chunk), width), dtype=torch.bool, device=device)
+        for j, (_, _, full, n_context) in enumerate(chunk):
+            ids[j, :len(full)] = torch.tensor(full, device=device)
+            real[j, :len(full)] = 1
+            scored[j, n_context:len(full)] = True
+
+        # Position k is predicted by the prompt's last logits (k = 0) or by step k - 1
+        logprobs = torch.zeros((len(chunk), width), device=device)
+        logprobs[:, 0] = first_logprobs[rows, ids[:, 0]]
+        if width > 1:
+            cache = copy.deepcopy(past_key_values)
+            cache.batch_select_indices(rows)
+            positions = next_pos[rows].unsqueeze(1) + torch.arange(width - 1, device=device).unsqueeze(0)
+            out = model(
+                input_ids=ids[:, :-1],
+                attention_mask=torch.cat([attention_mask[rows], real[:, :-1]], dim=1),
+                position_ids=positions,
+                past_key_values=cache,
+                use_cache=True,
+            )
+            step_logprobs = torch.log_softmax(out.logits.float(), dim=-1)
+            logprobs[:, 1:] = step_logprobs.gather(-1, ids[:, 1:].unsqueeze(-1)).squeeze(-1)
+
+        totals = (logprobs * scored).sum(dim=1)
+        for j, (row, i, _, _) in enumerate(chunk):
+            scores[row][i] = totals[j].item()
+    return scores
+
+
+class JumpForwardDecoder:
+    """Greedy decoding that skips model calls for the response's fixed JSON scaffolding.
+
+    Whenever the grammar allows only one continuation (key names, quotes, colons, the
+    ptp_details nesting), that text is tokenized and appended directly. The scaffold
+    in front of the first value rides along with the prefill, and scaffold following
+    a sampled token is fed in the same forward pass as that token, so the model is
+    only stepped once per value token.
+    """
+    def __init__(self, model, tokenizer, grammar_processor):
+        self.model = model
+        self.tokenizer = tokenizer
+        self.grammar = grammar_processor.grammar
+        self.processor = grammar_processor
+        self._encoded = {}
+
+    def encode(self, text):
+        ids = self._encoded.get(text)
+        if ids is None:
+            ids = self.tokenizer(text, add_special_tokens=False)["input_ids"]
+            self._encoded[text] = ids
+        return ids
+
+    def _forward(self, input_ids, attention_mask, position_ids, past_key_values):
+        out = self.model(
+            input_ids=input_ids,
+            attention_mask=attention_mask,
+            position_ids=position_ids,
+            past_key_values=past_key_values,
+            use_cache=True,
+        )
+        return out.logits, out.past_key_values
+
+    @torch.inference_mode()
+    def decode(self, inputs, max_new_tokens):
+        """Run greedy decoding for a batch prepared by DispositionModel.model_inputs().
+
+        Returns (generated token ids per row, stats per row); ttft_s in the stats is the
+        time from the call to the first token (the prefill)."""
+        device = inputs["input_ids"].device
+        self.processor.index.to(device)
+        batch_size = inputs["input_ids"].shape[0]
+
+        states = [self.grammar.start] * batch_size
+        generated = [[] for _ in range(batch_size)]
+        stats = [{"decode_steps": 1, "forced_tokens": 0} for _ in range(batch_size)]
+
+        # The opening scaffold is the same for every row: prefill it with the prompt
+        opening = self.grammar.forced_text(self.grammar.start)
+        opening_ids = self.encode(opening)[:max_new_tokens]
+        for row in range(batch_size):
+            states[row] = self.grammar.advance(states[row], opening)
+            generated[row].extend(opening_ids)
+            stats[row]["forced_tokens"] += len(opening_ids)
+        started, ttft = time.perf_counter(), None
+        last_logits, past_key_values, attention_mask, next_pos = prefill(self.model, inputs, opening_ids)
+
+        active = list(range(batch_size))  # original row index of each row still in the cache
+        while active:
+            new_tokens = []
+            for i, row in enumerate(active):
+                allowed = self.processor.allowed_ids(states[row])
+                token = allowed[torch.argmax(last_logits[i, allowed.to(device)])].item()
+                text = self.processor.index.strings[token] if token < len(self.processor.index.strings) else ""
+                state = self.grammar.advance(states[row], text) if token != self.tokenizer.eos_token_id else None
+                tokens = [token]
+                # Forced scaffold counts against max_new_tokens like sampled tokens
+                room = max_new_tokens - len(generated[row])
+                if state is not None:
+                    forced = self.grammar.forced_text(state)
+                    if forced:
+                        forced_ids = self.encode(forced)[:max(0, room - 1)]
+                        state = self.grammar.advance(state, forced)
+                        tokens.extend(forced_ids)
+                        stats[row]["forced_tokens"] += len(forced_ids)
+                tokens = tokens[:room]
+                states[row] = state
+                if token != self.tokenizer.eos_token_id:
+                    generated[row].extend(tokens)
+                new_tokens.append(tokens)
+
+            if ttft is None:
+                # Picking the first tokens waited for the prefill to finish
+                ttft = time.perf_counter() - started
+            # Rows that completed the grammar (or ran out of budget) need no further model call
+            keep = [i for i, row in enumerate(active)
+                    if states[row] is not None and not self.grammar.complete(states[row])
+                    and len(generated[row]) < max_new_tokens]
+            if not keep:
+                break
+            if len(keep) < len(active):
+                idx = torch.tensor(keep, device=device)
+                past_key_values.batch_select_indices(idx)
+                attention_mask = attention_mask[idx]
+                next_pos = next_pos[idx]
+                active = [active[i] for i in keep]
+                new_tokens = [new_tokens[i] for i in keep]
+
+            width = max(len(t) for t in new_tokens)
+            step_ids = torch.full((len(active), width), self.tokenizer.pad_token_id, dtype=torch.long, device=device)
+            step_mask = torch.zeros((len(active), width), dtype=attention_mask.dtype, device=device)
+            for i, tokens in enumerate(new_tokens):
+                step_ids[i, :len(tokens)] = torch.tensor(tokens, device=device)
+                step_mask[i, :len(tokens)] = 1
+            step_pos = next_pos.unsqueeze(1) + torch.arange(width, device=device).unsqueeze(0)
+            attention_mask = torch.cat([attention_mask, step_mask], dim=1)
+
+            logits, past_key_values = self._forward(step_ids, attention_mask, step_pos, past_key_values)
+            lengths = torch.tensor([len(t) for t in new_tokens], device=device)
+            last_logits = logits[torch.arange(len(active), device=device), lengths - 1]
+            next_pos = next_pos + lengths
+            for row in active:
+                stats[row]["decode_steps"] += 1
+
+        for row in range(batch_size):
+            stats[row]["generated_tokens"] = len(generated[row])
+            stats[row]["ttft_s"] = ttft
+        return generated, stats
+
+
+class PromptLookupDecoder:
+    """Greedy decoding with drafts copied from the prompt (prompt-lookup speculation).
+
+    Much of a response is copied from its input: amounts, dates, phrases reused in
+    remarks, and the JSON keys spelled out in the instructions. After each step the
+    longest suffix of the sequence (up to `max_ngram` tokens) that occurred earlier
+    in the prompt or response is looked up, and the up to `num_draft` tokens that
+    followed its latest occurrence are fed with the new token in one forward pass.
+    Draft tokens are kept while each equals the greedy choice at its position (under
+    the grammar, if one is given), so the output is that of plain greedy decoding;
+    rejected positions stay in the KV cache but are masked out like padding. Rows
+    stop as StopOnJson would: on EOS or when the outermost JSON object closes.
+    """
+    def __init__(self, model, tokenizer, grammar_processor=None, num_draft=10, max_ngram=3):
+        self.model = model
+        self.tokenizer = tokenizer
+        self.processor = grammar_processor
+        self.num_draft = num_draft
+        self.max_ngram = max_ngram
+        self.opens, self.closes = (t.tolist() for t in brace_counts(tokenizer))
+
+    def _pick(self, logits, state):
+        """Greedy token for one row's logits, restricted to the grammar when there is one."""
+        if self.processor is None:
+            return torch.argmax(logits).item()
+        allowed = self.processor.allowed_ids(state)
+        return allowed[torch.argmax(logits[allowed.to(logits.device)])].item()
+
+    def _advance(self, row, token):
+        """Append one token to a row; returns True when the row is finished."""
+        row["generated"].append(token)
+        row["seq"].append(token)
+        if token == self.tokenizer.eos_token_id:
+            row["generated"].pop()
+            return True
+        if self.processor is not None:
+            state = row["state"]
+            strings = self.processor.index.strings
+            if state is None or self.processor.grammar.complete(state) or token >= len(strings):
+                row["state"] = None
+            else:
+                row["state"] = self.processor.grammar.advance(state, strings[token])
+        if token < len(self.opens):
+            row["depth"] += self.opens[token] - self.closes[token]
+            row["started"] |= self.opens[token] > 0
+        return (row["started"] and row["depth"] <= 0) or len(row["generated"]) >= row["budget"]
+
+    def _draft(self, row):
+        """Tokens that followed the latest earlier occurrence of the sequence's suffix."""
+        seq, index = row["seq"], row["index"]
+        # Index n-grams ending before the current end, so the suffix does not find itself
+        for end in range(row["indexed"] + 1, len(seq)):
+            for n in range(1, min(self.max_ngram, end) + 1):
+                index[tuple(seq[end - n:end])] = end
+        row["indexed"] = max(row["indexed"], len(seq) - 1)
+        limit = min(self.num_draft, row["budget"] - len(row["generated"]) - 1)
+        if limit <= 0:
+            return []
+        for n in range(min(self.max_ngram, len(seq)), 0, -1):
+            end = index.get(tuple(seq[-n:]))
+            if end is not None:
+                return seq[end:end + limit]
+        return []
+
+    @torch.inference_mode()
+    def decode(self, inputs, max_new_tokens):
+        """Run greedy decoding for a batch prepared by DispositionModel.model_inputs().
+
+        Returns (generated token ids per row, stats per row); stats also count the
+        drafted and accepted draft tokens, and have ttft_s as in JumpForwardDecoder."""
+        device = inputs["input_ids"].device
+        if self.processor is not None:
+            self.processor.index.to(device)
+        batch_size = inputs["input_ids"].shape[0]
+        prompts = [ids[mask.bool()].tolist() for ids, mask in zip(inputs["input_ids"], inputs["attention_mask"])]
+        rows = [{
+            "seq": prompt, "index": {}, "indexed": 0, "generated": [], "budget": max_new_tokens,
+            "state": self.processor.grammar.start if self.processor is not None else None,
+            "depth": 0, "started": False,
+        } for prompt in prompts]
+        stats = [{"decode_steps": 1, "forced_tokens": 0, "drafted_tokens": 0, "accepted_tokens": 0} for _ in range(batch_size)]
+
+        started, ttft = time.perf_counter(), None
+        last_logits, past_key_values, attention_mask, next_pos = prefill(self.model, inputs)
+        active = list(range(batch_size))  # original row index of each row still in the cache
+        while active:
+            feeds, keep = [], []
+            for i, r in enumerate(active):
+                token = self._pick(last_logits[i], rows[r]["state"])
+                if self._advance(rows[r], token):
+                    continue
+                keep.append(i)
+                feeds.append([token] + self._draft(rows[r]))
+            if ttft is None:
+                # Picking the first tokens waited for the prefill to finish
+                ttft = time.perf_counter() - started
+            if not keep:
+                break
+            if len(keep) < len(active):
+                idx = torch.tensor(keep, device=device)
+                past_key_values.batch_select_indices(idx)
+                attention_mask = attention_mask[idx]
+                next_pos = next_pos[idx]
+                active = [active[i] for i in keep]
+
+            width = max(len(f) for f in feeds)
+            step_ids = torch.full((len(active), width), self.tokenizer.pad_token_id, dtype=torch.long, device=device)
+            step_mask = torch.zeros((len(active), width), dtype=attention_mask.dtype, device=device)
+            for i, feed in enumerate(feeds):
+                step_ids[i, :len(feed)] = torch.tensor(feed, device=device)
+                step_mask[i, :len(feed)] = 1
+            step_pos = next_pos.unsqueeze(1) + torch.arange(width, device=device).unsqueeze(0)
+            base = attention_mask.shape[1]
+            attention_mask = torch.cat([attention_mask, step_mask], dim=1)
+            out = self.model(
+                input_ids=step_ids,
+                attention_mask=attention_mask,
+                position_ids=step_pos,
+                past_key_values=past_key_values,
+                use_cache=True,
+            )
+            past_key_values = out.past_key_values
+
+            # Accept the longest draft prefix that matches the greedy choice at each position
+            accepted, finished = [], set()
+            for i, (r, feed) in enumerate(zip(active, feeds)):
+                n = 0
+                for draft_token in feed[1:]:
+                    if self._pick(out.logits[i, n], rows[r]["state"]) != draft_token:
+                        break
+                    n += 1
+                    if self._advance(rows[r], draft_token):
+                        finished.add(i)
+                        break
+                accepted.append(n)
+                stats[r]["decode_steps"] += 1
+                stats[r]["drafted_tokens"] += len(feed) - 1
+                stats[r]["accepted_tokens"] += n
+                # Rejected draft positions are hidden from every later step
+                attention_mask[i, base + 1 + n:] = 0
+            accepted_t = torch.tensor(accepted, device=device)
+            last_logits = out.logits[torch.arange(len(active), device=device), accepted_t]
+            next_pos = next_pos + 1 + accepted_t
+
+            if finished:
+                keep = [i for i in range(len(active)) if i not in finished]
+                if not keep:
+                    break
+                idx = torch.tensor(keep, device=device)
+                past_key_values.batch_select_indices(idx)
+                attention_mask, next_pos, last_logits = attention_mask[idx], next_pos[idx], last_logits[idx]
+                active = [active[i] for i in keep]
+
+        for r in range(batch_size):
+            stats[r]["generated_tokens"] = len(rows[r]["generated"])
+            stats[r]["ttft_s"] = ttft
+        return [r["generated"] for r in rows], stats
@@ -0,0 +1,347 @@
+import bisect
+import re
+from collections import OrderedDict
+
+import torch
+from transformers import LogitsProcessor
+
+from artifacts import load_or_build, token_strings
+
+# Marker returned by next_chars() when any plain string character may follow
+ANY_CHAR = object()
+DIGITS = set("0123456789")
+# Characters never allowed inside a generated string value. Braces are excluded
+# as well so StopOnJson's depth count cannot be thrown off by free text.
+FORBIDDEN_IN_STRING = set('"\\{}')
+
+
+def is_plain(text):
+    return all(ch not in FORBIDDEN_IN_STRING and ord(ch) >= 32 for ch in text)
+
+
+# =========================
+# SEGMENTS
+# =========================
+# A segment matches one piece of the output one character at a time. Segment states
+# are small immutable values so that grammar states can be memoised.
+
+class Literal:
+    """Fixed scaffolding text such as '", "remarks": '. State: characters consumed."""
+    def __init__(self, text):
+        self.text = text
+        self.start = 0
+
+    def step(self, state, ch):
+        if state < len(self.text) and self.text[state] == ch:
+            return state + 1
+        return None
+
+    def complete(self, state):
+        return state == len(self.text)
+
+    def next_chars(self, state):
+        return {self.text[state]} if state < len(self.text) else set()
+
+
+class Choice:
+    """One of a fixed set of strings. '#' in an option matches any digit. State: text consumed."""
+    def __init__(self, options):
+        self.options = list(options)
+        self.start = ""
+
+    @staticmethod
+    def _matches(option, text):
+        if len(text) > len(option):
+            return False
+        return all(o == c or (o == "#" and c in DIGITS) for o, c in zip(option, text))
+
+    def step(self, state, ch):
+        text = state + ch
+        return text if any(self._matches(o, text) for o in self.options) else None
+
+    def complete(self, state):
+        return any(len(o) == len(state) and self._matches(o, state) for o in self.options)
+
+    def next_chars(self, state):
+        chars = set()
+        for o in self.options:
+            if len(o) > len(state) and self._matches(o, state):
+                chars |= DIGITS if o[len(state)] == "#" else {o[len(state)]}
+        return chars
+
+
+class Number:
+    """A non-negative JSON number, or null when nullable. State: text consumed."""
+    def __init__(self, nullable=False, max_int_digits=9, max_frac_digits=4):
+        self.nullable = nullable
+        self.max_int_digits = max_int_digits
+        self.max_frac_digits = max_frac_digits
+        self.start = ""
+
+    def next_chars(self, state):
+        if state == "":
+            return DIGITS | ({"n"} if self.nullable else set())
+        if state[0] == "n":
+            return {"null"[len(state)]} if len(state) < 4 else set()
+        int_part, dot, frac = state.partition(".")
+        if not dot:
+            # JSON numbers have no leading zeros
+            more_digits = int_part != "0" and len(int_part) < self.max_int_digits
+            return (DIGITS if more_digits else set()) | {"."}
+        return DIGITS if len(frac) < self.max_frac_digits else set()
+
+    def step(self, state, ch):
+        return state + ch if ch in self.next_chars(state) else None
+
+    def complete(self, state):
+        return state == "null" or re.fullmatch(r"(0|[1-9]\d*)(\.\d+)?", state) is not None
+
+
+class String:
+    """A JSON string of at most max_chars plain characters.
+
+    State: -1 before the opening quote, n >= 0 after n characters, -2 once closed."""
+    def __init__(self, max_chars=160):
+        self.max_chars = max_chars
+        self.start = -1
+
+    def step(self, state, ch):
+        if state == -1:
+            return 0 if ch == '"' else None
+        if state < 0:
+            return None
+        if ch == '"':
+            return -2
+        if state < self.max_chars and ch not in FORBIDDEN_IN_STRING and ord(ch) >= 32:
+            return state + 1
+        return None
+
+    def complete(self, state):
+        return state == -2
+
+    def next_chars(self, state):
+        if state == -1:
+            return {'"'}
+        return ANY_CHAR if state >= 0 else set()
+
+
+# =========================
+# GRAMMAR
+# =========================
+
+class JsonGrammar:
+    """A sequence of segments matched left to right. A grammar state is (segment index, segment state)."""
+    def __init__(self, segments):
+        self.segments = segments
+        self.start = (0, segments[0].start)
+
+    def step(self, state, ch):
+        idx, seg_state = state
+        seg = self.segments[idx]
+        new_state = seg.step(seg_state, ch)
+        if new_state is not None:
+            return (idx, new_state)
+        if seg.complete(seg_state) and idx + 1 < len(self.segments):
+            return self.step((idx + 1, self.segments[idx + 1].start), ch)
+        return None
+
+    def advance(self, state, text):
+        """State after consuming `text`, or None if the grammar rejects it."""
+        for ch in text:
+            state = self.step(state, ch)
+            if state is None:
+                return None
+        return state
+
+    def complete(self, state):
+        idx, seg_state = state
+        return idx == len(self.segments) - 1 and self.segments[idx].complete(seg_state)
+
+    def next_chars(self, state):
+        idx, seg_state = state
+        seg = self.segments[idx]
+        chars = seg.next_chars(seg_state)
+        if chars is ANY_CHAR:
+            return ANY_CHAR
+        if seg.complete(seg_state) and idx + 1 < len(self.segments):
+            nxt = self.next_chars((idx + 1, self.segments[idx + 1].start))
+            return ANY_CHAR if nxt is ANY_CHAR else chars | nxt
+        return chars
+
+    def forced_text(self, state):
+        """The longest text the grammar allows as the only continuation of `state`."""
+        forced = []
+        while not self.complete(state):
+            chars = self.next_chars(state)
+            if chars is ANY_CHAR or len(chars) != 1:
+                break
+            ch = next(iter(chars))
+            forced.append(ch)
+            state = self.step(state, ch)
+        return "".join(forced)
+
+    def in_free_string(self, state):
+        """Remaining character budget if `state` is inside a String value, else None."""
+        idx, seg_state = state
+        seg = self.segments[idx]
+        if isinstance(seg, String) and seg_state >= 0:
+            return seg.max_chars - seg_state
+        return None
+
+
+def disposition_grammar(call_labels, pay_labels, reason_labels, max_remarks_chars=160):
+    """Grammar for the response object, in the key order used by the prompt's examples."""
+    def quoted(labels, nullable):
+        options = [f'"{label}"' for label in labels if label != "None"]
+        return Choice(options + (["null"] if nullable else []))
+
+    return JsonGrammar([
+        Literal('{"disposition": '),
+        quoted(call_labels, nullable=False),
+        Literal(', "payment_disposition": '),
+        quoted(pay_labels, nullable=True),
+        Literal(', "reason_for_not_paying": '),
+        quoted(reason_labels, nullable=True),
+        Literal(', "ptp_details": {"amount": '),
+        Number(nullable=True),
+        Literal(', "date": '),
+        Choice(['"####-##-##"', "null"]),
+        Literal('}, "remarks": '),
+        String(max_chars=max_remarks_chars),
+        Literal(', "confidence_score": '),
+        Number(nullable=False, max_int_digits=1),
+        Literal("}"),
+    ])
+
+
+# =========================
+# TOKEN-LEVEL CONSTRAINT
+# =========================
+
+class TokenIndex:
+    """Finds the token IDs a grammar allows next, for one tokenizer.
+
+    Tokens are kept sorted by text so a prefix maps to a contiguous range (found by
+    bisect). Allowed tokens are collected by walking prefixes the grammar accepts,
+    so a state that only admits a few characters never scans the whole vocabulary.
+    Inside free-text strings a precomputed "plain token" list is used instead.
+    """
+    def __init__(self, grammar, tokenizer, memo_size=8192):
+        self.grammar = grammar
+        self.strings = token_strings(tokenizer)
+        # The sorted vocabulary only depends on the tokenizer, so it is cached on disk with it
+        table = load_or_build("token_index", tokenizer, lambda: self._build_index(tokenizer))
+        self.sorted_texts, self.sorted_ids = table["sorted_texts"], table["sorted_ids"]
+        # Plain tokens (valid anywhere inside a string), ordered by length for budget cuts
+        self.plain_lengths, self.plain_ids = table["plain_lengths"], table["plain_ids"]
+        # Tokens that can end a string value: the text before the first quote is plain
+        self.quote_ids = table["quote_ids"]
+
+        self.memo = OrderedDict()
+        self.memo_size = memo_size
+        self.device = torch.device("cpu")
+
+    def _build_index(self, tokenizer):
+        special = set(tokenizer.all_special_ids) | set(getattr(tokenizer, "added_tokens_decoder", {}).keys())
+        usable = sorted((text, tid) for tid, text in enumerate(self.strings) if text and tid not in special)
+        plain = sorted((len(text), tid) for text, tid in usable if is_plain(text))
+        return {
+            "sorted_texts": [text for text, _ in usable],
+            "sorted_ids": [tid for _, tid in usable],
+            "plain_lengths": [n for n, _ in plain],
+            "plain_ids": torch.tensor([tid for _, tid in plain], dtype=torch.long),
+            "quote_ids": [tid for text, tid in usable if '"' in text and is_plain(text.split('"', 1)[0])],
+        }
+
+    def to(self, device):
+        device = torch.device(device)
+        if device != self.device:
+            self.device = device
+            self.plain_ids = self.plain_ids.to(device)
+            self.memo.clear()
+        return self
+
+    def _range(self, prefix, lo=0, hi=None):
+        hi = len(self.sorted_texts) if hi is None else hi
+        start = bisect.bisect_left(self.sorted_texts, prefix, lo, hi)
+        end = bisect.bisect_left(self.sorted_texts, prefix + "\U0010ffff", start, hi)
+        return start, end
+
+    def _walk(self, prefix, state, lo, hi, out):
+        """Collect tokens in sorted[lo:hi] (all starting with `prefix`) that the grammar accepts."""
+        if lo < hi and self.sorted_texts[lo] == prefix and prefix:
+            out.append(self.sorted_ids[lo])
+        chars = self.grammar.next_chars(state)
+        if chars is ANY_CHAR:
+            # Inside a string: the remaining candidates share a prefix, so check each one
+            for i in range(lo, hi):
+                text = self.sorted_texts[i]
+                if len(text) > len(prefix) and self.grammar.advance(state, text[len(prefix):]) is not None:
+                    out.append(self.sorted_ids[i])
+            return
+        for ch in chars:
+            nxt_lo, nxt_hi = self._range(prefix + ch, lo, hi)
+            if nxt_lo < nxt_hi:
+                self._walk(prefix + ch, self.grammar.step(state, ch), nxt_lo, nxt_hi, out)
+
+    def allowed(self, state):
+        """LongTensor of token IDs that may follow `state`."""
+        budget = self.grammar.in_free_string(state)
+        ids = self.memo.get(state)
+        if ids is None:
+            if budget is not None:
+                # Only the string-ending tokens are memoised; plain tokens are added below
+                found = [tid for tid in self.quote_ids if self.grammar.advance(state, self.strings[tid]) is not None]
+            else:
+                found = []
+                self._walk("", state, 0, len(self.sorted_texts), found)
+            ids = torch.tensor(sorted(set(found)), dtype=torch.long, device=self.device)
+            self.memo[state] = ids
+            if len(self.memo) > self.memo_size:
+                self.memo.popitem(last=False)
+        else:
+            self.memo.move_to_end(state)
+
+        if budget is not None:
+            n_plain = bisect.bisect_right(self.plain_lengths, budget)
+            ids = torch.cat([self.plain_ids[:n_plain], ids])
+        return ids
+
+
+class GrammarLogitsProcessor(LogitsProcessor):
+    """Masks every token the response grammar does not allow, per batch row.
+
+    Call reset() before each generate(); the first call after a reset sees only the
+    prompt, later calls advance each row's grammar state by its newest token."""
+    def __init__(self, grammar, tokenizer):
+        self.grammar = grammar
+        self.index = TokenIndex(grammar, tokenizer)
+        self.eos_token_id = tokenizer.eos_token_id
+        self.reset()
+
+    def reset(self):
+        self.states = None
+
+    def advance_rows(self, input_ids):
+        if self.states is None:
+            self.states = [self.grammar.start] * input_ids.shape[0]
+            return
+        for row, tid in enumerate(input_ids[:, -1].tolist()):
+            state = self.states[row]
+            if state is None or self.grammar.complete(state) or tid >= len(self.index.strings):
+                self.states[row] = None
+            else:
+                self.states[row] = self.grammar.advance(state, self.index.strings[tid])
+
+    def allowed_ids(self, state):
+        if state is None or self.grammar.complete(state):
+            return torch.tensor([self.eos_token_id], dtype=torch.long, device=self.index.device)
+        return self.index.allowed(state)
+
+    def __call__(self, input_ids, scores):
+        self.index.to(scores.device)
+        self.advance_rows(input_ids)
+        mask = torch.full_like(scores, float("-inf"))
+        for row, state in enumerate(self.states):
+            mask[row, self.allowed_ids(state)] = 0
+        return scores + mask
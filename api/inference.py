@@ -1,6 +1,8 @@
+from backends import INFERENCE_BACKEND, get_backend, snapshot_path
+if INFERENCE_BACKEND == "unsloth":
+    import unsloth  # noqa: F401 -- must be imported before transformers to patch it
 import torch
-from unsloth import FastLanguageModel
-from transformers import TextStreamer, StoppingCriteria, StoppingCriteriaList
+from transformers import TextStreamer, StoppingCriteria, StoppingCriteriaList, LogitsProcessorList
 import json
 from datetime import date, datetime, timedelta
 from dateutil.relativedelta import relativedelta, MO, TU, WE, TH, FR, SA, SU
@@ -8,63 +10,239 @@ import re
 import sys
 import os
 import threading
+import time
+import asyncio
+import copy
+import hashlib
+
+from artifacts import brace_counts
+from batching import PREDICT_MODES, PRIORITY_CLASSES, MicroBatcher, pack_by_length
+from cache import PredictionCache, normalize_transcript
+from compaction import compact_transcript
+from longform import merge_windows, window_spans
+from language import detect_language
+from neardup import NearDuplicateIndex
+from rules import RuleClassifier
+from decoding import JumpForwardDecoder, PromptLookupDecoder, prefill, score_continuations
+from grammar import GrammarLogitsProcessor, disposition_grammar
+from startup import startup_timer
 
 class StopOnJson(StoppingCriteria):
-    """Stop generation when the outermost JSON '{}' is closed (brace depth returns to 0)."""
+    """Stop a sequence when its outermost JSON '{}' is closed (brace depth returns to 0).
+
+    Depth is tracked per row so batched generation stops each sequence on its own."""
     def __init__(self, tokenizer):
         self.tokenizer = tokenizer
-        # Pre-compute which token IDs contain '{' or '}'
-        self.open_ids = set()
-        self.close_ids = set()
-        for tid in range(tokenizer.vocab_size):
-            tok = tokenizer.decode([tid])
-            if '{' in tok:
-                self.open_ids.add(tid)
-            if '}' in tok:
-                self.close_ids.add(tid)
+        # Per-token counts of '{' and '}' (cached on disk per tokenizer, see artifacts.py)
+        self.opens, self.closes = brace_counts(tokenizer)
         self.reset()
 
-    def reset(self):
-        self.depth = 0
-        self.started = False
+    def reset(self, batch_size=1):
+        self.depth = torch.zeros(batch_size, dtype=torch.long)
+        self.started = torch.zeros(batch_size, dtype=torch.bool)
 
     def __call__(self, input_ids, scores, **kwargs):
-        last_token = input_ids[0, -1].item()
-        if last_token in self.open_ids:
-            self.depth += 1
-            self.started = True
-        if last_token in self.close_ids:
-            self.depth -= 1
+        device = input_ids.device
+        if self.opens.device != device:
+            self.opens, self.closes = self.opens.to(device), self.closes.to(device)
+        if self.depth.shape[0] != input_ids.shape[0] or self.depth.device != device:
+            self.depth = torch.zeros(input_ids.shape[0], dtype=torch.long, device=device)
+            self.started = torch.zeros(input_ids.shape[0], dtype=torch.bool, device=device)
+
+        last_tokens = input_ids[:, -1]
+        # The model's embedding matrix can be larger than the tokenizer; those IDs carry no braces
+        known = last_tokens < self.opens.shape[0]
+        last_tokens = torch.where(known, last_tokens, torch.zeros_like(last_tokens))
+        opens = torch.where(known, self.opens[last_tokens], 0).long()
+        closes = torch.where(known, self.closes[last_tokens], 0).long()
+
+        # A token such as '{}' or '}}' opens and closes in one step, so apply the net change
+        self.depth += opens - closes
+        self.started |= opens > 0
         # Stop only when we've opened at least one brace and depth is back to 0
-        return self.started and self.depth <= 0
+        return self.started & (self.depth <= 0)
+
+class FirstTokenTimer(StoppingCriteria):
+    """Never stops generation; notes when generate() produced its first token (end of prefill)."""
+    def reset(self):
+        self.started, self.first_token_at = time.perf_counter(), None
+
+    def __call__(self, input_ids, scores, **kwargs):
+        if self.first_token_at is None:
+            if input_ids.is_cuda:
+                torch.cuda.synchronize(input_ids.device)
+            self.first_token_at = time.perf_counter()
+        return torch.zeros(input_ids.shape[0], dtype=torch.bool, device=input_ids.device)
+
+    def ttft(self):
+        return (self.first_token_at or time.perf_counter()) - self.started
 
 # =========================
 # CONFIG
 # =========================
 MODEL_PATH = os.getenv("QWEN_MODEL", "khushianand01/disposition_model")
+# Part of the prediction cache key; bump when the weights behind MODEL_PATH change
+MODEL_VERSION = os.getenv("MODEL_VERSION", MODEL_PATH)
 MAX_SEQ_LEN = 8192 # Expanded from 4096 to handle long transcripts
-DTYPE = None # Auto
-LOAD_IN_4BIT = True
+MAX_NEW_TOKENS = 512
+# Transcript preprocessing: strip ASR noise and repeated filler turns, then fit the
+# transcript to a token budget, keeping the start and (mostly) the end of long calls
+TRANSCRIPT_COMPACTION = os.getenv("TRANSCRIPT_COMPACTION", "1") == "1"
+# Cap on transcript tokens; 0 = whatever fits in MAX_SEQ_LEN next to the prompt and the response
+TRANSCRIPT_MAX_TOKENS = int(os.getenv("TRANSCRIPT_MAX_TOKENS", "0"))
+# Share of the budget taken from the start of a too-long call; the rest comes from its end,
+# where PTP commitments usually are
+TRUNCATE_HEAD_SHARE = float(os.getenv("TRUNCATE_HEAD_SHARE", "0.25"))
+TRUNCATION_MARKER = " ... [TRUNCATED] ... "
+# Transcripts longer than one window: "truncate" keeps head + tail (see fit_transcript),
+# "map_reduce" predicts overlapping windows in bounded batches and merges the partial results
+LONG_TRANSCRIPT_MODE = os.getenv("LONG_TRANSCRIPT_MODE", "truncate")
+LONG_WINDOW_TOKENS = int(os.getenv("LONG_WINDOW_TOKENS", "2048"))
+LONG_WINDOW_OVERLAP = int(os.getenv("LONG_WINDOW_OVERLAP", "256"))
+LONG_MAX_WINDOWS = int(os.getenv("LONG_MAX_WINDOWS", "32"))
+# Padded prompt tokens per batch of one call's windows; the default keeps a window batch's
+# forward pass no larger than a single full-length prompt
+LONG_WINDOW_BATCH_TOKENS = int(os.getenv("LONG_WINDOW_BATCH_TOKENS", str(MAX_SEQ_LEN)))
+# Micro-batching: concurrent predict() calls arriving within the window share one generate()
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "8"))
+BATCH_WINDOW_MS = float(os.getenv("BATCH_WINDOW_MS", "25"))
+# Bulk entry points (predict_many) pack length-sorted rows into batches of at most this
+# many padded prompt tokens / rows
+BULK_TOKEN_BUDGET = int(os.getenv("BULK_TOKEN_BUDGET", "32768"))
+BULK_MAX_BATCH = int(os.getenv("BULK_MAX_BATCH", "16"))
+# Interactive requests run first, but batch-class work (uploads) keeps at least this
+# share of model time while it has rows waiting; backfill only runs when both are idle
+BATCH_MIN_SHARE = float(os.getenv("BATCH_MIN_SHARE", "0.2"))
+# Prefill the constant instruction block once at load and reuse its KV cache per request
+PREFIX_CACHE = os.getenv("PREFIX_CACHE", "1") == "1"
+# Constrain generation to the response schema and the allowed label sets
+CONSTRAINED_DECODING = os.getenv("CONSTRAINED_DECODING", "1") == "1"
+# "generate" (transformers generate), "jump_forward" (skip model calls on forced JSON scaffolding)
+# or "prompt_lookup" (speculative drafts copied from the prompt, verified in one pass; same output as generate)
+DECODE_MODE = os.getenv("DECODE_MODE", "generate")
+# prompt_lookup: max draft tokens per step, and longest suffix n-gram looked up in the prompt
+SPECULATIVE_DRAFT_TOKENS = int(os.getenv("SPECULATIVE_DRAFT_TOKENS", "10"))
+SPECULATIVE_NGRAM = int(os.getenv("SPECULATIVE_NGRAM", "3"))
+# Run a generate and a classify pass on a fixed transcript after loading, so the first real
+# request does not pay for kernel compilation, autotuning and allocator growth
+MODEL_WARMUP = os.getenv("MODEL_WARMUP", "1") == "1"
+WARMUP_TRANSCRIPT = "Agent: Sir, your EMI is pending. When will you pay? Borrower: I will pay 2500 rupees next Monday."
+# Temperature applied to label log-likelihoods in classify mode; fit it on the eval sets
+# with `python evaluate.py --backend model --fit-temperature` (1.0 leaves them unscaled)
+CLASSIFY_TEMPERATURE = float(os.getenv("CLASSIFY_TEMPERATURE", "1.0"))
+# Prediction cache for repeated (transcript, date) pairs; size 0 disables it
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "10000"))
+PREDICTION_CACHE_TTL_S = float(os.getenv("PREDICTION_CACHE_TTL_S", "86400"))
+# Optional SQLite file for a cache tier that survives restarts
+PREDICTION_CACHE_DB = os.getenv("PREDICTION_CACHE_DB", "")
+# Phrase rules for operator announcements / wrong-number calls: "1" answers matching
+# calls without the model, "shadow" still runs the model and only records agreement
+RULE_FASTPATH = os.getenv("RULE_FASTPATH", "1")
+# Near-duplicate reuse (MinHash similarity of normalized transcripts) for outcomes
+# that do not depend on an amount or date; size 0 disables it
+NEAR_DUP_MAX_ENTRIES = int(os.getenv("NEAR_DUP_MAX_ENTRIES", "50000"))
+NEAR_DUP_THRESHOLD = float(os.getenv("NEAR_DUP_THRESHOLD", "0.85"))
+
+# =========================
+# LABELS
+# =========================
+CALL_LABELS = [
+    "ANSWERED", "ANSWERED_BY_FAMILY_MEMBER", "CUSTOMER_PICKED", "AGENT_BUSY_ON_ANOTHER_CALL",
+    "SILENCE_ISSUE", "LANGUAGE_BARRIER", "ANSWERED_VOICE_ISSUE", "CUSTOMER_ABUSIVE",
+    "AUTOMATED_VOICE", "FORWARDED_CALL", "RINGING", "BUSY", "SWITCHED_OFF",
+    "WRONG_NUMBER", "DO_NOT_KNOW_THE_PERSON", "NOT_IN_CONTACT_ANYMORE", "OUT_OF_NETWORK", "OUT_OF_SERVICES",
+    "CALL_BACK_LATER", "WILL_ASK_TO_PAY", "GAVE_ALTERNATE_NUMBER",
+    "ANSWERED_DISCONNECTED", "CALL_DISCONNECTED_BY_CUSTOMER", "NOT_AVAILABLE", "WRONG_PERSON",
+    "NO_INCOMING_CALLS", "RINGING_DISCONNECTED", "OTHERS"
+]
+
+PAY_LABELS = [
+    "PAID", "PTP", "PARTIAL_PAYMENT", "SETTLEMENT", "WILL_PAY_AFTER_VISIT",
+    "DENIED_TO_PAY", "NO_PAYMENT_COMMITMENT", "NO_PROOF_GIVEN", "WANT_FORECLOSURE", "WANTS_TO_RENEGOTIATE_LOAN_TERMS",
+    "None"
+]
+
+# Payment outcomes that carry ptp_details (amount / date)
+PTP_LABELS = ["PTP", "PARTIAL_PAYMENT", "SETTLEMENT"]
+
+# Payment labels in the order classify mode scores them; "None" is scored as JSON null
+CLASSIFY_PAY_LABELS = [label for label in PAY_LABELS if label != "None"] + ["None"]
+
+REASON_LABELS = [
+    "FUNDS_ISSUE", "TECHNICAL_ISSUE", "JOB_CHANGED_WAITING_FOR_SALARY", "RATE_OF_INTEREST_ISSUES",
+    "SALARY_NOT_CREDITED", "SERVICE_ISSUE", "CUSTOMER_NOT_TELLING_REASON", "OTHER_REASONS", "None"
+]
 
 class DispositionModel:
-    def __init__(self, model_path=MODEL_PATH):
+    def __init__(self, model_path=MODEL_PATH, model=None, tokenizer=None, device=None, backend=None):
+        # Serialises access to the model; only the batcher thread normally takes it
         self.lock = threading.Lock()
-        print(f"Loading model from {model_path}...")
-        if not torch.cuda.is_available():
-            raise RuntimeError("CUDA is not available. This server requires a GPU to run.")
-        self.device = "cuda"
-        print(f"Using device: {self.device}")
-        self.model, self.tokenizer = FastLanguageModel.from_pretrained(
-            model_name=model_path,
-            max_seq_length=MAX_SEQ_LEN,
-            dtype=DTYPE,
-            load_in_4bit=LOAD_IN_4BIT,
-        )
-        FastLanguageModel.for_inference(self.model)
-        self.stop_criteria = StoppingCriteriaList([StopOnJson(self.tokenizer)])
+        # Loading and forward passes go through the backend (INFERENCE_BACKEND);
+        # prompt, stop criteria, grammar and clean_output are the same for all of them
+        self.backend = backend or get_backend()
+        if model is not None and tokenizer is not None:
+            # Pre-loaded model (e.g. a tiny CPU causal LM for local testing)
+            self.backend.attach(model, tokenizer, device or str(next(model.parameters()).device))
+        else:
+            load_path = snapshot_path(model_path)
+            print(f"Loading model from {load_path} ({self.backend.name} backend)...")
+            with startup_timer.phase("weights"):
+                self.backend.load(load_path, MAX_SEQ_LEN)
+        self.model, self.tokenizer, self.device = self.backend.model, self.backend.tokenizer, self.backend.device
+        # Batched prompts are left-padded so every row ends at the generation boundary
+        self.tokenizer.padding_side = "left"
+        if self.tokenizer.pad_token is None:
+            self.tokenizer.pad_token = self.tokenizer.eos_token
+        # Tokenizer-derived tables come from the artifact cache after the first start
+        with startup_timer.phase("artifacts"):
+            self.stop_on_json = StopOnJson(self.tokenizer)
+            self.first_token = FirstTokenTimer()
+            self.stop_criteria = StoppingCriteriaList([self.stop_on_json, self.first_token])
+            self.grammar_processor = None
+            self.logits_processor = LogitsProcessorList()
+            if CONSTRAINED_DECODING:
+                self.grammar_processor = GrammarLogitsProcessor(
+                    disposition_grammar(CALL_LABELS, PAY_LABELS, REASON_LABELS), self.tokenizer,
+                )
+                self.logits_processor.append(self.grammar_processor)
+        self.prefix_ids, self.prefix_cache = None, None
+        if PREFIX_CACHE:
+            with startup_timer.phase("prefix_cache"):
+                self.build_prefix_cache()
+        self._encoded = {}
+        self.transcript_budget = self._transcript_budget()
+        # Custom greedy decoding loop replacing generate() (None = use generate())
+        self.decoder = None
+        if DECODE_MODE == "jump_forward":
+            if self.grammar_processor is None:
+                print("DECODE_MODE=jump_forward needs CONSTRAINED_DECODING=1; using generate().")
+            else:
+                self.decoder = JumpForwardDecoder(self.backend.score, self.tokenizer, self.grammar_processor)
+        elif DECODE_MODE == "prompt_lookup":
+            self.decoder = PromptLookupDecoder(self.backend.score, self.tokenizer, self.grammar_processor,
+                                               num_draft=SPECULATIVE_DRAFT_TOKENS, max_ngram=SPECULATIVE_NGRAM)
+        self.prompt_version = self._prompt_version()
+        self.cache = None
+        if PREDICTION_CACHE_SIZE > 0:
+            self.cache = PredictionCache(PREDICTION_CACHE_SIZE, PREDICTION_CACHE_TTL_S, PREDICTION_CACHE_DB or None)
+        self.rules = RuleClassifier() if RULE_FASTPATH in ("1", "shadow") else None
+        self.near_dups = None
+        if NEAR_DUP_MAX_ENTRIES > 0:
+            self.near_dups = NearDuplicateIndex(threshold=NEAR_DUP_THRESHOLD, max_entries=NEAR_DUP_MAX_ENTRIES)
+        self.batcher = MicroBatcher(self.generate_batch, max_batch_size=BATCH_MAX_SIZE, window_ms=BATCH_WINDOW_MS,
+                                    min_shares={"batch": BATCH_MIN_SHARE})
         print("Model loaded successfully.")
 
-    def format_prompt(self, transcript, current_date=None):
+    def _prompt_version(self):
+        """Hash of everything besides the weights that shapes a prediction."""
+        template = self.format_prompt("{transcript}", "{current_date}")
+        settings = (f"{CONSTRAINED_DECODING}|{DECODE_MODE}|{CLASSIFY_TEMPERATURE}|{MAX_NEW_TOKENS}|"
+                    f"{TRANSCRIPT_COMPACTION}|{self.transcript_budget}|{TRUNCATE_HEAD_SHARE}|"
+                    f"{LONG_TRANSCRIPT_MODE}|{LONG_WINDOW_TOKENS}|{LONG_WINDOW_OVERLAP}|{LONG_MAX_WINDOWS}")
+        return hashlib.sha256((template + settings).encode()).hexdigest()[:12]
+
+    def prompt_prefix(self):
+        """The constant part of the prompt: instruction, label list and few-shot examples."""
         instruction = (
             "You are an AI assistant that extracts structured call disposition data.\n"
             "Fields: disposition, payment_disposition, reason_for_not_paying, ptp_details, remarks, confidence_score.\n"
@@ -96,34 +274,25 @@ class DispositionModel:
 {instruction}
 
 ### Input:
-Context: Current Date is {current_date}
+"""
+
+    def prompt_suffix(self, transcript, current_date=None):
+        """The per-request part of the prompt that follows prompt_prefix()."""
+        return f"""Context: Current Date is {current_date}
 Transcript: {transcript}
 
 ### Response:
 """
 
+    def format_prompt(self, transcript, current_date=None):
+        return self.prompt_prefix() + self.prompt_suffix(transcript, current_date=current_date)
+
     def clean_output(self, result: dict, transcript: str, current_date: str) -> dict:
         if not isinstance(result, dict): return {"error": "Invalid format", "raw": str(result)}
 
-        call_labels = [
-            "ANSWERED", "ANSWERED_BY_FAMILY_MEMBER", "CUSTOMER_PICKED", "AGENT_BUSY_ON_ANOTHER_CALL",
-            "SILENCE_ISSUE", "LANGUAGE_BARRIER", "ANSWERED_VOICE_ISSUE", "CUSTOMER_ABUSIVE",
-            "AUTOMATED_VOICE", "FORWARDED_CALL", "RINGING", "BUSY", "SWITCHED_OFF",
-            "WRONG_NUMBER", "DO_NOT_KNOW_THE_PERSON", "NOT_IN_CONTACT_ANYMORE", "OUT_OF_NETWORK", "OUT_OF_SERVICES",
-            "CALL_BACK_LATER", "WILL_ASK_TO_PAY", "GAVE_ALTERNATE_NUMBER",
-            "ANSWERED_DISCONNECTED", "CALL_DISCONNECTED_BY_CUSTOMER", "NOT_AVAILABLE", "WRONG_PERSON", 
-            "NO_INCOMING_CALLS", "RINGING_DISCONNECTED", "OTHERS"
-        ]
-        
-        pay_labels = [
-            "PAID", "PTP", "PARTIAL_PAYMENT", "SETTLEMENT", "WILL_PAY_AFTER_VISIT",
-            "DENIED_TO_PAY", "NO_PAYMENT_COMMITMENT", "NO_PROOF_GIVEN", "WANT_FORECLOSURE", "WANTS_TO_RENEGOTIATE_LOAN_TERMS",
-            "None"
-        ]
-
         # 1. FUZZY Label Mapping (Don't be too strict)
         disp = str(result.get("disposition", "OTHERS")).upper().replace(" ", "_")
-        if disp not in call_labels:
+        if disp not in CALL_LABELS:
             if "FAMILY" in disp: result["disposition"] = "ANSWERED_BY_FAMILY_MEMBER"
             elif "BUSY" in disp: result["disposition"] = "BUSY"
             elif "WRONG" in disp: result["disposition"] = "WRONG_NUMBER"
@@ -137,7 +306,7 @@ Transcript: {transcript}
             result["disposition"] = disp
 
         p_disp = str(result.get("payment_disposition", "None")).upper().replace(" ", "_")
-        if p_disp not in pay_labels:
+        if p_disp not in PAY_LABELS:
             if "CLAIM" in p_disp: result["payment_disposition"] = "PAID"
             elif "PROMISE" in p_disp or "PTP" in p_disp: result["payment_disposition"] = "PTP"
             elif "REFUSE" in p_disp or "DENY" in p_disp: result["payment_disposition"] = "DENIED_TO_PAY"
@@ -220,7 +389,7 @@ Transcript: {transcript}
                 ptp["date"] = None
                 
         # Clean up PTP details if it is not a PTP commitment
-        if result.get("payment_disposition") not in ["PTP", "PARTIAL_PAYMENT", "SETTLEMENT"]:
+        if result.get("payment_disposition") not in PTP_LABELS:
             ptp["amount"] = None
             ptp["date"] = None
 
@@ -251,57 +420,570 @@ Transcript: {transcript}
         return result
 
     @torch.inference_mode()
-    def predict(self, transcript, current_date=None):
-        with self.lock:
-            if current_date is None: current_date = str(date.today())
-            
-            # Handle cases where transcript might be a dict (from raw test data)
-            if isinstance(transcript, dict):
-                transcript = transcript.get("transcript", str(transcript))
-            else:
-                transcript = str(transcript)
+    def build_prefix_cache(self):
+        """Tokenize and prefill prompt_prefix() once; requests then only prefill their suffix."""
+        try:
+            self.prefix_ids = self.backend.tokenize(self.prompt_prefix())["input_ids"]
+            with self.lock:
+                out = self.backend.score(input_ids=self.prefix_ids, use_cache=True)
+            self.prefix_cache = out.past_key_values
+            print(f"Prefix cache ready ({self.prefix_ids.shape[1]} tokens).")
+        except Exception as e:
+            print(f"Prefix cache disabled: {e}")
+            self.prefix_ids, self.prefix_cache = None, None
 
-            # Hard Truncation to prevent CUDA Illegal Memory Access
-            # 8192 is the absolute max. We truncate transcript to ~7500 tokens.
-            # Character count is a safe proxy (1 token ~ 3 chars). 22,000 chars is safe.
-            if len(transcript) > 22000:
-                transcript = transcript[:22000] + "... [TRUNCATED]"
+    def model_inputs(self, prepared, use_prefix_cache=True):
+        """Tokenize prepared (transcript, current_date) pairs into generate()/forward() kwargs.
 
-            prompt = self.format_prompt(transcript, current_date=current_date)
-            inputs = self.tokenizer([prompt], return_tensors="pt").to(self.device)
-            
+        With the prefix cache, rows are laid out as [prefix][left padding][suffix]; the
+        attention mask hides the padding and a copy of the prefix KV cache is passed as
+        past_key_values, so only the suffix is prefilled."""
+        if not use_prefix_cache or self.prefix_cache is None:
+            prompts = [self.format_prompt(t, current_date=d) for t, d in prepared]
             # Additional safety: hard truncate input_ids if they still exceed context
-            if inputs["input_ids"].shape[1] > MAX_SEQ_LEN:
-                 inputs["input_ids"] = inputs["input_ids"][:, :MAX_SEQ_LEN]
-                 inputs["attention_mask"] = inputs["attention_mask"][:, :MAX_SEQ_LEN]
+            return dict(self.backend.tokenize(prompts, padding=True, truncation=True, max_length=MAX_SEQ_LEN))
+
+        n, prefix_len = len(prepared), self.prefix_ids.shape[1]
+        suffixes = [self.prompt_suffix(t, current_date=d) for t, d in prepared]
+        enc = self.backend.tokenize(
+            suffixes, padding=True, truncation=True, max_length=MAX_SEQ_LEN - prefix_len, add_special_tokens=False,
+        )
+        past_key_values = copy.deepcopy(self.prefix_cache)
+        past_key_values.batch_repeat_interleave(n)
+        return {
+            "input_ids": torch.cat([self.prefix_ids.expand(n, -1), enc["input_ids"]], dim=1),
+            "attention_mask": torch.cat([torch.ones(n, prefix_len, dtype=enc["attention_mask"].dtype, device=self.device), enc["attention_mask"]], dim=1),
+            "past_key_values": past_key_values,
+        }
+
+    def _transcript_budget(self):
+        """Transcript tokens that fit in MAX_SEQ_LEN next to the prompt template and the response."""
+        template = len(self.encode(self.prompt_prefix())) + len(self.encode(self.prompt_suffix("", "2026-01-01")))
+        # A few tokens of slack: the text around a cut can tokenize slightly differently in the prompt
+        budget = MAX_SEQ_LEN - template - MAX_NEW_TOKENS - 16
+        return min(budget, TRANSCRIPT_MAX_TOKENS) if TRANSCRIPT_MAX_TOKENS > 0 else budget
+
+    def _tokenize_with_offsets(self, text):
+        enc = self.tokenizer(text, add_special_tokens=False, return_offsets_mapping=self.tokenizer.is_fast)
+        return enc["input_ids"], enc.get("offset_mapping")
+
+    def fit_transcript(self, transcript):
+        """Compact a transcript and cut it to the token budget at token boundaries.
+
+        A too-long call keeps its first TRUNCATE_HEAD_SHARE of the budget and fills the
+        rest from its end, joined by TRUNCATION_MARKER. Returns (text, stats) with the
+        transcript's token count before and after."""
+        ids, offsets = self._tokenize_with_offsets(transcript)
+        stats = {"transcript_tokens_in": len(ids)}
+        if TRANSCRIPT_COMPACTION:
+            compacted = compact_transcript(transcript)
+            if compacted != transcript:
+                transcript = compacted
+                ids, offsets = self._tokenize_with_offsets(transcript)
+
+        n = len(ids)
+        if n > self.transcript_budget:
+            keep = self.transcript_budget - len(self.encode(TRUNCATION_MARKER))
+            head = int(keep * TRUNCATE_HEAD_SHARE)
+            tail = keep - head
+            if offsets is not None:
+                head_text = transcript[:offsets[head - 1][1]] if head else ""
+                tail_text = transcript[offsets[n - tail][0]:]
+            else:
+                head_text = self.tokenizer.decode(ids[:head])
+                tail_text = self.tokenizer.decode(ids[n - tail:])
+            transcript = head_text.rstrip() + TRUNCATION_MARKER + tail_text.lstrip()
+            n = len(self.tokenizer(transcript, add_special_tokens=False)["input_ids"])
+        stats["transcript_tokens_out"] = n
+        return transcript, stats
+
+    def split_windows(self, transcript):
+        """Overlapping token windows of a long transcript, for LONG_TRANSCRIPT_MODE=map_reduce.
+
+        Returns (window texts, transcript tokens). A transcript that fits in one window,
+        or any transcript in truncate mode, comes back whole as the only window."""
+        if LONG_TRANSCRIPT_MODE != "map_reduce":
+            return [transcript], None
+        text = compact_transcript(str(transcript)) if TRANSCRIPT_COMPACTION else str(transcript)
+        size = min(LONG_WINDOW_TOKENS, self.transcript_budget)
+        ids, offsets = self._tokenize_with_offsets(text)
+        if len(ids) <= size:
+            return [transcript], None
+        windows = []
+        for start, end in window_spans(len(ids), size, LONG_WINDOW_OVERLAP, LONG_MAX_WINDOWS):
+            if offsets is not None:
+                windows.append(text[offsets[start][0]:offsets[end - 1][1]])
+            else:
+                windows.append(self.tokenizer.decode(ids[start:end]))
+        return windows, len(ids)
+
+    def _prepare_with_stats(self, transcript, current_date=None):
+        if current_date is None: current_date = str(date.today())
+
+        # Handle cases where transcript might be a dict (from raw test data)
+        if isinstance(transcript, dict):
+            transcript = transcript.get("transcript", str(transcript))
+        else:
+            transcript = str(transcript)
+
+        # Fit by tokens rather than characters so the prompt never outgrows MAX_SEQ_LEN
+        # (a hard cut of input_ids would drop the "### Response:" marker)
+        transcript, stats = self.fit_transcript(transcript)
+        return (transcript, current_date), stats
+
+    def _prepare(self, transcript, current_date=None):
+        return self._prepare_with_stats(transcript, current_date)[0]
+
+    def parse_output(self, generated_text, transcript, current_date):
+        try:
+            json_start = generated_text.find('{')
+            json_end = generated_text.rfind('}') + 1
+            if json_start != -1 and json_end != -1:
+                result = json.loads(generated_text[json_start:json_end])
+            else:
+                raise ValueError("No JSON found")
 
-            outputs = self.model.generate(
+            return self.clean_output(result, transcript, current_date)
+        except Exception as e:
+            return {"error": str(e), "raw": generated_text}
+
+    def _generate(self, inputs):
+        """Greedy generate() for a prepared batch. Returns (generated ids per row, stats per row)."""
+        with self.lock:
+            self.stop_on_json.reset(inputs["input_ids"].shape[0])
+            self.first_token.reset()
+            if self.grammar_processor is not None:
+                self.grammar_processor.reset()
+            outputs = self.backend.generate(
                 **inputs,
-                max_new_tokens=512,
+                max_new_tokens=MAX_NEW_TOKENS,
                 use_cache=True,
                 do_sample=False,
                 stopping_criteria=self.stop_criteria,
+                logits_processor=self.logits_processor,
                 eos_token_id=self.tokenizer.eos_token_id,
-                pad_token_id=self.tokenizer.eos_token_id,
+                pad_token_id=self.tokenizer.pad_token_id,
             )
-            
-            generated_ids = outputs[0][inputs["input_ids"].shape[-1]:]
-            generated_text = self.tokenizer.decode(generated_ids, skip_special_tokens=True)
 
-            try:
-                json_start = generated_text.find('{')
-                json_end = generated_text.rfind('}') + 1
-                if json_start != -1 and json_end != -1:
-                    result = json.loads(generated_text[json_start:json_end])
-                else:
-                    raise ValueError("No JSON found")
-                
-                return self.clean_output(result, transcript, current_date)
-            except Exception as e:
-                return {"error": str(e), "raw": generated_text}
+        prompt_len = inputs["input_ids"].shape[-1]
+        generated = [[tid for tid in row if tid != self.tokenizer.pad_token_id] for row in outputs[:, prompt_len:].tolist()]
+        # generate() runs one forward pass per new token
+        ttft = self.first_token.ttft()
+        stats = [{"decode_steps": len(ids), "forced_tokens": 0, "generated_tokens": len(ids), "ttft_s": ttft} for ids in generated]
+        return generated, stats
+
+    def encode(self, text):
+        """Token IDs of a prompt fragment, without special tokens (memoised)."""
+        ids = self._encoded.get(text)
+        if ids is None:
+            ids = self.tokenizer(text, add_special_tokens=False)["input_ids"]
+            self._encoded[text] = ids
+        return ids
+
+    def _timed_inputs(self, prepared):
+        """model_inputs() plus the stage stats every row of the batch shares: tokenize_s
+        and prompt_tokens (real tokens of the row's prompt, prefix included)."""
+        started = time.perf_counter()
+        inputs = self.model_inputs(prepared)
+        tokenize_s = time.perf_counter() - started
+        prompt_tokens = inputs["attention_mask"].sum(dim=1).tolist()
+        return inputs, [{"tokenize_s": tokenize_s, "prompt_tokens": n} for n in prompt_tokens]
+
+    def _generate_prepared(self, prepared):
+        inputs, stage_stats = self._timed_inputs(prepared)
+        started = time.perf_counter()
+        if self.decoder is not None:
+            with self.lock:
+                generated, stats = self.decoder.decode(inputs, MAX_NEW_TOKENS)
+        else:
+            generated, stats = self._generate(inputs)
+        # Stage times are the batch's, so each row reports the latency it saw
+        model_s = time.perf_counter() - started
+
+        started = time.perf_counter()
+        texts = self.tokenizer.batch_decode(generated, skip_special_tokens=True)
+        detokenize_s = time.perf_counter() - started
+        results = []
+        for text, (t, d), st, stage in zip(texts, prepared, stats, stage_stats):
+            started = time.perf_counter()
+            result = self.parse_output(text, t, d)
+            stage.update(decode_s=model_s - st["ttft_s"], clean_output_s=detokenize_s + time.perf_counter() - started)
+            results.append((result, {**st, **stage}))
+        return results
+
+    def _label_probs(self, scores):
+        logits = torch.tensor(scores) / CLASSIFY_TEMPERATURE
+        return torch.softmax(logits, dim=0).tolist()
+
+    def _score_labels(self, prepared):
+        """Label log-likelihoods for classify mode.
+
+        The prompt is prefilled once. All disposition labels are scored in one batched
+        pass over that cache, then payment labels (CLASSIFY_PAY_LABELS, conditioned on
+        the most likely disposition) in a second one. Returns (disposition scores,
+        chosen disposition index, payment scores, ttft_s, decode_s, stage stats)."""
+        n = len(prepared)
+        disp_cands = [self.encode(f'{label}"') for label in CALL_LABELS]
+        pay_cands = [self.encode(f'"{label}"') for label in CLASSIFY_PAY_LABELS[:-1]] + [self.encode("null")]
+
+        inputs, stage_stats = self._timed_inputs(prepared)
+        with self.lock:
+            started = time.perf_counter()
+            prefilled = prefill(self.backend.score, inputs, self.encode('{"disposition": "'))
+            disp_scores = score_continuations(self.backend.score, prefilled, [disp_cands] * n, self.tokenizer.pad_token_id)
+            # The disposition is the first thing decided, so its scores mark "first token"
+            ttft = time.perf_counter() - started
+            # Temperature scaling does not change the argmax
+            best_disp = [max(range(len(CALL_LABELS)), key=row.__getitem__) for row in disp_scores]
+            contexts = [disp_cands[b] + self.encode(', "payment_disposition": ') for b in best_disp]
+            pay_scores = score_continuations(self.backend.score, prefilled, [pay_cands] * n, self.tokenizer.pad_token_id, contexts=contexts)
+            decode_s = time.perf_counter() - started - ttft
+        return disp_scores, best_disp, pay_scores, ttft, decode_s, stage_stats
+
+    def _classify_prepared(self, prepared):
+        """Pick disposition and payment_disposition by label log-likelihood instead of generating.
+
+        The returned confidence_score is the softmax probability of the chosen pair after
+        dividing the log-likelihoods by CLASSIFY_TEMPERATURE. It is only calibrated once
+        that temperature has been fit on the eval sets (see label_scores())."""
+        disp_scores, best_disp, pay_scores, ttft, decode_s, stage_stats = self._score_labels(prepared)
+        results = []
+        for (t, d), b, d_scores, p_scores, stage in zip(prepared, best_disp, disp_scores, pay_scores, stage_stats):
+            d_probs, p_probs = self._label_probs(d_scores), self._label_probs(p_scores)
+            best_pay = max(range(len(CLASSIFY_PAY_LABELS)), key=p_probs.__getitem__)
+            result = {
+                "disposition": CALL_LABELS[b],
+                "payment_disposition": CLASSIFY_PAY_LABELS[best_pay],
+                "reason_for_not_paying": None,
+                "ptp_details": {"amount": None, "date": None},
+                "remarks": "",
+                "confidence_score": round(d_probs[b] * p_probs[best_pay], 4),
+            }
+            started = time.perf_counter()
+            result = self.clean_output(result, t, d)
+            stage.update(ttft_s=ttft, decode_s=decode_s, clean_output_s=time.perf_counter() - started)
+            # One prefill plus two scoring passes, nothing generated
+            results.append((result, {"decode_steps": 3, "forced_tokens": 0, "generated_tokens": 0, **stage}))
+        return results
+
+    @torch.inference_mode()
+    def label_scores(self, transcripts, current_date=None):
+        """Unscaled classify-mode label log-likelihoods, for fitting CLASSIFY_TEMPERATURE.
+
+        Returns one {"disposition": {label: score}, "payment_disposition": {label: score}}
+        per transcript. Payment labels are scored after the chosen disposition, as in
+        classify mode. Bypasses the batcher, caches and rules."""
+        prepared = [self._prepare(t, current_date) for t in transcripts]
+        disp_scores, _, pay_scores, *_ = self._score_labels(prepared)
+        return [{"disposition": dict(zip(CALL_LABELS, d)), "payment_disposition": dict(zip(CLASSIFY_PAY_LABELS, p))}
+                for d, p in zip(disp_scores, pay_scores)]
+
+    def _prepare_timed(self, transcript, current_date=None):
+        """_prepare_with_stats() plus the seconds it took: ((transcript, date), stats, seconds)."""
+        started = time.perf_counter()
+        prepared, stats = self._prepare_with_stats(transcript, current_date)
+        return prepared, stats, time.perf_counter() - started
+
+    @torch.inference_mode()
+    def generate_batch(self, items):
+        """Run several (transcript, current_date[, mode[, prepared]]) items as left-padded batches, one per mode.
+
+        `prepared` is a _prepare_timed() result for callers that already fitted the
+        transcript (_submit_packed), so it is not done twice. Returns one (cleaned
+        result, stats) pair per item. Besides token counts, stats time the stages of
+        the batch: tokenize_s (fitting the transcript and building the inputs), ttft_s
+        (to the first token, i.e. the prefill), decode_s (the rest of generation) and
+        clean_output_s (detokenizing and parsing)."""
+        results = [None] * len(items)
+        by_mode = {}
+        for i, item in enumerate(items):
+            by_mode.setdefault(item[2] if len(item) > 2 else "generate", []).append(i)
+
+        for mode, idxs in by_mode.items():
+            timed = [items[i][3] if len(items[i]) > 3 else self._prepare_timed(items[i][0], items[i][1]) for i in idxs]
+            prepared, prep_stats, seconds = zip(*timed)
+            prepare_s = sum(seconds)
+            run = self._classify_prepared if mode == "classify" else self._generate_prepared
+            for i, (result, stats), extra in zip(idxs, run(list(prepared)), prep_stats):
+                results[i] = (result, {**stats, **extra, "tokenize_s": stats["tokenize_s"] + prepare_s})
+        return results
+
+    def predict_batch(self, items):
+        """Run several (transcript, current_date) pairs through one batched generation."""
+        return [result for result, _ in self.generate_batch(items)]
+
+    def _submit_packed(self, texts, current_date, mode, deadline=None, priority="batch", token_budget=BULK_TOKEN_BUDGET):
+        """Submit texts as length-sorted batches of at most `token_budget` padded tokens.
+
+        Returns a (future, padding efficiency) pair per text. Texts are fitted once here
+        and handed to generate_batch() prepared."""
+        timed = [self._prepare_timed(t, current_date) for t in texts]
+        lengths = self.prompt_lengths([prepared for prepared, _, _ in timed])
+        slots = [None] * len(texts)
+        for batch in pack_by_length(lengths, token_budget, BULK_MAX_BATCH):
+            futures = self.batcher.submit_batch([(texts[k], current_date, mode, timed[k]) for k in batch],
+                                                deadline=deadline, priority=priority)
+            # Share of the batch's padded prompt tokens that are real tokens
+            efficiency = sum(lengths[k] for k in batch) / (len(batch) * max(lengths[k] for k in batch))
+            for k, fut in zip(batch, futures):
+                slots[k] = (fut, efficiency)
+        return slots
+
+    @staticmethod
+    def _slot_outputs(slots):
+        """Wait for submitted texts; (result, stats) per slot with scheduling stats added."""
+        outputs = []
+        for fut, efficiency in slots:
+            result, stats = fut.result()
+            sched = {"queue_wait_s": fut.queue_wait, "batch_size": fut.batch_size, "model_latency_s": fut.latency}
+            if efficiency is not None:
+                sched["padding_efficiency"] = efficiency
+            outputs.append((result, {**sched, **stats}))
+        return outputs
+
+    def _submit_infer(self, transcript, current_date, mode, deadline=None, priority="interactive"):
+        """Queue a transcript for the model. Returns (slots, transcript tokens): one
+        (future, padding efficiency) slot per window, for merge_windows()."""
+        windows, n_tokens = self.split_windows(transcript)
+        if len(windows) > 1:
+            # Long call: windows go out in length-packed batches and are merged into one result
+            return self._submit_packed(windows, current_date, mode, deadline, priority, LONG_WINDOW_BATCH_TOKENS), n_tokens
+        return [(self.batcher.submit((transcript, current_date, mode), deadline=deadline, priority=priority), None)], None
+
+    def _infer(self, transcript, current_date, mode, deadline=None, priority="interactive"):
+        slots, n_tokens = self._submit_infer(transcript, current_date, mode, deadline, priority)
+        return merge_windows(self._slot_outputs(slots), PTP_LABELS, n_tokens)
+
+    async def _infer_async(self, transcript, current_date, mode, deadline=None, priority="interactive"):
+        # Window splitting tokenizes the whole transcript: keep it off the event loop
+        submitted = asyncio.get_running_loop().run_in_executor(
+            None, self._submit_infer, transcript, current_date, mode, deadline, priority)
+        try:
+            slots, n_tokens = await asyncio.shield(submitted)
+        except asyncio.CancelledError:
+            # Cancelled while preparing: whatever it queues is dropped once queued
+            submitted.add_done_callback(lambda f: f.exception() is None and self._cancel_slots(f.result()[0]))
+            raise
+        try:
+            for fut, _ in slots:
+                await asyncio.wrap_future(fut)
+        except BaseException:
+            # Cancelled (client gone) or failed: windows still queued never reach the model
+            self._cancel_slots(slots)
+            raise
+        return merge_windows(self._slot_outputs(slots), PTP_LABELS, n_tokens)
+
+    @staticmethod
+    def _cancel_slots(slots):
+        for fut, _ in slots:
+            fut.cancel()
+
+    @staticmethod
+    def _reusable(result):
+        """Whether a result may be reused for a near-duplicate transcript: never for
+        errors or for payment outcomes whose amount / date come from the transcript."""
+        if "error" in result or result.get("payment_disposition") in PTP_LABELS:
+            return False
+        ptp = result.get("ptp_details") or {}
+        return ptp.get("amount") is None and ptp.get("date") is None
+
+    def _namespace(self, mode):
+        return f"{mode}|{MODEL_VERSION}|{self.prompt_version}"
+
+    def _lookup(self, transcript, mode):
+        """Stages in front of the model: rule fast path, then near-duplicate reuse.
+
+        Returns (result or None, meta, shadow rule); meta["path"] says which stage answered."""
+        rule = self.rules.match(transcript) if self.rules is not None else None
+        if rule is not None and RULE_FASTPATH == "1":
+            return rule.result(), {"path": "rules", "rule": rule.name}, None
+
+        meta = {}
+        result = None
+        if self.near_dups is not None:
+            result = self.near_dups.lookup(transcript, self._namespace(mode))
+            meta["near_dup"] = "hit" if result is not None else "miss"
+        if result is not None:
+            meta["path"] = "near_dup"
+        return result, meta, rule
+
+    def _finish(self, transcript, mode, result, meta, rule):
+        """Bookkeeping once a result is known: tag the transcript's language for metrics,
+        remember model results for near-duplicates and, in shadow mode, record whether
+        the rule would have matched the answer."""
+        meta["language"] = detect_language(transcript)
+        if meta.get("path") == "model" and self.near_dups is not None and self._reusable(result):
+            self.near_dups.add(transcript, result, self._namespace(mode))
+        if rule is not None:
+            meta["rule"] = rule.name
+            meta["rule_agrees"] = result.get("disposition") == rule.rule.label
+
+    def _predict_uncached(self, transcript, current_date, mode, deadline=None, priority="interactive"):
+        """Rule fast path, then near-duplicate reuse, then the model. meta["path"] says which answered."""
+        result, meta, rule = self._lookup(transcript, mode)
+        if result is None:
+            result, infer_meta = self._infer(transcript, current_date, mode, deadline, priority)
+            meta.update(infer_meta, path="model", priority=priority)
+        self._finish(transcript, mode, result, meta, rule)
+        return result, meta
+
+    async def _predict_uncached_async(self, transcript, current_date, mode, deadline=None, priority="interactive"):
+        # Rule matching, MinHash / SQLite near-duplicate lookups and language tagging are
+        # synchronous CPU and disk work, so they run in the loop's executor
+        loop = asyncio.get_running_loop()
+        result, meta, rule = await loop.run_in_executor(None, self._lookup, transcript, mode)
+        if result is None:
+            result, infer_meta = await self._infer_async(transcript, current_date, mode, deadline, priority)
+            meta.update(infer_meta, path="model", priority=priority)
+        await loop.run_in_executor(None, self._finish, transcript, mode, result, meta, rule)
+        return result, meta
+
+    @staticmethod
+    def _timed(meta, transcript, started):
+        """Add the request's latency_s, and its language for cache hits that skipped _finish()."""
+        if "language" not in meta:
+            meta["language"] = detect_language(transcript)
+        meta["latency_s"] = time.perf_counter() - started
+        return meta
+
+    def _request(self, transcript, current_date, mode, priority="interactive"):
+        if mode not in PREDICT_MODES:
+            raise ValueError(f"Unknown mode {mode!r}; expected one of {', '.join(PREDICT_MODES)}")
+        if priority not in PRIORITY_CLASSES:
+            raise ValueError(f"Unknown priority {priority!r}; expected one of {', '.join(PRIORITY_CLASSES)}")
+        if current_date is None: current_date = str(date.today())
+        if isinstance(transcript, dict):
+            transcript = transcript.get("transcript", str(transcript))
+        return transcript, current_date
+
+    def predict_with_meta(self, transcript, current_date=None, mode="generate", deadline=None, priority="interactive"):
+        """Like predict(), but also returns scheduling, token and cache stats for metrics.
+
+        With a `deadline` (time.monotonic()), a request still queued for the model when
+        it passes is dropped and raises batching.DeadlineExceeded. `priority` is the
+        batcher's scheduling class (batching.PRIORITY_CLASSES)."""
+        started = time.perf_counter()
+        transcript, current_date = self._request(transcript, current_date, mode, priority)
+        if self.cache is None:
+            result, meta = self._predict_uncached(transcript, current_date, mode, deadline, priority)
+            return result, self._timed(meta, transcript, started)
+
+        key = self.cache.make_key(transcript, current_date, mode, MODEL_VERSION, self.prompt_version)
+        meta = {}
+        def compute():
+            result, infer_meta = self._predict_uncached(transcript, current_date, mode, deadline, priority)
+            meta.update(infer_meta)
+            return result
+        result, meta["cache"] = self.cache.get_or_compute(key, compute, cacheable=lambda r: "error" not in r)
+        return result, self._timed(meta, transcript, started)
+
+    async def predict_async(self, transcript, current_date=None, mode="generate", deadline=None, priority="interactive"):
+        """Awaitable predict_with_meta() for async endpoints.
+
+        Cache, rule and near-duplicate lookups and prompt preparation run in the loop's
+        executor; model work is awaited on the batcher's futures, so no thread is held
+        while the request waits for the GPU and the event loop never runs CPU work.
+        Cancelling the awaiting task takes a still-queued request out of the batcher."""
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        transcript, current_date = self._request(transcript, current_date, mode, priority)
+        if self.cache is None:
+            result, meta = await self._predict_uncached_async(transcript, current_date, mode, deadline, priority)
+            return result, await loop.run_in_executor(None, self._timed, meta, transcript, started)
+
+        key = await loop.run_in_executor(None, self.cache.make_key, transcript, current_date, mode,
+                                         MODEL_VERSION, self.prompt_version)
+        meta = {}
+        async def compute():
+            result, infer_meta = await self._predict_uncached_async(transcript, current_date, mode, deadline, priority)
+            meta.update(infer_meta)
+            return result
+        result, meta["cache"] = await self.cache.get_or_compute_async(key, compute, cacheable=lambda r: "error" not in r)
+        return result, await loop.run_in_executor(None, self._timed, meta, transcript, started)
+
+    def prompt_lengths(self, prepared):
+        """Prompt length in tokens of each prepared (transcript, current_date) pair."""
+        suffixes = [self.prompt_suffix(t, current_date=d) for t, d in prepared]
+        enc = self.tokenizer(suffixes, add_special_tokens=False)["input_ids"]
+        prefix_len = self.prefix_ids.shape[1] if self.prefix_cache is not None else len(self.encode(self.prompt_prefix()))
+        return [prefix_len + len(ids) for ids in enc]
+
+    def predict_many(self, transcripts, current_date=None, mode="generate", priority="batch"):
+        """Predict a list of transcripts for bulk entry points (uploads, offline scoring).
+
+        Returns (results, metas) in input order. Transcripts that are identical after
+        normalization are predicted once; later copies get meta {"cache": "coalesced"}.
+        Rows not answered by the rules or caches are sorted by prompt length and packed
+        into batches of at most BULK_TOKEN_BUDGET padded tokens (and BULK_MAX_BATCH rows),
+        which go through the batcher as whole batches so similar lengths share padding,
+        scheduled in the `priority` class."""
+        _, current_date = self._request("", current_date, mode, priority)
+        texts = [t.get("transcript", str(t)) if isinstance(t, dict) else str(t) for t in transcripts]
+
+        slots, unique, order = {}, [], []
+        for t in texts:
+            key = normalize_transcript(t)
+            if key not in slots:
+                slots[key] = len(unique)
+                unique.append(t)
+            order.append(slots[key])
+
+        results, metas, todo = [None] * len(unique), [None] * len(unique), []
+        for i, t in enumerate(unique):
+            key = self.cache.make_key(t, current_date, mode, MODEL_VERSION, self.prompt_version) if self.cache is not None else None
+            cached = self.cache.get(key) if key is not None else None
+            if cached is not None:
+                results[i], metas[i] = cached, {"cache": "hit"}
+                continue
+            result, meta, rule = self._lookup(t, mode)
+            if key is not None:
+                meta["cache"] = "miss"
+            if result is None:
+                todo.append((i, key, meta, rule))
+            else:
+                self._finish(t, mode, result, meta, rule)
+                if key is not None:
+                    self.cache.put(key, result)
+                results[i], metas[i] = result, meta
+
+        if todo:
+            # Long transcripts contribute one part per window; all parts are packed together
+            split = [self.split_windows(unique[i]) for i, _, _, _ in todo]
+            owners = [j for j, (windows, _) in enumerate(split) for _ in windows]
+            slots = self._submit_packed([w for windows, _ in split for w in windows], current_date, mode, priority=priority)
+            grouped = [[] for _ in todo]
+            for j, output in zip(owners, self._slot_outputs(slots)):
+                grouped[j].append(output)
+            for (i, key, meta, rule), outputs, (_, n_tokens) in zip(todo, grouped, split):
+                result, stats = merge_windows(outputs, PTP_LABELS, n_tokens)
+                meta.update(stats, path="model", priority=priority)
+                self._finish(unique[i], mode, result, meta, rule)
+                if key is not None and "error" not in result:
+                    self.cache.put(key, result)
+                results[i], metas[i] = result, meta
+
+        out_results, out_metas, seen = [], [], set()
+        for u in order:
+            out_results.append(copy.deepcopy(results[u]))
+            out_metas.append(metas[u] if u not in seen else {"cache": "coalesced"})
+            seen.add(u)
+        return out_results, out_metas
+
+    def predict(self, transcript, current_date=None, mode="generate"):
+        return self.predict_with_meta(transcript, current_date, mode=mode)[0]
+
+    def warmup(self):
+        """Run WARMUP_TRANSCRIPT through the model in every mode, bypassing the caches and rules."""
+        with startup_timer.phase("warmup"):
+            for mode in PREDICT_MODES:
+                self._infer(WARMUP_TRANSCRIPT, str(date.today()), mode)
 
 _model_instance = None
 def get_model():
     global _model_instance
-    if _model_instance is None: _model_instance = DispositionModel()
+    if _model_instance is None:
+        _model_instance = DispositionModel()
+        if MODEL_WARMUP:
+            _model_instance.warmup()
+        print(f"Startup: {startup_timer.report()}")
     return _model_instance
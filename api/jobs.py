@@ -0,0 +1,218 @@
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+
+# Uploaded files, per-row checkpoints and finished outputs live here, one directory per job
+JOB_DIR = os.getenv("UPLOAD_JOB_DIR", os.path.expanduser("~/.cache/disposition_model/jobs"))
+OUTPUT_FORMATS = ("csv", "xlsx", "xls", "json")
+# Rows handed to the model per step; each block is length-bucketed and deduplicated
+# as a whole and checkpointed once it finishes
+UPLOAD_BLOCK_ROWS = int(os.getenv("UPLOAD_BLOCK_ROWS", "256"))
+# A block whose prediction raises (OOM, worker crash) is retried this many times, with
+# backoff, before the job is marked failed; its rows are never checkpointed as done
+UPLOAD_BLOCK_RETRIES = int(os.getenv("UPLOAD_BLOCK_RETRIES", "2"))
+# A failed job is restarted on this many service restarts, then left failed (a bad
+# file or a row that always crashes the model would otherwise be retried forever)
+UPLOAD_RESUME_ATTEMPTS = int(os.getenv("UPLOAD_RESUME_ATTEMPTS", "3"))
+
+
+def read_table(path_or_buffer, filename):
+    """Parse an uploaded CSV / Excel / JSON file into a DataFrame (CSV when the extension is unknown)."""
+    # pandas is only needed for uploads; importing it here keeps it out of the API's startup
+    import pandas as pd
+    name = filename.lower()
+    if name.endswith(('.xls', '.xlsx')):
+        return pd.read_excel(path_or_buffer)
+    if name.endswith('.json'):
+        return pd.read_json(path_or_buffer)
+    return pd.read_csv(path_or_buffer)
+
+
+def find_transcript_column(df):
+    for c in df.columns:
+        if 'transcript' in str(c).lower() or 'text' in str(c).lower() or 'conversation' in str(c).lower():
+            return c
+    return None
+
+
+def write_table(rows, path, output_format):
+    import pandas as pd
+    out_df = pd.DataFrame(rows)
+    if output_format == 'csv':
+        out_df.to_csv(path, index=False)
+    elif output_format in ('xlsx', 'xls'):
+        with pd.ExcelWriter(path, engine='openpyxl') as out_writer:
+            out_df.to_excel(out_writer, index=False)
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(out_df.to_json(orient='records'))
+
+
+class JobManager:
+    """Runs bulk-upload jobs in the background, one job at a time.
+
+    Each job directory holds the uploaded file, job.json (status and settings) and
+    results.jsonl, to which every finished row is appended. results.jsonl is the
+    checkpoint: after a restart, queued and running jobs are picked up again and rows
+    already in it are not recomputed. Pending rows go to `process_rows` in blocks of
+    `block_rows`, so the model can bucket them by length. When `process_rows` raises,
+    the block is retried up to `block_retries` times and then the job fails; only
+    blocks that returned results are checkpointed. A failed job is picked up again on
+    at most `resume_attempts` restarts (counted in job.json); its last error is kept.
+    """
+    def __init__(self, process_rows, job_dir=JOB_DIR, block_rows=UPLOAD_BLOCK_ROWS, block_retries=UPLOAD_BLOCK_RETRIES,
+                 resume_attempts=UPLOAD_RESUME_ATTEMPTS):
+        self.process_rows = process_rows  # (transcripts, mode, priority) -> result dict per transcript
+        self.job_dir = job_dir
+        self.block_rows = block_rows
+        self.block_retries = block_retries
+        self.resume_attempts = resume_attempts
+        self._jobs = {}  # job id -> job dict (the contents of job.json plus live progress)
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        os.makedirs(job_dir, exist_ok=True)
+        self._resume()
+        threading.Thread(target=self._run, daemon=True, name="upload-jobs").start()
+
+    def _path(self, job_id, name):
+        return os.path.join(self.job_dir, job_id, name)
+
+    def _save(self, job):
+        tmp_path = self._path(job["id"], "job.json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({k: v for k, v in job.items() if not k.startswith("_")}, f)
+        os.replace(tmp_path, self._path(job["id"], "job.json"))
+
+    def _load_done(self, job_id):
+        """Finished rows from the checkpoint, ignoring a line cut short by a crash."""
+        done = {}
+        path = self._path(job_id, "results.jsonl")
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    done[entry["row"]] = entry["result"]
+        return done
+
+    def _resume(self):
+        for job_id in sorted(os.listdir(self.job_dir)):
+            try:
+                with open(self._path(job_id, "job.json")) as f:
+                    job = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                continue
+            job["done"] = len(self._load_done(job_id))
+            self._jobs[job_id] = job
+            if job["status"] == "failed":
+                if job.get("resume_attempts", 0) >= self.resume_attempts:
+                    continue
+                job["resume_attempts"] = job.get("resume_attempts", 0) + 1
+            elif job["status"] not in ("queued", "running"):
+                continue
+            job["status"] = "queued"
+            self._save(job)
+            print(f"Resuming upload job {job_id} ({job['done']}/{job['total']} rows done)")
+            self._queue.put(job_id)
+
+    def submit(self, filename, body, output_format, mode, total, priority="batch"):
+        job_id = uuid.uuid4().hex
+        os.makedirs(os.path.join(self.job_dir, job_id))
+        input_name = "input" + os.path.splitext(filename)[1].lower()
+        with open(self._path(job_id, input_name), "wb") as f:
+            f.write(body)
+        job = {
+            "id": job_id, "filename": filename, "input": input_name, "output_format": output_format,
+            "mode": mode, "priority": priority, "status": "queued", "total": total, "done": 0, "error": None,
+            "created_at": time.time(), "finished_at": None,
+        }
+        with self._lock:
+            self._jobs[job_id] = job
+            self._save(job)
+        self._queue.put(job_id)
+        return self.status(job_id)
+
+    def status(self, job_id):
+        """Public view of a job with progress and ETA, or None for an unknown ID."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            info = {k: v for k, v in job.items() if not k.startswith("_") and k != "input"}
+        info["progress"] = round(info["done"] / info["total"], 4) if info["total"] else 1.0
+        info["eta_s"] = None
+        started, done_at_start = job.get("_started"), job.get("_done_at_start", 0)
+        if info["status"] == "running" and started and info["done"] > done_at_start:
+            # Rate since this run started, so resumed rows do not inflate it
+            rate = (info["done"] - done_at_start) / (time.time() - started)
+            info["eta_s"] = round((info["total"] - info["done"]) / rate, 1)
+        return info
+
+    def output_path(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None or job["status"] != "done":
+            return None
+        return self._path(job_id, f"predictions.{job['output_format']}")
+
+    def _run(self):
+        while True:
+            job_id = self._queue.get()
+            job = self._jobs[job_id]
+            try:
+                self._process(job)
+            except Exception as e:
+                print(f"Upload job {job_id} failed: {e}")
+                with self._lock:
+                    job["status"], job["error"], job["finished_at"] = "failed", str(e), time.time()
+                    self._save(job)
+
+    def _process_block(self, texts, job):
+        for attempt in range(self.block_retries + 1):
+            try:
+                return self.process_rows(texts, job["mode"], job.get("priority", "batch"))
+            except Exception as e:
+                if attempt == self.block_retries:
+                    raise
+                print(f"Upload job {job['id']}: block of {len(texts)} rows failed ({e}), retrying")
+                time.sleep(2 ** attempt)
+
+    def _process(self, job):
+        import pandas as pd
+        job_id = job["id"]
+        df = read_table(self._path(job_id, job["input"]), job["input"])
+        transcript_col = find_transcript_column(df)
+        transcripts = ["" if pd.isna(t) else str(t) for t in df[transcript_col]] if transcript_col is not None else []
+        done = self._load_done(job_id)
+        with self._lock:
+            job.update(status="running", total=len(transcripts), done=len(done), _started=time.time(), _done_at_start=len(done))
+            self._save(job)
+
+        pending = [i for i in range(len(transcripts)) if i not in done]
+        checkpoint_path = self._path(job_id, "results.jsonl")
+        if os.path.exists(checkpoint_path) and os.path.getsize(checkpoint_path):
+            # Terminate a line cut short by a crash so the next entry starts cleanly
+            with open(checkpoint_path, "rb+") as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    f.write(b"\n")
+        with open(checkpoint_path, "a", encoding="utf-8") as checkpoint:
+            for start in range(0, len(pending), self.block_rows):
+                block = pending[start:start + self.block_rows]
+                outs = self._process_block([transcripts[i] for i in block], job)
+                for i, out in zip(block, outs):
+                    checkpoint.write(json.dumps({"row": i, "result": out}, ensure_ascii=False, default=str) + "\n")
+                    done[i] = out
+                checkpoint.flush()
+                with self._lock:
+                    job["done"] = len(done)
+
+        write_table([done[i] for i in range(len(transcripts))], self._path(job_id, f"predictions.{job['output_format']}"), job["output_format"])
+        with self._lock:
+            job.update(status="done", error=None, finished_at=time.time())
+            self._save(job)
@@ -0,0 +1,41 @@
+import re
+
+# Unicode blocks of the Indic scripts in generate_multilingual_datasets.LANGUAGES
+SCRIPTS = {
+    "devanagari": (0x0900, 0x097F),
+    "bengali": (0x0980, 0x09FF),
+    "punjabi": (0x0A00, 0x0A7F),
+    "gujarati": (0x0A80, 0x0AFF),
+    "tamil": (0x0B80, 0x0BFF),
+    "telugu": (0x0C00, 0x0C7F),
+    "kannada": (0x0C80, 0x0CFF),
+    "malayalam": (0x0D00, 0x0D7F),
+}
+# Common Marathi words that Hindi does not use; Devanagari text without them is taken as Hindi
+MARATHI_MARKERS = {"आहे", "आहेत", "नाही", "मी", "तुम्ही", "काय", "झाले", "झालं", "करतो", "करते", "होईल", "उद्या"}
+
+
+def detect_language(text):
+    """Dominant language of a transcript by script, as a metrics label.
+
+    Counts letters per script; Latin text is "english" (romanized Hindi included) and
+    Devanagari is split into Hindi and Marathi by a few marker words. Returns "unknown"
+    for text without letters."""
+    counts = dict.fromkeys(SCRIPTS, 0)
+    latin = 0
+    for ch in str(text):
+        code = ord(ch)
+        if code < 0x0900:
+            latin += ch.isascii() and ch.isalpha()
+            continue
+        for script, (lo, hi) in SCRIPTS.items():
+            if lo <= code <= hi:
+                counts[script] += 1
+                break
+    script, count = max(counts.items(), key=lambda item: item[1])
+    if count == 0 or count < latin:
+        return "english" if latin else "unknown"
+    if script == "devanagari":
+        words = set(re.findall(r"[ऀ-ॿ]+", str(text)))
+        return "marathi" if words & MARATHI_MARKERS else "hindi"
+    return script
@@ -0,0 +1,88 @@
+# Map-reduce over long transcripts: the call is split into overlapping token windows,
+# each window is predicted on its own and the partial results are merged.
+
+# Per-window stats that add up over the windows of a transcript; the others are averaged
+SUMMED_STATS = (
+    "decode_steps", "forced_tokens", "generated_tokens", "drafted_tokens", "accepted_tokens",
+    "transcript_tokens_in", "transcript_tokens_out", "prompt_tokens",
+)
+# Call outcomes that say little about the call on their own
+UNINFORMATIVE_DISPOSITIONS = ("OTHERS", "ANSWERED", "CUSTOMER_PICKED")
+
+
+def window_spans(n_tokens, size, overlap, max_windows):
+    """(start, end) token spans covering n_tokens with windows of `size` overlapping by `overlap`.
+
+    With more than max_windows windows, the first window and the last max_windows - 1
+    are kept (the end of a call matters most)."""
+    if n_tokens <= size:
+        return [(0, n_tokens)]
+    step = max(1, size - overlap)
+    spans = []
+    for start in range(0, n_tokens, step):
+        end = min(start + size, n_tokens)
+        spans.append((start, end))
+        if end == n_tokens:
+            break
+    if len(spans) > max_windows:
+        spans = spans[:1] + spans[len(spans) - (max_windows - 1):] if max_windows > 1 else spans[-1:]
+    return spans
+
+
+def informativeness(result):
+    """How much a window's result says about the call; higher is better."""
+    score = 0.0
+    if result.get("disposition") not in UNINFORMATIVE_DISPOSITIONS:
+        score += 2
+    if result.get("payment_disposition") not in (None, "None"):
+        score += 2
+    if result.get("reason_for_not_paying") not in (None, "None"):
+        score += 1
+    return score + float(result.get("confidence_score") or 0)
+
+
+def merge_window_results(results, ptp_labels):
+    """Merge per-window results (in call order) into one response, deterministically.
+
+    - disposition, reason and remarks come from the most informative window (the
+      later window wins ties);
+    - payment_disposition and ptp_details come from the latest window with a PTP-style
+      outcome, since later commitments supersede earlier ones; without one, from the
+      most informative window;
+    - confidence_score is the lowest confidence among the windows used."""
+    valid = [(i, r) for i, r in enumerate(results) if "error" not in r]
+    if not valid:
+        return results[-1]
+    best_i, best = max(valid, key=lambda item: (informativeness(item[1]), item[0]))
+    ptp_windows = [(i, r) for i, r in valid if r.get("payment_disposition") in ptp_labels]
+    pay_i, pay = ptp_windows[-1] if ptp_windows else (best_i, best)
+
+    merged = dict(best)
+    merged["payment_disposition"] = pay.get("payment_disposition")
+    merged["ptp_details"] = dict(pay.get("ptp_details") or {"amount": None, "date": None})
+    if pay_i != best_i:
+        if pay.get("reason_for_not_paying") not in (None, "None"):
+            merged["reason_for_not_paying"] = pay.get("reason_for_not_paying")
+        remarks = [r for r in (best.get("remarks"), pay.get("remarks")) if r]
+        merged["remarks"] = "; ".join(dict.fromkeys(remarks))
+    confidences = [r.get("confidence_score") for r in (best, pay) if r.get("confidence_score") is not None]
+    if confidences:
+        merged["confidence_score"] = min(confidences)
+    return merged
+
+
+def merge_windows(outputs, ptp_labels, transcript_tokens=None):
+    """Merge (result, stats) pairs of a transcript's windows into one (result, stats)."""
+    if len(outputs) == 1:
+        return outputs[0]
+    result = merge_window_results([r for r, _ in outputs], ptp_labels)
+    stats = {}
+    for key in outputs[0][1]:
+        values = [window_stats[key] for _, window_stats in outputs if key in window_stats]
+        # Work adds up across windows; scheduling stats (queue wait, batch size) are averaged
+        stats[key] = sum(values) if key in SUMMED_STATS else sum(values) / len(values)
+    stats["windows"] = len(outputs)
+    if transcript_tokens is not None:
+        # Windows overlap, so their token counts over-count the transcript itself
+        stats["transcript_tokens_in"] = transcript_tokens
+    return result, stats
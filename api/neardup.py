@@ -0,0 +1,102 @@
+import hashlib
+import json
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+_MERSENNE = (1 << 31) - 1
+
+
+def fingerprint_text(transcript):
+    """Normalization applied before shingling: case, digits (amounts, phone numbers,
+    timestamps) and whitespace differences are ignored."""
+    text = str(transcript).lower()
+    text = re.sub(r"\d+", "0", text)
+    return " ".join(text.split())
+
+
+class NearDuplicateIndex:
+    """MinHash-LSH index that finds stored transcripts similar to a new one.
+
+    Transcripts are shingled into character n-grams; a MinHash signature estimates
+    the Jaccard similarity of two shingle sets, and LSH banding keeps lookups to a
+    handful of candidates. The index holds at most `max_entries` transcripts and
+    evicts the least recently used ones.
+    """
+    def __init__(self, threshold=0.85, max_entries=50000, num_perm=64, bands=16, ngram=5, min_shingles=12, seed=7):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.ngram = ngram
+        self.min_shingles = min_shingles
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _MERSENNE, size=num_perm, dtype=np.int64)
+        self._b = rng.integers(0, _MERSENNE, size=num_perm, dtype=np.int64)
+        self._entries = OrderedDict()  # entry id -> (namespace, signature, band keys, json)
+        self._buckets = {}  # band key -> set of entry ids
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def signature(self, transcript):
+        """MinHash signature, or None if the transcript is too short to compare safely."""
+        text = fingerprint_text(transcript)
+        shingles = {text[i:i + self.ngram] for i in range(max(len(text) - self.ngram + 1, 0))}
+        if len(shingles) < self.min_shingles:
+            return None
+        hashes = np.array(
+            [int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest(), "little") % _MERSENNE for s in shingles],
+            dtype=np.int64,
+        )
+        return ((np.outer(hashes, self._a) + self._b) % _MERSENNE).min(axis=0)
+
+    def _band_keys(self, namespace, sig):
+        return [(namespace, band, sig[band * self.rows:(band + 1) * self.rows].tobytes()) for band in range(self.bands)]
+
+    def lookup(self, transcript, namespace=""):
+        """Stored value of the most similar transcript at or above the threshold, else None."""
+        sig = self.signature(transcript)
+        if sig is None:
+            return None
+        with self._lock:
+            candidates = set()
+            for key in self._band_keys(namespace, sig):
+                candidates |= self._buckets.get(key, set())
+            best_id, best_sim = None, self.threshold
+            for entry_id in candidates:
+                sim = float(np.mean(self._entries[entry_id][1] == sig))
+                if sim >= best_sim:
+                    best_id, best_sim = entry_id, sim
+            if best_id is None:
+                return None
+            self._entries.move_to_end(best_id)
+            return json.loads(self._entries[best_id][3])
+
+    def add(self, transcript, value, namespace=""):
+        sig = self.signature(transcript)
+        if sig is None:
+            return
+        keys = self._band_keys(namespace, sig)
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = (namespace, sig, keys, json.dumps(value, ensure_ascii=False))
+            for key in keys:
+                self._buckets.setdefault(key, set()).add(entry_id)
+            while len(self._entries) > self.max_entries:
+                old_id, (_, _, old_keys, _) = self._entries.popitem(last=False)
+                for key in old_keys:
+                    bucket = self._buckets.get(key)
+                    if bucket is not None:
+                        bucket.discard(old_id)
+                        if not bucket:
+                            del self._buckets[key]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
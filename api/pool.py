@@ -0,0 +1,420 @@
+import argparse
+import asyncio
+import importlib
+import itertools
+import math
+import os
+import secrets
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from multiprocessing.connection import Client, Listener
+
+from batching import DeadlineExceeded
+
+# Inference worker processes, each with its own model (1 = the model runs in the API process)
+MODEL_WORKERS = int(os.getenv("MODEL_WORKERS", "1"))
+# Devices the workers are spread over, round-robin: "0,1" gives each worker one of two
+# GPUs (via CUDA_VISIBLE_DEVICES), "cpu" hides the GPUs. Default: every visible GPU (see default_devices), else cpu.
+MODEL_WORKER_DEVICES = os.getenv("MODEL_WORKER_DEVICES", "")
+# "module:callable" a worker calls to build its model; pool:StubModel needs no GPU or weights
+MODEL_WORKER_FACTORY = os.getenv("MODEL_WORKER_FACTORY", "inference:get_model")
+# Requests a worker runs at once; its micro-batcher merges them into batches
+WORKER_THREADS = int(os.getenv("WORKER_THREADS", "64"))
+WORKER_READY_TIMEOUT_S = float(os.getenv("WORKER_READY_TIMEOUT_S", "900"))
+# Bulk calls are split across workers in shares of at least this many rows
+POOL_MIN_SHARE_ROWS = int(os.getenv("POOL_MIN_SHARE_ROWS", "32"))
+WORKER_METHODS = ("predict_with_meta", "predict_many")
+
+
+class PoolUnavailable(RuntimeError):
+    """No model worker is ready (all are starting or restarting)."""
+
+
+def estimate_tokens(text):
+    """Rough prompt-token count of a transcript; the API process has no tokenizer in pool mode."""
+    return len(str(text)) // 4 + 1
+
+
+def default_devices():
+    """GPUs the workers may use, found without importing torch into the API process:
+    CUDA_VISIBLE_DEVICES when it is set, else the GPUs `nvidia-smi -L` lists."""
+    visible = os.environ.get("CUDA_VISIBLE_DEVICES")
+    if visible is not None:
+        devices = []
+        for d in (d.strip() for d in visible.split(",")):
+            if not d or d.startswith("-"):
+                break  # CUDA ignores everything from the first invalid entry on
+            devices.append(d)
+        return devices or ["cpu"]
+    try:
+        listing = subprocess.run(["nvidia-smi", "-L"], capture_output=True, text=True, timeout=10).stdout
+    except (OSError, subprocess.SubprocessError):
+        listing = ""
+    count = sum(line.startswith("GPU ") for line in listing.splitlines())
+    return [str(i) for i in range(count)] or ["cpu"]
+
+
+class StubModel:
+    """CPU stand-in for DispositionModel (MODEL_WORKER_FACTORY=pool:StubModel).
+
+    Sleeps in proportion to the transcript length and returns a fixed result, so the
+    pool, routing and restarts can be exercised without a GPU or model weights."""
+    RESULT = {
+        "disposition": "ANSWERED", "payment_disposition": "None", "reason_for_not_paying": "None",
+        "ptp_details": {"amount": None, "date": None}, "remarks": "stub", "confidence_score": 0.5,
+    }
+
+    def __init__(self, seconds_per_token=float(os.getenv("STUB_SECONDS_PER_TOKEN", "0.0005"))):
+        self.seconds_per_token = seconds_per_token
+
+    def predict_with_meta(self, transcript, current_date=None, mode="generate", deadline=None, priority="interactive"):
+        tokens = estimate_tokens(transcript)
+        time.sleep(tokens * self.seconds_per_token)
+        return dict(self.RESULT), {"path": "model", "transcript_tokens_in": tokens}
+
+    async def predict_async(self, transcript, current_date=None, mode="generate", deadline=None, priority="interactive"):
+        tokens = estimate_tokens(transcript)
+        await asyncio.sleep(tokens * self.seconds_per_token)
+        return dict(self.RESULT), {"path": "model", "transcript_tokens_in": tokens}
+
+    def predict_many(self, transcripts, current_date=None, mode="generate", priority="batch"):
+        outputs = [self.predict_with_meta(t, current_date, mode) for t in transcripts]
+        return [r for r, _ in outputs], [m for _, m in outputs]
+
+    def predict(self, transcript, current_date=None, mode="generate"):
+        return self.predict_with_meta(transcript, current_date, mode)[0]
+
+
+def load_factory(spec):
+    module_name, _, attr = spec.partition(":")
+    return getattr(importlib.import_module(module_name), attr)
+
+
+class _Worker:
+    def __init__(self, index, device):
+        self.index, self.device = index, device
+        self.proc = None
+        self.conn = None  # set once the process has loaded its model and connected
+        self.send_lock = threading.Lock()
+        self.in_flight = {}  # request id -> (future, estimated tokens)
+        self.tokens = 0
+        self.served = self.failed = self.restarts = 0
+        self.busy_s, self.busy_since = 0.0, None
+        self.restart_at, self.backoff_s = None, 1.0
+
+
+class ModelPool:
+    """Runs N inference worker processes, each with its own model, behind the
+    DispositionModel predict interface.
+
+    Each request goes to the ready worker with the fewest estimated in-flight tokens
+    (then the fewest in-flight requests). Workers are separate `python pool.py`
+    processes that connect back over a local authenticated socket, so each can get
+    its own device before torch loads. A worker that exits has its in-flight requests
+    failed and is restarted with backoff; the API keeps serving from the others.
+    """
+    def __init__(self, n_workers=MODEL_WORKERS, devices=None, factory=MODEL_WORKER_FACTORY,
+                 ready_timeout_s=WORKER_READY_TIMEOUT_S):
+        devices = devices or [d.strip() for d in MODEL_WORKER_DEVICES.split(",") if d.strip()] or default_devices()
+        self.factory = factory
+        self._authkey = secrets.token_bytes(32)
+        self._listener = Listener(("127.0.0.1", 0), authkey=self._authkey)
+        self._ids = itertools.count()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._workers = [_Worker(i, devices[i % len(devices)]) for i in range(n_workers)]
+        for w in self._workers:
+            self._spawn(w)
+        self._accept_thread = threading.Thread(target=self._accept, daemon=True, name="pool-accept")
+        self._accept_thread.start()
+        threading.Thread(target=self._monitor, daemon=True, name="pool-monitor").start()
+        ready = self.wait_ready(len(self._workers), ready_timeout_s)
+        if not ready:
+            self.close()
+            raise RuntimeError(f"No model worker became ready within {ready_timeout_s:.0f}s")
+        print(f"Model pool ready: {ready}/{len(self._workers)} workers on devices {', '.join(w.device for w in self._workers)}")
+
+    def _spawn(self, w):
+        env = dict(os.environ, MODEL_POOL_AUTHKEY=self._authkey.hex(), MODEL_WORKERS="1")
+        env["CUDA_VISIBLE_DEVICES"] = "" if w.device == "cpu" else w.device
+        host, port = self._listener.address
+        w.proc = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--address", f"{host}:{port}",
+             "--worker", str(w.index), "--factory", self.factory],
+            env=env,
+        )
+        print(f"Started model worker {w.index} (pid {w.proc.pid}, device {w.device})")
+
+    def _accept(self):
+        while not self._closed:
+            try:
+                conn = self._listener.accept()
+                _, index, pid = conn.recv()
+            except Exception:
+                continue
+            w = self._workers[index]
+            if w.proc is None or w.proc.pid != pid:
+                conn.close()  # a process we already gave up on
+                continue
+            with self._cond:
+                w.conn, w.backoff_s = conn, 1.0
+                self._cond.notify_all()
+            threading.Thread(target=self._read, args=(w, conn), daemon=True, name=f"pool-worker-{index}").start()
+
+    def _read(self, w, conn):
+        while True:
+            try:
+                req_id, ok, payload = conn.recv()
+            except (EOFError, OSError):
+                return  # the monitor notices the exit and fails what is left
+            with self._cond:
+                fut, tokens = w.in_flight.pop(req_id, (None, 0))
+                w.tokens -= tokens
+                w.served += 1
+                w.failed += 0 if ok else 1
+                self._mark_idle(w)
+                self._cond.notify_all()
+            # A caller that gave up (cancelled future) just drops the answer
+            if fut is not None and fut.set_running_or_notify_cancel():
+                if ok:
+                    fut.set_result(payload)
+                else:
+                    fut.set_exception(payload)
+
+    def _mark_idle(self, w):
+        if not w.in_flight and w.busy_since is not None:
+            w.busy_s += time.monotonic() - w.busy_since
+            w.busy_since = None
+
+    def _monitor(self, period_s=0.5):
+        while not self._closed:
+            now = time.monotonic()
+            for w in self._workers:
+                if w.restart_at is not None:
+                    if now >= w.restart_at and not self._closed:
+                        w.restart_at = None
+                        self._spawn(w)
+                    continue
+                code = w.proc.poll()
+                if code is None:
+                    continue
+                with self._cond:
+                    lost = list(w.in_flight.values())
+                    if w.conn is not None:
+                        w.conn.close()
+                    was_ready = w.conn is not None
+                    w.conn, w.in_flight, w.tokens = None, {}, 0
+                    self._mark_idle(w)
+                    w.restarts += 1
+                    # A worker that dies while loading is retried ever more slowly
+                    w.backoff_s = 1.0 if was_ready else min(w.backoff_s * 2, 60.0)
+                    w.restart_at = now + w.backoff_s
+                print(f"Model worker {w.index} exited with code {code}; restarting in {w.backoff_s:.0f}s "
+                      f"({len(lost)} in-flight requests failed)")
+                for fut, _ in lost:
+                    if fut.set_running_or_notify_cancel():
+                        fut.set_exception(RuntimeError(f"Model worker {w.index} exited with code {code}"))
+            time.sleep(period_s)
+
+    def wait_ready(self, count=1, timeout=None):
+        """Wait until `count` workers are ready (or the timeout passes); returns how many are."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                ready = sum(w.conn is not None for w in self._workers)
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if ready >= count or (remaining is not None and remaining <= 0):
+                    return ready
+                self._cond.wait(remaining)
+
+    def _submit(self, method, args, tokens, timeout=30):
+        """Send one call to the least-loaded ready worker; returns (Future, worker index).
+
+        Waits up to `timeout` seconds for a worker when none is ready (e.g. all restarting)."""
+        fut = Future()
+        req_id = next(self._ids)
+        with self._cond:
+            ready = self._cond.wait_for(lambda: any(w.conn is not None for w in self._workers), timeout)
+            if not ready:
+                raise PoolUnavailable("No model worker is available")
+            w = min((w for w in self._workers if w.conn is not None),
+                    key=lambda w: (w.tokens, len(w.in_flight), w.index))
+            w.in_flight[req_id] = (fut, tokens)
+            w.tokens += tokens
+            if w.busy_since is None:
+                w.busy_since = time.monotonic()
+            conn = w.conn
+        try:
+            with w.send_lock:
+                conn.send((req_id, method, args))
+        except (OSError, ValueError) as e:
+            with self._cond:
+                if w.in_flight.pop(req_id, None) is not None:
+                    w.tokens -= tokens
+                    self._mark_idle(w)
+            if fut.set_running_or_notify_cancel():
+                fut.set_exception(RuntimeError(f"Model worker {w.index} is unreachable: {e}"))
+        return fut, w.index
+
+    def predict_with_meta(self, transcript, current_date=None, mode="generate", deadline=None, priority="interactive"):
+        # time.monotonic() is the host-wide monotonic clock, so a deadline means the same in the worker
+        text = transcript.get("transcript", str(transcript)) if isinstance(transcript, dict) else transcript
+        fut, index = self._submit("predict_with_meta", (text, current_date, mode, deadline, priority), estimate_tokens(text))
+        result, meta = fut.result()
+        meta["worker"] = index
+        return result, meta
+
+    async def predict_async(self, transcript, current_date=None, mode="generate", deadline=None, priority="interactive"):
+        """Awaitable predict_with_meta(); raises PoolUnavailable at once instead of waiting for a worker."""
+        text = transcript.get("transcript", str(transcript)) if isinstance(transcript, dict) else transcript
+        fut, index = self._submit("predict_with_meta", (text, current_date, mode, deadline, priority), estimate_tokens(text), timeout=0)
+        try:
+            result, meta = await asyncio.wrap_future(fut)
+        except asyncio.CancelledError:
+            # Client gone or deadline hit: take the request out of the worker's queue too
+            self._cancel(index, fut)
+            raise
+        meta["worker"] = index
+        return result, meta
+
+    def _cancel(self, index, fut):
+        """Ask the worker to drop a request the caller abandoned; its reply still frees the slot."""
+        w = self._workers[index]
+        with self._cond:
+            req_id = next((i for i, (f, _) in w.in_flight.items() if f is fut), None)
+            conn = w.conn
+        if req_id is None or conn is None:
+            return  # already answered, or the worker is gone
+        try:
+            with w.send_lock:
+                conn.send((req_id, "cancel", None))
+        except (OSError, ValueError):
+            pass  # the monitor deals with a worker that went away
+
+    def predict_many(self, transcripts, current_date=None, mode="generate", priority="batch"):
+        """Bulk predict; large calls are split into contiguous shares run on several workers."""
+        texts = [t.get("transcript", str(t)) if isinstance(t, dict) else str(t) for t in transcripts]
+        with self._cond:
+            ready = sum(w.conn is not None for w in self._workers)
+        shares = max(1, min(ready, len(texts) // POOL_MIN_SHARE_ROWS))
+        size = math.ceil(len(texts) / shares) if texts else 0
+        pending = []
+        for start in range(0, len(texts), size or 1):
+            share = texts[start:start + size]
+            pending.append(self._submit("predict_many", (share, current_date, mode, priority), sum(map(estimate_tokens, share))))
+        results, metas = [], []
+        for fut, index in pending:
+            share_results, share_metas = fut.result()
+            results += share_results
+            metas += [dict(meta, worker=index) for meta in share_metas]
+        return results, metas
+
+    def predict(self, transcript, current_date=None, mode="generate"):
+        return self.predict_with_meta(transcript, current_date, mode=mode)[0]
+
+    def stats(self):
+        """Per-worker load and health, for metrics."""
+        now = time.monotonic()
+        with self._cond:
+            return [{
+                "worker": w.index, "device": w.device, "pid": w.proc.pid if w.proc else None,
+                "ready": w.conn is not None, "in_flight": len(w.in_flight), "in_flight_tokens": w.tokens,
+                "served": w.served, "failed": w.failed, "restarts": w.restarts,
+                "busy_s": w.busy_s + (now - w.busy_since if w.busy_since is not None else 0.0),
+            } for w in self._workers]
+
+    def close(self):
+        self._closed = True
+        for w in self._workers:
+            if w.proc is not None and w.proc.poll() is None:
+                w.proc.terminate()
+        # Closing the socket does not wake a blocked accept(); left blocked, the thread would
+        # accept (and reject) workers of a later pool that reuses the descriptor
+        try:
+            socket.create_connection(self._listener.address, timeout=1).close()
+        except OSError:
+            pass
+        self._accept_thread.join(timeout=5)
+        self._listener.close()
+
+
+def worker_main(address, index, factory):
+    """Body of a worker process: build the model, connect to the pool and serve calls."""
+    model = load_factory(factory)()
+    host, port = address.rsplit(":", 1)
+    conn = Client((host, int(port)), authkey=bytes.fromhex(os.environ["MODEL_POOL_AUTHKEY"]))
+    conn.send(("ready", index, os.getpid()))
+    send_lock = threading.Lock()
+
+    def reply(req_id, ok, value):
+        with send_lock:
+            try:
+                conn.send((req_id, ok, value))
+            except Exception as e:
+                # Something in the reply does not pickle; send a plain error instead
+                detail = f"{type(value).__name__}: {value}" if not ok else f"unsendable result: {e}"
+                conn.send((req_id, False, RuntimeError(detail)))
+
+    def check_deadline(method, args):
+        # A request that expired on its way here is not worth starting
+        deadline = args[3] if method == "predict_with_meta" and len(args) > 3 else None
+        if deadline is not None and deadline < time.monotonic():
+            raise DeadlineExceeded(f"Deadline passed {time.monotonic() - deadline:.3f}s before the worker got the request")
+
+    def run(req_id, method, args):
+        try:
+            if method not in WORKER_METHODS:
+                raise ValueError(f"Unknown worker method {method!r}")
+            check_deadline(method, args)
+            reply(req_id, True, getattr(model, method)(*args))
+        except Exception as e:
+            reply(req_id, False, e)
+
+    # Single predictions run as predict_async() tasks on one event loop, so a cancel
+    # from the API takes a request that is still queued out of the model's batcher
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True, name="worker-loop").start()
+    calls = {}  # request id -> concurrent Future of its predict_async() task
+
+    async def run_async(args):
+        check_deadline("predict_with_meta", args)
+        return await model.predict_async(*args)
+
+    def finished(req_id, fut):
+        calls.pop(req_id, None)
+        if fut.cancelled():
+            reply(req_id, False, RuntimeError("Request cancelled by the API"))
+        elif fut.exception() is not None:
+            reply(req_id, False, fut.exception())
+        else:
+            reply(req_id, True, fut.result())
+
+    executor = ThreadPoolExecutor(max_workers=WORKER_THREADS)
+    while True:
+        try:
+            req_id, method, args = conn.recv()
+        except (EOFError, OSError):
+            break  # the API process went away
+        if method == "cancel":
+            fut = calls.get(req_id)
+            if fut is not None:
+                fut.cancel()
+        elif method == "predict_with_meta" and hasattr(model, "predict_async"):
+            calls[req_id] = fut = asyncio.run_coroutine_threadsafe(run_async(args), loop)
+            fut.add_done_callback(lambda f, req_id=req_id: finished(req_id, f))
+        else:
+            executor.submit(run, req_id, method, args)
+    os._exit(0)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Model pool worker process (started by ModelPool)")
+    parser.add_argument("--address", required=True)
+    parser.add_argument("--worker", type=int, required=True)
+    parser.add_argument("--factory", default=MODEL_WORKER_FACTORY)
+    args = parser.parse_args()
+    worker_main(args.address, args.worker, args.factory)
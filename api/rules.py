@@ -0,0 +1,281 @@
+import unicodedata
+from collections import deque
+
+from compaction import content_words, split_turns
+
+# Zero-width joiners show up inconsistently in Indic transcripts (e.g. "నెట్‌వర్క్")
+_ZERO_WIDTH = dict.fromkeys(map(ord, "\u200b\u200c\u200d\ufeff"))
+
+
+def normalize_text(text):
+    """Lowercase NFC text with zero-width characters removed and whitespace collapsed."""
+    text = unicodedata.normalize("NFC", str(text)).translate(_ZERO_WIDTH).lower()
+    return " ".join(text.split())
+
+
+def _is_word_char(ch):
+    # Letters, digits and combining marks (Indic vowel signs, viramas) continue a word
+    return unicodedata.category(ch)[0] in "LNM"
+
+
+class PhraseAutomaton:
+    """Aho-Corasick automaton that finds every phrase occurring in a text in one pass.
+
+    Phrases only match on word boundaries, so "busy" does not fire inside "busybody"."""
+    def __init__(self, phrases):
+        # phrases: iterable of (phrase, payload)
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [[]]
+        for phrase, payload in phrases:
+            node = 0
+            for ch in normalize_text(phrase):
+                nxt = self.goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[node][ch] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append([])
+                node = nxt
+            self.out[node].append((len(normalize_text(phrase)), payload))
+
+        # Breadth-first fill of failure links; outputs are merged along them
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self.goto[node].items():
+                queue.append(nxt)
+                f = self.fail[node]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0)
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+
+    def find(self, text):
+        """Yield (start, end, payload) for every phrase match in the normalized text."""
+        text = normalize_text(text)
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in self.goto[node]:
+                node = self.fail[node]
+            node = self.goto[node].get(ch, 0)
+            for length, payload in self.out[node]:
+                start, end = i - length + 1, i + 1
+                if (start == 0 or not _is_word_char(text[start - 1])) and (end == len(text) or not _is_word_char(text[end])):
+                    yield start, end, payload
+
+
+# =========================
+# RULES
+# =========================
+# Phrase lists are keyed by the languages in generate_multilingual_datasets.LANGUAGES.
+# `phrases` are full announcement wording that a person would not say about their own
+# phone; they claim a short call wherever they occur. `cues` are the short forms ASR
+# usually leaves of an announcement ("switch off", "अभी व्यस्त है"), which borrowers
+# also say ("my phone was switched off"), so they only count when the callee said
+# nothing else (see RuleClassifier). A phrase that is a whole answer on its own
+# ("अभी व्यस्त है", "is busy") is neither. Operator announcements are often read out as
+# English loanwords, so each language lists both the loanword spelling and the native
+# phrasing. Extend a list when the rule_hits / rule_agreement metrics show misses or misfires.
+
+class Rule:
+    """A phrase rule mapping short calls to one call label without running the model.
+
+    `max_chars` keeps the rule to short announcement-style transcripts; a long call
+    that merely mentions the phrase goes to the model."""
+    def __init__(self, name, label, phrases, cues=None, max_chars=400, remarks=""):
+        self.name = name
+        self.label = label
+        self.phrases = phrases
+        self.cues = cues or {}
+        self.max_chars = max_chars
+        self.remarks = remarks
+
+
+RULES = [
+    Rule("switched_off", "SWITCHED_OFF", max_chars=400, remarks="Operator announcement: number switched off", phrases={
+        "english": ["the number you are calling is switched off", "the number you have dialled is switched off",
+                    "the number you have dialed is switched off", "switched off or not reachable",
+                    "switched off or out of coverage area"],
+        "hindi": ["आप जिस नंबर पर कॉल कर रहे हैं वह स्विच ऑफ है", "आपके द्वारा डायल किया गया नंबर स्विच ऑफ है"],
+    }, cues={
+        "english": ["switched off", "switch off"],
+        "hindi": ["स्विच ऑफ", "स्विच्ड ऑफ", "स्विच ऑफ है", "फ़ोन बंद है", "नंबर अभी बंद है", "switch off hai"],
+        "bengali": ["সুইচ অফ", "সুইচড অফ", "ফোন বন্ধ আছে"],
+        "marathi": ["स्विच ऑफ", "स्विच्ड ऑफ", "फोन बंद आहे"],
+        "telugu": ["స్విచ్ ఆఫ్", "స్విచ్డ్ ఆఫ్"],
+        "tamil": ["ஸ்விட்ச் ஆஃப்", "ஸ்விட்ச் ஆப்"],
+        "gujarati": ["સ્વિચ ઓફ", "સ્વિચ્ડ ઓફ", "ફોન બંધ છે"],
+        "kannada": ["ಸ್ವಿಚ್ ಆಫ್", "ಸ್ವಿಚ್ಡ್ ಆಫ್"],
+        "malayalam": ["സ്വിച്ച് ഓഫ്", "സ്വിച്ച്ഡ് ഓഫ്"],
+        "punjabi": ["ਸਵਿੱਚ ਆਫ", "ਸਵਿੱਚ ਆਫ਼", "ਫ਼ੋਨ ਬੰਦ ਹੈ"],
+    }),
+    Rule("out_of_network", "OUT_OF_NETWORK", max_chars=400, remarks="Operator announcement: out of network coverage", phrases={
+        "english": ["the number you are calling is not reachable", "the number you have dialled is not reachable",
+                    "the number you are calling is out of coverage area", "is currently outside the coverage area"],
+        "hindi": ["आप जिस नंबर पर कॉल कर रहे हैं वह अभी पहुंच से बाहर है", "आप जिस नंबर पर कॉल कर रहे हैं वह कवरेज क्षेत्र से बाहर है"],
+    }, cues={
+        "english": ["out of coverage area", "outside the coverage area", "out of network coverage", "not reachable", "out of network area"],
+        "hindi": ["कवरेज क्षेत्र से बाहर", "नेटवर्क क्षेत्र से बाहर", "पहुंच से बाहर", "पहुँच से बाहर", "not reachable hai"],
+        "bengali": ["কভারেজ এলাকার বাইরে", "নেটওয়ার্ক এলাকার বাইরে", "নট রিচেবল"],
+        "marathi": ["कव्हरेज क्षेत्राबाहेर", "नेटवर्क क्षेत्राच्या बाहेर", "संपर्क क्षेत्राच्या बाहेर"],
+        "telugu": ["కవరేజ్ ప్రాంతానికి వెలుపల", "నెట్వర్క్ పరిధిలో లేరు", "నాట్ రీచబుల్"],
+        "tamil": ["தொடர்பு எல்லைக்கு வெளியே", "நெட்வொர்க் எல்லைக்கு வெளியே", "நாட் ரீச்சபிள்"],
+        "gujarati": ["કવરેજ વિસ્તારની બહાર", "નેટવર્ક વિસ્તારની બહાર", "નોટ રીચેબલ"],
+        "kannada": ["ವ್ಯಾಪ್ತಿ ಪ್ರದೇಶದ ಹೊರಗೆ", "ನೆಟ್ವರ್ಕ್ ವ್ಯಾಪ್ತಿಯ ಹೊರಗೆ", "ನಾಟ್ ರೀಚಬಲ್"],
+        "malayalam": ["പരിധിക്ക് പുറത്താണ്", "കവറേജ് ഏരിയയ്ക്ക് പുറത്ത്", "നോട്ട് റീച്ചബിൾ"],
+        "punjabi": ["ਕਵਰੇਜ ਖੇਤਰ ਤੋਂ ਬਾਹਰ", "ਨੈੱਟਵਰਕ ਖੇਤਰ ਤੋਂ ਬਾਹਰ", "ਨੌਟ ਰੀਚੇਬਲ"],
+    }),
+    Rule("busy", "BUSY", max_chars=300, remarks="Operator announcement: number busy", phrases={
+        "english": ["the number you are calling is busy", "the number you have dialled is busy",
+                    "the subscriber you have dialled is busy on another call"],
+        "hindi": ["आप जिस नंबर पर कॉल कर रहे हैं वह अभी व्यस्त है", "आप जिस नंबर पर कॉल कर रहे हैं वह दूसरी कॉल पर व्यस्त है"],
+    }, cues={
+        "english": ["is busy on another call", "the line is busy"],
+        "hindi": ["दूसरी कॉल पर व्यस्त", "नंबर व्यस्त है"],
+        "bengali": ["অন্য কলে ব্যস্ত", "নম্বরটি ব্যস্ত"],
+        "marathi": ["दुसऱ्या कॉलवर व्यस्त", "नंबर व्यस्त आहे"],
+        "telugu": ["మరో కాల్లో బిజీగా"],
+        "tamil": ["வேறு அழைப்பில் உள்ளார்"],
+        "gujarati": ["બીજા કૉલ પર વ્યસ્ત", "નંબર વ્યસ્ત છે"],
+        "kannada": ["ಬೇರೆ ಕರೆಯಲ್ಲಿ ನಿರತರಾಗಿದ್ದಾರೆ"],
+        "malayalam": ["മറ്റൊരു കോളിലാണ്"],
+        "punjabi": ["ਦੂਜੀ ਕਾਲ ਤੇ ਰੁੱਝੇ", "ਨੰਬਰ ਵਿਅਸਤ ਹੈ"],
+    }),
+    Rule("automated_voice", "AUTOMATED_VOICE", max_chars=400, remarks="Automated voice / IVR message", phrases={
+        "english": ["please leave your message after the beep", "please record your message after the tone",
+                    "the mailbox is full", "mailbox is full", "press 1 for"],
+        "hindi": ["बीप के बाद अपना संदेश रिकॉर्ड करें"],
+    }, cues={
+        "english": ["after the tone", "after the beep", "voice mail", "voicemail"],
+        "hindi": ["बीप के बाद", "अपना संदेश रिकॉर्ड करें", "वॉइस मेल"],
+        "bengali": ["বিপের পরে", "ভয়েস মেইল"],
+        "marathi": ["बीप नंतर", "व्हॉइस मेल"],
+        "telugu": ["బీప్ తర్వాత", "వాయిస్ మెయిల్"],
+        "tamil": ["பீப் ஒலிக்குப் பின்", "வாய்ஸ் மெயில்"],
+        "gujarati": ["બીપ પછી", "વોઇસ મેઇલ"],
+        "kannada": ["ಬೀಪ್ ನಂತರ", "ವಾಯ್ಸ್ ಮೇಲ್"],
+        "malayalam": ["ബീപ്പിന് ശേഷം", "വോയ്സ് മെയിൽ"],
+        "punjabi": ["ਬੀਪ ਤੋਂ ਬਾਅਦ", "ਵੌਇਸ ਮੇਲ"],
+    }),
+    # One-line wrong-number calls, in the phrasing of the generated eval sets. These are
+    # the callee's own words, so they are phrases rather than cues.
+    Rule("wrong_number", "WRONG_NUMBER", max_chars=200, remarks="Callee says this is a wrong number", phrases={
+        "english": ["wrong number", "you have the wrong number"],
+        "hindi": ["गलत नंबर", "ग़लत नंबर", "रॉन्ग नंबर", "galat number", "rong number"],
+        "bengali": ["ভুল নম্বর", "রং নম্বর", "রং নাম্বার"],
+        "marathi": ["चुकीचा नंबर", "रॉंग नंबर"],
+        "telugu": ["రాంగ్ నెంబర్", "తప్పు నెంబర్"],
+        "tamil": ["ராங் நம்பர்", "தவறான எண்"],
+        "gujarati": ["ખોટો નંબર", "રોંગ નંબર"],
+        "kannada": ["ರಾಂಗ್ ನಂಬರ್", "ತಪ್ಪು ನಂಬರ್"],
+        "malayalam": ["റോങ്ങ് നമ്പർ", "തെറ്റായ നമ്പർ"],
+        "punjabi": ["ਗਲਤ ਨੰਬਰ", "ਰੌਂਗ ਨੰਬਰ"],
+    }),
+]
+
+# Speaker tags of the called party; what they say decides whether a cue can be trusted
+CALLEE_TAGS = ("borrower", "customer")
+
+# Any of these sends the call to the model: payment talk or a negated rule phrase
+BLOCKERS = {
+    "english": ["pay", "paid", "payment", "emi", "amount", "rupees", "transfer", "not a wrong number", "not wrong number"],
+    "hindi": ["पेमेंट", "रुपये", "पैसे", "भुगतान", "ईएमआई", "दे दूंगा", "गलत नंबर नहीं"],
+    "bengali": ["পেমেন্ট", "টাকা", "কিস্তি"],
+    "marathi": ["पेमेंट", "रुपये", "पैसे", "हप्ता"],
+    "telugu": ["పేమెంట్", "రూపాయలు", "డబ్బులు"],
+    "tamil": ["பேமெண்ட்", "ரூபாய்", "பணம்"],
+    "gujarati": ["પેમેન્ટ", "રૂપિયા", "પૈસા"],
+    "kannada": ["ಪೇಮೆಂಟ್", "ರೂಪಾಯಿ", "ದುಡ್ಡು"],
+    "malayalam": ["പേയ്മെന്റ്", "രൂപ", "പണം"],
+    "punjabi": ["ਪੇਮੈਂਟ", "ਰੁਪਏ", "ਪੈਸੇ"],
+}
+
+
+class RuleMatch:
+    def __init__(self, rule, language, phrase):
+        self.rule = rule
+        self.language = language
+        self.phrase = phrase
+
+    @property
+    def name(self):
+        """Counter label: rule name and the language of the phrase that fired."""
+        return f"{self.rule.name}:{self.language}"
+
+    def result(self):
+        """A response in the same schema as the model's."""
+        return {
+            "disposition": self.rule.label,
+            "payment_disposition": None,
+            "reason_for_not_paying": None,
+            "ptp_details": {"amount": None, "date": None},
+            "remarks": self.rule.remarks,
+            "confidence_score": 0.99,
+        }
+
+
+class RuleClassifier:
+    """High-precision pre-classifier for operator announcements and wrong-number calls.
+
+    All rule and blocker phrases of every language are compiled into one automaton, so
+    a transcript is scanned once regardless of the number of rules. A transcript is
+    only claimed when it is short enough for the rule, no blocker occurs, and the
+    rules that fire agree on a label (the longest matched phrase breaks ties between
+    rules, e.g. "switched off or not reachable"). Cues only fire when no callee turn
+    has content beyond rule phrases and filler ("Borrower: hello? switched off")."""
+    def __init__(self, rules=RULES, blockers=BLOCKERS):
+        self.rules = list(rules)
+        phrases = []
+        for rule in self.rules:
+            for language, items in rule.phrases.items():
+                phrases += [(p, (rule, language, p, False)) for p in items]
+            for language, items in rule.cues.items():
+                phrases += [(p, (rule, language, p, True)) for p in items]
+        for language, items in blockers.items():
+            phrases += [(p, (None, language, p, False)) for p in items]
+        self.automaton = PhraseAutomaton(phrases)
+
+    @staticmethod
+    def _callee_spoke(text, found):
+        """Whether a callee turn says anything besides rule phrases and filler."""
+        chars = list(text)
+        for start, end, _ in found:
+            chars[start:end] = " " * (end - start)
+        for tag, turn in split_turns("".join(chars)):
+            if tag.rstrip(": ").startswith(CALLEE_TAGS) and content_words(turn):
+                return True
+        return False
+
+    def match(self, transcript):
+        """The RuleMatch claiming this transcript, or None to fall through to the model."""
+        text = normalize_text(transcript)
+        found = list(self.automaton.find(text))
+        if any(rule is None for _, _, (rule, _, _, _) in found):
+            return None
+        callee_spoke = None
+        best, best_len, labels = None, 0, set()
+        for start, end, (rule, language, phrase, cue) in found:
+            if len(text) > rule.max_chars:
+                continue
+            if cue:
+                if callee_spoke is None:
+                    callee_spoke = self._callee_spoke(text, found)
+                if callee_spoke:
+                    continue
+            labels.add(rule.label)
+            if end - start > best_len:
+                best, best_len = RuleMatch(rule, language, phrase), end - start
+        if best is None:
+            return None
+        if len(labels) > 1:
+            # Rules disagree: only accept when the winning phrase contains the others' cue
+            # (a longer combined announcement); otherwise leave it to the model
+            covered = {best.rule.label}
+            for _, _, (rule, _, _, _) in self.automaton.find(best.phrase):
+                if rule is not None:
+                    covered.add(rule.label)
+            if not labels <= covered:
+                return None
+        return best
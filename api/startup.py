@@ -0,0 +1,27 @@
+import time
+from contextlib import contextmanager
+
+
+class StartupTimer:
+    """Wall time of each startup phase (imports, weights, artifacts, prefix_cache, warmup...),
+    in the order they ran. Shown by /ready and exported as disposition_startup_seconds."""
+    def __init__(self):
+        self.phases = {}
+
+    def add(self, name, seconds):
+        self.phases[name] = seconds
+
+    @contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def report(self):
+        return ", ".join(f"{name} {seconds:.1f}s" for name, seconds in self.phases.items())
+
+
+# One per process; a pool worker's phases are printed by that worker
+startup_timer = StartupTimer()
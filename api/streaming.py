@@ -0,0 +1,68 @@
+import csv
+import io
+import json
+import os
+import uuid
+
+from jobs import JOB_DIR, find_transcript_column
+
+# Rows read, predicted and written back per chunk of a streamed upload
+STREAM_CHUNK_ROWS = int(os.getenv("STREAM_CHUNK_ROWS", "256"))
+STREAM_INPUTS = (".csv", ".jsonl", ".ndjson")
+STREAM_OUTPUT_FORMATS = ("ndjson", "csv")
+# Fixed column order for streamed CSV (the header goes out before any row is predicted)
+STREAM_CSV_COLUMNS = [
+    "disposition", "payment_disposition", "reason_for_not_paying", "ptp_details", "remarks",
+    "confidence_score", "error", "_inference_path", "_original_transcript",
+]
+
+
+async def spool_upload(file, chunk_bytes=1 << 20):
+    """Copy an UploadFile to a file under JOB_DIR/spool in fixed-size pieces; returns its path."""
+    spool_dir = os.path.join(JOB_DIR, "spool")
+    os.makedirs(spool_dir, exist_ok=True)
+    ext = os.path.splitext(file.filename or "")[1].lower()
+    path = os.path.join(spool_dir, uuid.uuid4().hex + ext)
+    try:
+        with open(path, "wb") as f:
+            while True:
+                piece = await file.read(chunk_bytes)
+                if not piece:
+                    break
+                f.write(piece)
+    except BaseException:
+        os.remove(path)  # client gone mid-upload
+        raise
+    return path
+
+
+def iter_transcript_chunks(path, chunk_rows=STREAM_CHUNK_ROWS):
+    """Yield lists of transcripts, `chunk_rows` at a time, from a spooled CSV or NDJSON file.
+
+    Raises ValueError on the first chunk if there is no transcript column."""
+    import pandas as pd  # only needed for uploads, see jobs.read_table
+    if path.endswith(".csv"):
+        reader = pd.read_csv(path, chunksize=chunk_rows, dtype=str, keep_default_na=False)
+    else:
+        reader = pd.read_json(path, lines=True, chunksize=chunk_rows, dtype=False)
+    transcript_col = None
+    with reader:
+        for chunk in reader:
+            if transcript_col is None:
+                transcript_col = find_transcript_column(chunk)
+                if transcript_col is None:
+                    raise ValueError("No transcript/text column found in uploaded file.")
+            yield ["" if pd.isna(t) else str(t) for t in chunk[transcript_col]]
+
+
+def format_rows(rows, output_format, header=False):
+    """Serialize result rows as NDJSON lines or CSV rows (with the header when asked)."""
+    if output_format == "ndjson":
+        return "".join(json.dumps(row, ensure_ascii=False, default=str) + "\n" for row in rows)
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=STREAM_CSV_COLUMNS, extrasaction="ignore")
+    if header:
+        writer.writeheader()
+    for row in rows:
+        writer.writerow({k: json.dumps(v, ensure_ascii=False) if isinstance(v, dict) else v for k, v in row.items()})
+    return buf.getvalue()
@@ -0,0 +1,77 @@
+"""Compare inference backends (INFERENCE_BACKEND) on the same transcripts.
+
+Each backend loads the checkpoint itself; load time, single-request latency and
+batched throughput are reported, and every backend's responses are checked against
+the first one's (same prompt, stop criteria and clean_output, so labels should match;
+quantized backends may differ where the model was unsure).
+
+Usage:
+    python benchmarks/backend_compare.py --model-path ./merged-checkpoint
+    python benchmarks/backend_compare.py --backends unsloth,transformers   # GPU
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "api")))
+
+import inference
+from backends import get_backend
+from load_test import TRANSCRIPTS
+
+DATE = "2026-02-27"
+FIELDS = ("disposition", "payment_disposition", "reason_for_not_paying")
+
+
+def run_backend(name, model_path, repeats, batch_size):
+    start = time.perf_counter()
+    dm = inference.DispositionModel(model_path=model_path, backend=get_backend(name))
+    load_s = time.perf_counter() - start
+    dm.cache, dm.near_dups, dm.rules = None, None, None
+    dm.predict(TRANSCRIPTS[0], DATE)  # warmup
+
+    latencies, results = [], []
+    for _ in range(repeats):
+        for t in TRANSCRIPTS:
+            start = time.perf_counter()
+            results.append(dm.predict(t, DATE))
+            latencies.append(time.perf_counter() - start)
+
+    items = [(t, DATE) for t in (TRANSCRIPTS * batch_size)[:batch_size]]
+    start = time.perf_counter()
+    dm.generate_batch(items)
+    batch_s = time.perf_counter() - start
+    return {
+        "load_s": load_s, "p50_s": statistics.median(latencies), "max_s": max(latencies),
+        "batch_rows_per_s": len(items) / batch_s, "results": results[:len(TRANSCRIPTS)],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model-path", default=inference.MODEL_PATH)
+    parser.add_argument("--backends", default="transformers,cpu_int8")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--max-new-tokens", type=int, default=None, help="Cap generation length (useful on CPU)")
+    args = parser.parse_args()
+
+    if args.max_new_tokens:
+        inference.MAX_NEW_TOKENS = args.max_new_tokens
+    names = [n.strip() for n in args.backends.split(",") if n.strip()]
+    runs = {name: run_backend(name, args.model_path, args.repeats, args.batch_size) for name in names}
+
+    reference = runs[names[0]]["results"]
+    print(f"\n{'Backend':<14} | {'Load':>8} | {'p50':>8} | {'Max':>8} | {'Batch rows/s':>12} | Agreement with {names[0]}")
+    print("-" * 86)
+    for name, run in runs.items():
+        agree = sum(all(r.get(f) == ref.get(f) for f in FIELDS) for r, ref in zip(run["results"], reference))
+        print(f"{name:<14} | {run['load_s']:>6.1f} s | {run['p50_s']:>6.2f} s | {run['max_s']:>6.2f} s | "
+              f"{run['batch_rows_per_s']:>12.2f} | {agree}/{len(reference)}")
+
+
+if __name__ == "__main__":
+    main()
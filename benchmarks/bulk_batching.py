@@ -0,0 +1,91 @@
+"""Compare bulk-upload throughput: the old row-by-row loop vs length-bucketed predict_many().
+
+A synthetic file of mixed-length transcripts (one line up to several thousand
+characters, with some repeated rows) is run both ways. Padding efficiency is the
+share of real tokens among the padded prompt tokens of each batch; it is also
+reported for batches taken in file order, which is what plain batching would do.
+Prediction caches and rules are switched off so every unique row reaches the model.
+
+Usage:
+    python benchmarks/bulk_batching.py                      # production model (GPU)
+    python benchmarks/bulk_batching.py --model-path ./tiny  # any local HF checkpoint on CPU
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "api")))
+
+import inference
+from batching import pack_by_length
+from prefix_cache import load_model
+from load_test import TRANSCRIPTS
+
+DATE = "2026-02-27"
+
+
+def make_rows(n, duplicate_share, seed):
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(n):
+        if rows and rng.random() < duplicate_share:
+            rows.append(rng.choice(rows))
+            continue
+        # Short single-line calls dominate; a tail of long multi-turn calls
+        turns = rng.choice([1, 1, 1, 2, 3, 5, 10, 25])
+        rows.append(" ".join(rng.choice(TRANSCRIPTS) for _ in range(turns)) + f" [call {len(rows)}]")
+    return rows
+
+
+def efficiency(lengths, batches):
+    real = sum(lengths[i] for batch in batches for i in batch)
+    padded = sum(len(batch) * max(lengths[i] for i in batch) for batch in batches)
+    return real / padded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model-path", default=None, help="Local HF checkpoint to load with transformers instead of the production model")
+    parser.add_argument("--rows", type=int, default=64)
+    parser.add_argument("--duplicates", type=float, default=0.1, help="Share of rows that repeat an earlier row")
+    parser.add_argument("--max-new-tokens", type=int, default=None, help="Cap generation length (useful on CPU)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.max_new_tokens:
+        inference.MAX_NEW_TOKENS = args.max_new_tokens
+    dm = load_model(args.model_path)
+    dm.cache, dm.near_dups, dm.rules = None, None, None
+    rows = make_rows(args.rows, args.duplicates, args.seed)
+
+    unique = list(dict.fromkeys(rows))
+    lengths = dm.prompt_lengths([dm._prepare(t, DATE) for t in unique])
+    file_order = [list(range(i, min(i + inference.BULK_MAX_BATCH, len(unique)))) for i in range(0, len(unique), inference.BULK_MAX_BATCH)]
+    bucketed = pack_by_length(lengths, inference.BULK_TOKEN_BUDGET, inference.BULK_MAX_BATCH)
+    print(f"\n{len(rows)} rows, {len(unique)} unique, prompt lengths {min(lengths)}-{max(lengths)} tokens")
+    print(f"Padding efficiency, file-order batches of {inference.BULK_MAX_BATCH}: {efficiency(lengths, file_order):.1%}")
+    print(f"Padding efficiency, length-bucketed batches:  {efficiency(lengths, bucketed):.1%} ({len(bucketed)} batches)")
+
+    dm.predict_with_meta(rows[0], DATE)  # warmup
+
+    start = time.perf_counter()
+    for t in rows:
+        dm.predict_with_meta(t, DATE)
+    row_by_row = time.perf_counter() - start
+
+    start = time.perf_counter()
+    dm.predict_many(rows, DATE)
+    bulk = time.perf_counter() - start
+
+    print(f"\n{'Mode':<22} | {'Time':>9} | {'Rows/s':>8}")
+    print("-" * 46)
+    print(f"{'row-by-row loop':<22} | {row_by_row:>7.1f} s | {len(rows) / row_by_row:>8.2f}")
+    print(f"{'predict_many':<22} | {bulk:>7.1f} s | {len(rows) / bulk:>8.2f}")
+    print(f"Speedup: {row_by_row / bulk:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,418 @@
+"""Open-loop load test of /predict (replaces stress_test.py).
+
+Requests arrive as a Poisson process at each target rate, whether or not earlier
+ones have finished, so queueing shows up as latency the way it does in production
+(a closed loop of N threads slows its own arrivals down instead). Transcripts are
+drawn from a language mix and a long-tailed length distribution.
+
+Targets:
+    app    the FastAPI app in-process (admission control, batcher, metrics included)
+    model  DispositionModel.predict_async() in-process, no HTTP layer
+    http   a running server at --url
+
+In-process targets run the production model, a local checkpoint (--model-path) or
+--stub: a stand-in whose batches sleep per prompt token and per decode step behind
+the real micro-batcher, so scheduling changes can be measured without a GPU.
+
+Each rate reports throughput, latency p50/p90/p99, queue wait and tokens/sec; --output
+saves the report as JSON. With --baseline, the run fails (exit 1) when a latency
+percentile at any rate is more than --tolerance above the baseline's.
+
+Usage:
+    python benchmarks/load_test.py --stub --rates 5,10,20 --output bench.json
+    python benchmarks/load_test.py --target model --model-path ./tiny --max-new-tokens 32 --rates 1,2
+    python benchmarks/load_test.py --target http --url http://localhost:8005 --rates 0.5,1
+    python benchmarks/load_test.py --stub --rates 5,10,20 --baseline bench.json  # regression check
+"""
+import argparse
+import asyncio
+import importlib.util
+import json
+import math
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "api")))
+
+DATE = "2026-02-27"
+
+# Sample transcripts varying in length and complexity
+TRANSCRIPTS = [
+    "Agent: Hello. Borrower: I will pay 500 dollars tomorrow.",
+    "Agent: Hello? Borrower: My job is lost, I cannot pay the EMI.",
+    "Agent: Pay your dues. Borrower: Send your collection agent to my house, I will pay cash. Agent: Okay.",
+    "Agent: Am I speaking to Rahul? Borrower: No, you have the wrong number. I don't know any Rahul.",
+    "Agent: Loan payment pending. Borrower: Interest bahut zyada hai. Mujhe kam interest rate chahiye tabhi bharunga. Agent: Sir, we can't change it now. Borrower: Toh fir main baat karunga manager se.",
+    "Agent: Namaskar, EMI eppodu kattuveergal? Borrower: Naan next week kattugiren.",
+    "Agent: Hehe hello sir payment detail? Borrower: I have enough funds now, I want to foreclosure the account. How much to pay? Agent: One minute sir... it is 4700. Borrower: Fine, bhej do link.",
+    "Agent: The number you are trying to reach is currently out of network coverage area."
+]
+
+# Conversation turns per language; a transcript is a run of turns from one language
+TURNS = {
+    "english": [t for t in TRANSCRIPTS if not any(w in t for w in ("bahut", "eppodu", "bhej"))],
+    "hinglish": [
+        "Agent: Sir aapki EMI pending hai. Borrower: Haan pata hai, salary aate hi bhar dunga.",
+        "Agent: Payment kab karenge? Borrower: Kal tak 2000 kar dunga, baaki agle hafte.",
+        "Agent: Loan payment pending. Borrower: Interest bahut zyada hai. Mujhe kam interest rate chahiye tabhi bharunga.",
+        "Agent: Hello, Suresh ji baat kar rahe hain? Borrower: Nahi, main unka bhai hoon, woh bahar gaye hain.",
+        "Agent: Sir link bhej diya hai. Borrower: Theek hai, shaam ko check karke pay kar dunga.",
+    ],
+    "hindi": [
+        "Agent: नमस्ते, आपकी EMI बाकी है। Borrower: मैं अगले सोमवार को 3000 रुपये दे दूंगा।",
+        "Agent: क्या मैं राहुल से बात कर रहा हूँ? Borrower: नहीं, यह गलत नंबर है।",
+        "Agent: पेमेंट कब करेंगे? Borrower: मेरी नौकरी चली गई है, अभी पैसे नहीं हैं।",
+        "Agent: सर लिंक भेज दिया है। Borrower: ठीक है, शाम तक कर दूंगा।",
+    ],
+    "marathi": [
+        "Agent: नमस्कार, तुमचा हप्ता कधी भरणार? Borrower: मी उद्या 2000 रुपये भरीन.",
+        "Agent: तुमचे लोन पेंडिंग आहे. Borrower: मी कालच Google Pay वरून पैसे भरले आहेत.",
+    ],
+    "tamil": [
+        "Agent: வணக்கம், EMI எப்போது கட்டுவீர்கள்? Borrower: அடுத்த வாரம் கட்டுகிறேன்.",
+        "Agent: Namaskar, EMI eppodu kattuveergal? Borrower: Naan next week kattugiren.",
+    ],
+    "bengali": [
+        "Agent: নমস্কার, পেমেন্ট কবে করবেন? Borrower: আমি সোমবার ৫০০০ টাকা দেব।",
+        "Agent: রাহুল বলছেন? Borrower: না, এটা ভুল নম্বর।",
+    ],
+}
+DEFAULT_LANGUAGES = "hinglish=0.45,english=0.25,hindi=0.15,marathi=0.05,tamil=0.05,bengali=0.05"
+
+
+def parse_weights(spec):
+    weights = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        if name not in TURNS:
+            raise SystemExit(f"Unknown language {name!r}; expected one of {', '.join(TURNS)}")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+def make_workload(n, languages, median_turns, seed):
+    """n transcripts: language by weight, turns log-normal around median_turns (long tail), at most 60."""
+    rng = random.Random(seed)
+    names, weights = zip(*languages.items())
+    workload = []
+    for i in range(n):
+        language = rng.choices(names, weights)[0]
+        turns = min(60, max(1, round(rng.lognormvariate(math.log(median_turns), 0.9))))
+        text = " ".join(rng.choice(TURNS[language]) for _ in range(turns))
+        # A per-request tag keeps the prediction cache and near-duplicate index from answering repeats
+        workload.append(f"{text} [call {seed}-{i}]")
+    return workload
+
+
+def arrivals(rate, duration_s, rng):
+    """Poisson arrival offsets (seconds) over duration_s."""
+    t, out = 0.0, []
+    while True:
+        t += rng.expovariate(rate)
+        if t >= duration_s:
+            return out
+        out.append(t)
+
+
+class StubModel:
+    """Stand-in for DispositionModel behind the real MicroBatcher.
+
+    A batch costs prefill_s per padded prompt token plus decode_s per generated token
+    step, so batching, admission and priority scheduling behave as with a model."""
+    def __init__(self, prefill_s=2e-5, decode_s=0.004, new_tokens=60):
+        import inference
+        from batching import MicroBatcher
+        from language import detect_language
+        from pool import StubModel as PoolStub, estimate_tokens
+        self.prefill_s, self.decode_s, self.new_tokens = prefill_s, decode_s, new_tokens
+        self.result, self.estimate_tokens, self.detect_language = PoolStub.RESULT, estimate_tokens, detect_language
+        self.batcher = MicroBatcher(self._run_batch, max_batch_size=inference.BATCH_MAX_SIZE, window_ms=inference.BATCH_WINDOW_MS,
+                                    min_shares={"batch": inference.BATCH_MIN_SHARE})
+
+    def _run_batch(self, items):
+        tokens = [self.estimate_tokens(t) for t, _, _ in items]
+        ttft = self.prefill_s * len(items) * max(tokens)
+        decode = self.decode_s * self.new_tokens
+        time.sleep(ttft + decode)
+        return [(dict(self.result), {
+            "prompt_tokens": n, "transcript_tokens_in": n, "transcript_tokens_out": n, "generated_tokens": self.new_tokens,
+            "decode_steps": self.new_tokens, "forced_tokens": 0, "tokenize_s": 0.0, "ttft_s": ttft, "decode_s": decode,
+            "clean_output_s": 0.0,
+        }) for n in tokens]
+
+    def _meta(self, fut, transcript, started):
+        result, stats = fut.result()
+        meta = {**stats, "path": "model", "queue_wait_s": fut.queue_wait, "batch_size": fut.batch_size,
+                "model_latency_s": fut.latency, "priority": fut.priority, "language": self.detect_language(transcript),
+                "latency_s": time.perf_counter() - started}
+        return dict(result), meta
+
+    def predict_with_meta(self, transcript, current_date=None, mode="generate", deadline=None, priority="interactive"):
+        started = time.perf_counter()
+        fut = self.batcher.submit((transcript, current_date, mode), deadline=deadline, priority=priority)
+        fut.result()
+        return self._meta(fut, transcript, started)
+
+    async def predict_async(self, transcript, current_date=None, mode="generate", deadline=None, priority="interactive"):
+        started = time.perf_counter()
+        fut = self.batcher.submit((transcript, current_date, mode), deadline=deadline, priority=priority)
+        try:
+            await asyncio.wrap_future(fut)
+        except asyncio.CancelledError:
+            fut.cancel()
+            raise
+        return self._meta(fut, transcript, started)
+
+    def predict_many(self, transcripts, current_date=None, mode="generate", priority="batch"):
+        futures = self.batcher.submit_batch([(t, current_date, mode) for t in transcripts], priority=priority)
+        outputs = [self._meta(fut, t, time.perf_counter()) for fut, t in zip(futures, transcripts)]
+        return [r for r, _ in outputs], [m for _, m in outputs]
+
+    def predict(self, transcript, current_date=None, mode="generate"):
+        return self.predict_with_meta(transcript, current_date, mode)[0]
+
+
+def load_model(args):
+    if args.stub:
+        return StubModel(new_tokens=args.max_new_tokens or 60)
+    import inference
+    if args.max_new_tokens:
+        inference.MAX_NEW_TOKENS = args.max_new_tokens
+    from prefix_cache import load_model as load_checkpoint
+    return load_checkpoint(args.model_path)
+
+
+def load_app(model):
+    """Import api/app.py with get_model() returning `model`."""
+    import inference
+    inference.get_model = lambda: model
+    spec = importlib.util.spec_from_file_location("api_app", os.path.join(os.path.dirname(__file__), "..", "api", "app.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.model_ready.wait()
+    return module.app
+
+
+def metric_totals(text):
+    """Sums of the counters and histograms the report uses, from Prometheus exposition text."""
+    from prometheus_client.parser import text_string_to_metric_families
+    wanted = {"disposition_queue_wait_seconds_sum", "disposition_queue_wait_seconds_count", "disposition_token_usage_total"}
+    totals = {}
+    for family in text_string_to_metric_families(text):
+        for sample in family.samples:
+            name = sample.name
+            if name == "disposition_token_usage_total":
+                name = f"{name}:{sample.labels.get('kind')}"
+            elif name not in wanted:
+                continue
+            totals[name] = totals.get(name, 0.0) + sample.value
+    return totals
+
+
+class Client:
+    """Sends one /predict request to a target; returns (status, meta or None)."""
+    def __init__(self, args):
+        self.args, self.model, self.http = args, None, None
+        if args.target == "http":
+            import httpx
+            self.http = httpx.AsyncClient(base_url=args.url, timeout=args.timeout)
+        else:
+            self.model = load_model(args)
+            if args.target == "app":
+                import httpx
+                transport = httpx.ASGITransport(app=load_app(self.model))
+                self.http = httpx.AsyncClient(transport=transport, base_url="http://load-test", timeout=args.timeout)
+
+    async def send(self, transcript, current_date=DATE, mode=None, priority="interactive", timeout_s=None):
+        mode, timeout_s = mode or self.args.mode, timeout_s or self.args.timeout
+        if self.http is None:
+            try:
+                _, meta = await self.model.predict_async(transcript, current_date, mode=mode,
+                                                         deadline=time.monotonic() + timeout_s, priority=priority)
+                return 200, meta
+            except Exception as e:
+                return type(e).__name__, None
+        try:
+            response = await self.http.post("/predict", json={"transcript": transcript, "current_date": current_date,
+                                                               "mode": mode, "priority": priority, "timeout_s": timeout_s})
+            return response.status_code, None
+        except Exception as e:
+            return type(e).__name__, None
+
+    async def metrics(self):
+        if self.http is None:
+            return {}
+        response = await self.http.get("/metrics")
+        return metric_totals(response.text)
+
+
+def percentiles(values):
+    if not values:
+        return {"p50": None, "p90": None, "p99": None}
+    if len(values) == 1:
+        return {"p50": values[0], "p90": values[0], "p99": values[0]}
+    q = statistics.quantiles(values, n=100, method="inclusive")
+    return {"p50": q[49], "p90": q[89], "p99": q[98]}
+
+
+async def run_rate(client, rate, languages, args, seed):
+    offsets = arrivals(rate, args.duration, random.Random(seed))
+    workload = make_workload(len(offsets), languages, args.median_turns, seed)
+    before = await client.metrics()
+    records = []
+
+    async def one(transcript):
+        started = time.perf_counter()
+        status, meta = await client.send(transcript)
+        records.append((status, time.perf_counter() - started, meta))
+
+    start = time.perf_counter()
+    tasks = []
+    for i, offset in enumerate(offsets):
+        delay = start + offset - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.ensure_future(one(workload[i])))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+    after = await client.metrics()
+
+    ok = [(latency, meta) for status, latency, meta in records if status == 200]
+    statuses = {}
+    for status, _, _ in records:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    latencies = sorted(latency for latency, _ in ok)
+    metas = [meta for _, meta in ok if meta]
+    if metas:
+        queue_waits = sorted(m["queue_wait_s"] for m in metas if "queue_wait_s" in m)
+        generated = sum(m.get("generated_tokens", 0) for m in metas)
+        prompt = sum(m.get("prompt_tokens", 0) for m in metas)
+        queue_wait = {"mean": statistics.mean(queue_waits) if queue_waits else None, **percentiles(queue_waits)}
+    else:
+        # HTTP targets: the server's own counters over the run
+        delta = {k: after.get(k, 0.0) - before.get(k, 0.0) for k in after}
+        count = delta.get("disposition_queue_wait_seconds_count", 0)
+        queue_wait = {"mean": delta["disposition_queue_wait_seconds_sum"] / count if count else None}
+        generated = delta.get("disposition_token_usage_total:generated", 0)
+        prompt = delta.get("disposition_token_usage_total:prompt", 0)
+    return {
+        "rate": rate,
+        "sent": len(records),
+        "offered_rps": len(records) / args.duration,
+        "throughput_rps": len(ok) / elapsed,
+        "statuses": statuses,
+        "latency_s": {"mean": statistics.mean(latencies) if latencies else None, **percentiles(latencies)},
+        "queue_wait_s": queue_wait,
+        "generated_tokens_per_s": generated / elapsed,
+        "prompt_tokens_per_s": prompt / elapsed,
+        "elapsed_s": elapsed,
+    }
+
+
+def fmt(seconds):
+    return f"{seconds:.3f}s" if seconds is not None else "-"
+
+
+def compare(report, baseline, tolerance):
+    """Latency percentiles that regressed beyond `tolerance` (a fraction) against the baseline."""
+    previous = {r["rate"]: r for r in baseline["results"]}
+    regressions = []
+    for result in report["results"]:
+        base = previous.get(result["rate"])
+        if base is None:
+            print(f"  rate {result['rate']}: not in the baseline, skipped")
+            continue
+        for key in ("p50", "p90", "p99"):
+            now, then = result["latency_s"][key], base["latency_s"][key]
+            if now is None or then is None:
+                continue
+            change = now / then - 1 if then else 0.0
+            flag = "REGRESSION" if change > tolerance else "ok"
+            print(f"  rate {result['rate']:>6} {key}: {then:.3f}s -> {now:.3f}s ({change:+.1%}) {flag}")
+            if change > tolerance:
+                regressions.append((result["rate"], key, then, now))
+    return regressions
+
+
+async def run(args):
+    client = Client(args)
+    languages = parse_weights(args.languages)
+    if args.warmup:
+        print(f"Warming up with {args.warmup} requests...")
+        await asyncio.gather(*(client.send(t) for t in make_workload(args.warmup, languages, args.median_turns, -1)))
+
+    results = []
+    for k, rate in enumerate(float(r) for r in args.rates.split(",")):
+        print(f"\nRate {rate:g} req/s for {args.duration:g}s...")
+        # Seeds differ per rate, so each rate sends transcripts the caches have not seen
+        result = await run_rate(client, rate, languages, args, args.seed * 1000 + k)
+        lat, qw = result["latency_s"], result["queue_wait_s"]
+        print(f"  sent {result['sent']} | ok {result['throughput_rps']:.2f} req/s | statuses {result['statuses']}")
+        print(f"  latency p50 {fmt(lat['p50'])} p90 {fmt(lat['p90'])} p99 {fmt(lat['p99'])} | queue wait mean {fmt(qw['mean'])}")
+        print(f"  generated {result['generated_tokens_per_s']:.1f} tok/s | prompt {result['prompt_tokens_per_s']:.1f} tok/s")
+        results.append(result)
+    if client.http is not None:
+        await client.http.aclose()
+    return results
+
+
+def add_target_args(parser):
+    """Arguments that pick and configure the Client's target (shared with replay.py)."""
+    parser.add_argument("--target", choices=("app", "model", "http"), default="app")
+    parser.add_argument("--url", default="http://localhost:8005", help="Server for --target http")
+    parser.add_argument("--stub", action="store_true", help="In-process targets: use the batching stub instead of a model")
+    parser.add_argument("--model-path", default=None, help="Local HF checkpoint to load with transformers instead of the production model")
+    parser.add_argument("--max-new-tokens", type=int, default=None, help="Cap generation length (useful on CPU); stub: tokens per response")
+    parser.add_argument("--mode", default="generate")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-request time budget (timeout_s)")
+
+
+def prepare_target(args):
+    if args.stub or args.model_path:
+        # No unsloth needed for the stub or a plain local checkpoint
+        os.environ.setdefault("INFERENCE_BACKEND", "transformers")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_target_args(parser)
+    parser.add_argument("--rates", default="1,2,4", help="Comma-separated arrival rates (requests/second), run in turn")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds of arrivals per rate")
+    parser.add_argument("--warmup", type=int, default=4, help="Requests sent before measuring")
+    parser.add_argument("--languages", default=DEFAULT_LANGUAGES, help="Language mix as name=weight pairs")
+    parser.add_argument("--median-turns", type=float, default=4.0, help="Median conversation turns per transcript")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Write the JSON report here")
+    parser.add_argument("--baseline", default=None, help="JSON report to compare against; exit 1 on latency regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed latency increase over the baseline (0.2 = 20%%)")
+    args = parser.parse_args()
+    prepare_target(args)
+
+    results = asyncio.run(run(args))
+    report = {
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "baseline", "tolerance")},
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        print(f"\nComparing against {args.baseline} (tolerance {args.tolerance:.0%}):")
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} latency regression(s).")
+            sys.exit(1)
+        print("No latency regressions.")
+
+
+if __name__ == "__main__":
+    main()
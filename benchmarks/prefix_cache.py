@@ -0,0 +1,72 @@
+"""Compare prefill time (time-to-first-token) with and without the shared-prefix KV cache.
+
+Usage:
+    python benchmarks/prefix_cache.py                      # production model (GPU)
+    python benchmarks/prefix_cache.py --model-path ./tiny  # any local HF checkpoint on CPU
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import torch
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "api")))
+
+from inference import DispositionModel
+from load_test import TRANSCRIPTS
+
+
+def load_model(model_path):
+    if not model_path:
+        return DispositionModel()
+    from transformers import AutoModelForCausalLM, AutoTokenizer
+    tokenizer = AutoTokenizer.from_pretrained(model_path)
+    model = AutoModelForCausalLM.from_pretrained(model_path).eval()
+    return DispositionModel(model=model, tokenizer=tokenizer, device="cpu")
+
+
+@torch.inference_mode()
+def time_prefill(dm, prepared, use_prefix_cache, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        inputs = dm.model_inputs(prepared, use_prefix_cache=use_prefix_cache)
+        if "past_key_values" in inputs:
+            # generate() skips the cached positions itself; a bare forward must be given only the suffix
+            inputs["input_ids"] = inputs["input_ids"][:, inputs["past_key_values"].get_seq_length():]
+        dm.model(**inputs, use_cache=True)
+        if torch.cuda.is_available():
+            torch.cuda.synchronize()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model-path", default=None, help="Local HF checkpoint to load with transformers instead of the production model")
+    parser.add_argument("--batch-sizes", default="1,4,8")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    dm = load_model(args.model_path)
+    if dm.prefix_cache is None:
+        print("Prefix cache is not available for this model (is PREFIX_CACHE=0?).")
+        return
+
+    prefix_len = dm.prefix_ids.shape[1]
+    print(f"\nPrefix: {prefix_len} tokens")
+    print(f"{'Batch':<6} | {'Full prefill':>13} | {'Prefix cache':>13} | {'Speedup':>8}")
+    print("-" * 50)
+    for bs in [int(b) for b in args.batch_sizes.split(",")]:
+        prepared = [dm._prepare(TRANSCRIPTS[i % len(TRANSCRIPTS)], "2026-02-27") for i in range(bs)]
+        time_prefill(dm, prepared, True, 1)  # warmup
+        full = time_prefill(dm, prepared, False, args.repeats)
+        cached = time_prefill(dm, prepared, True, args.repeats)
+        print(f"{bs:<6} | {full * 1000:>10.1f} ms | {cached * 1000:>10.1f} ms | {full / cached:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
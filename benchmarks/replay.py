@@ -0,0 +1,138 @@
+"""Replay captured /predict traffic (CAPTURE_SAMPLE_RATE, see api/capture.py) against an instance.
+
+Requests are re-sent with their captured transcript, date, mode, priority and
+timeout, either on their original schedule (--speed 1), compressed N times
+(--speed N) or as fast as --concurrency allows (--speed max). Latency and
+throughput are reported next to what production saw for the same requests, with
+the deltas.
+
+Usage:
+    python benchmarks/replay.py ~/.cache/disposition_model/capture --target http --url http://localhost:8005
+    python benchmarks/replay.py capture/ --speed 4 --stub            # in-process app, batching stub
+    python benchmarks/replay.py capture/ --speed max --concurrency 32 --output replay.json
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "api")))
+
+from capture import CAPTURE_DIR, read_capture
+from load_test import Client, add_target_args, fmt, percentiles, prepare_target
+
+
+def summarize(latencies, statuses, span_s):
+    ok = sorted(latencies)
+    return {
+        "requests": sum(statuses.values()),
+        "statuses": statuses,
+        "throughput_rps": len(ok) / span_s if span_s > 0 else None,
+        "latency_s": percentiles(ok),
+    }
+
+
+def count(statuses, status):
+    statuses[str(status)] = statuses.get(str(status), 0) + 1
+
+
+def request_date(record):
+    """The date the captured request ran with: its own, else the server's date on arrival."""
+    return record.get("current_date") or datetime.date.fromtimestamp(record["ts"]).isoformat()
+
+
+async def replay(client, records, speed, concurrency):
+    """Re-send `records`; returns (status, latency) per record and the wall time taken."""
+    results = [None] * len(records)
+    limit = asyncio.Semaphore(concurrency) if speed == "max" else None
+
+    async def one(i, record):
+        if limit is not None:
+            await limit.acquire()
+        started = time.perf_counter()
+        try:
+            status, _ = await client.send(record["transcript"], request_date(record),
+                                          mode=record.get("mode"), priority=record.get("priority", "interactive"),
+                                          timeout_s=record.get("timeout_s"))
+        finally:
+            if limit is not None:
+                limit.release()
+        results[i] = (status, time.perf_counter() - started)
+
+    start, first_ts = time.perf_counter(), records[0]["ts"]
+    tasks = []
+    for i, record in enumerate(records):
+        if speed != "max":
+            delay = start + (record["ts"] - first_ts) / speed - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        tasks.append(asyncio.ensure_future(one(i, record)))
+    await asyncio.gather(*tasks)
+    return results, time.perf_counter() - start
+
+
+async def run(args, records):
+    client = Client(args)
+    speed = "max" if args.speed == "max" else float(args.speed)
+    print(f"Replaying {len(records)} requests at {args.speed}{'x' if speed != 'max' else ''}...")
+    results, elapsed = await replay(client, records, speed, args.concurrency)
+    if client.http is not None:
+        await client.http.aclose()
+    return results, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="*", default=[CAPTURE_DIR], help="Capture directories or file globs")
+    add_target_args(parser)
+    parser.add_argument("--speed", default="1", help="1 = original schedule, N = N times faster, max = no gaps")
+    parser.add_argument("--concurrency", type=int, default=64, help="Requests in flight with --speed max")
+    parser.add_argument("--limit", type=int, default=None, help="Replay only the first N captured requests")
+    parser.add_argument("--output", default=None, help="Write the JSON report here")
+    args = parser.parse_args()
+    prepare_target(args)
+
+    records = read_capture(args.paths)[:args.limit]
+    if not records:
+        raise SystemExit(f"No captured requests in {', '.join(args.paths)}")
+    captured_span = records[-1]["ts"] - records[0]["ts"] + records[-1].get("latency_s", 0.0)
+    captured_statuses = {}
+    for record in records:
+        count(captured_statuses, record["status"])
+    captured = summarize([r["latency_s"] for r in records if r["status"] == 200], captured_statuses, captured_span)
+
+    results, elapsed = asyncio.run(run(args, records))
+    replay_statuses = {}
+    for status, _ in results:
+        count(replay_statuses, status)
+    replayed = summarize([latency for status, latency in results if status == 200], replay_statuses, elapsed)
+    # At N times the speed, matching production means N times its throughput
+    scale = 1.0 if args.speed == "max" else float(args.speed)
+
+    print(f"\n{'':14}{'captured':>12}{'replayed':>12}{'delta':>12}")
+    for key in ("p50", "p90", "p99"):
+        then, now = captured["latency_s"][key], replayed["latency_s"][key]
+        delta = f"{(now / then - 1):+.1%}" if then and now is not None else "-"
+        print(f"latency {key:6}{fmt(then):>12}{fmt(now):>12}{delta:>12}")
+    then, now = captured["throughput_rps"], replayed["throughput_rps"]
+    delta = f"{(now / (then * scale) - 1):+.1%}" if then and now is not None and args.speed != "max" else "-"
+    print(f"{'ok req/s':14}{then or 0:>12.2f}{now or 0:>12.2f}{delta:>12}")
+    print(f"statuses: captured {captured['statuses']} | replayed {replayed['statuses']}")
+
+    if args.output:
+        report = {
+            "config": {k: v for k, v in vars(args).items() if k != "output"},
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "captured": captured,
+            "replayed": replayed,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
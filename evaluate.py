@@ -0,0 +1,377 @@
+"""Multilingual evaluation against the gold labels in eval_datasets/ (replaces
+evaluate_multilingual.py and run_eval_verbose.py).
+
+Items are predicted either in-process in length-bucketed batches (--backend model,
+DispositionModel.predict_many) or through a running API with concurrent requests
+(--backend api). Every finished item is appended to a JSONL checkpoint with its gold
+and predicted fields, so an interrupted run picks up where it stopped; requests
+that failed (timeouts, 5xx) are recorded with their error and retried on the next
+run. Per-language and per-field accuracy and eval throughput are updated as items
+come in.
+
+Usage:
+    python evaluate.py --backend model                        # production model, in-process
+    python evaluate.py --backend api --concurrency 16         # running API at localhost:8005
+    python evaluate.py --backend api --checkpoint runs/v7.jsonl --summary runs/v7_summary.json
+    python evaluate.py --backend model --fit-temperature      # CLASSIFY_TEMPERATURE for mode=classify
+"""
+import argparse
+import glob
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "api")))
+
+EVAL_DIR = "eval_datasets"
+API_URL = "http://localhost:8005/predict"
+# Fixed so relative dates in the gold labels resolve the same way on every run
+EVAL_DATE = "2026-03-05"
+FIELDS = ("disposition", "payment", "reason", "amount", "date")
+PTP_LIKE = ("PTP", "PARTIAL_PAYMENT")
+# Candidate classify temperatures: log-spaced from 0.05 to 20
+TEMPERATURE_GRID = [0.05 * 400 ** (i / 199) for i in range(200)]
+
+
+def is_none(value):
+    return value is None or value == "None"
+
+
+def predicted_fields(result):
+    ptp = result.get("ptp_details") or {}
+    return {
+        "disp": result.get("disposition"),
+        "pay": result.get("payment_disposition"),
+        "reason": result.get("reason_for_not_paying"),
+        "amt": ptp.get("amount"),
+        "date": ptp.get("date"),
+    }
+
+
+def gold_fields(item):
+    return {
+        "disp": item.get("expected_disposition"),
+        "pay": item.get("expected_payment_disposition"),
+        "reason": item.get("expected_reason_for_not_paying"),
+        "amt": item.get("expected_amount"),
+        "date": item.get("expected_date"),
+    }
+
+
+def match_fields(pred, gold):
+    """Per-field correctness. PTP and PARTIAL_PAYMENT count as the same payment outcome,
+    None and "None" are equal, and dates only need to agree on being present (relative
+    dates in generated data are not pinned to a calendar day)."""
+    return {
+        "disposition": pred["disp"] == gold["disp"],
+        "payment": pred["pay"] == gold["pay"] or (pred["pay"] in PTP_LIKE and gold["pay"] in PTP_LIKE),
+        "reason": pred["reason"] == gold["reason"] or (is_none(pred["reason"]) and is_none(gold["reason"])),
+        "amount": str(pred["amt"]) == str(gold["amt"]) or (is_none(pred["amt"]) and is_none(gold["amt"])),
+        "date": is_none(pred["date"]) == is_none(gold["date"]),
+    }
+
+
+def load_items(paths):
+    """Gold items from *_test.json files (language from the file name) or JSONL files,
+    each with a stable id for the checkpoint."""
+    files = []
+    for path in paths:
+        files.extend(sorted(glob.glob(os.path.join(path, "*.json*"))) if os.path.isdir(path) else sorted(glob.glob(path)))
+    items = []
+    for file in files:
+        language = os.path.basename(file).split(".")[0].replace("_test", "")
+        with open(file, encoding="utf-8") as f:
+            data = [json.loads(line) for line in f if line.strip()] if file.endswith(".jsonl") else json.load(f)
+        for i, item in enumerate(data):
+            items.append({**item, "id": str(item.get("id", f"{language}_{i}")), "language": item.get("language", language)})
+    return items
+
+
+def read_checkpoint(path):
+    """Finished records by item id; records of failed requests are left out so they run again."""
+    done = {}
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # last line cut off by a crash
+            if "error" not in record:
+                done[record["id"]] = record
+    return done
+
+
+class Metrics:
+    """Running per-language, per-field accuracy and throughput."""
+    def __init__(self):
+        self.correct, self.total = {}, {}
+        self.errors = 0
+        self.invalid = 0
+        self.started = time.perf_counter()
+        self.run_items = 0
+
+    def add(self, record, resumed=False):
+        if not resumed:
+            self.run_items += 1
+        if "error" in record:
+            self.errors += 1
+            return
+        self.invalid += record.get("invalid_output", False)
+        for language in (record["language"], "ALL"):
+            self.total[language] = self.total.get(language, 0) + 1
+            counts = self.correct.setdefault(language, dict.fromkeys(FIELDS, 0))
+            for field, ok in record["matches"].items():
+                counts[field] += ok
+
+    def accuracy(self, language):
+        total = self.total.get(language, 0)
+        acc = {field: 100.0 * n / total if total else 0.0 for field, n in self.correct.get(language, {}).items()}
+        return acc, sum(acc.values()) / len(FIELDS) if acc else 0.0
+
+    def throughput(self):
+        return self.run_items / max(1e-9, time.perf_counter() - self.started)
+
+    def progress(self, done, total):
+        _, overall = self.accuracy("ALL")
+        return (f"  {done}/{total} items | {self.throughput():.2f} items/s | overall {overall:.1f}% "
+                f"| {self.errors} failed requests")
+
+    def summary(self):
+        languages = sorted((l for l in self.total if l != "ALL"), key=lambda l: self.accuracy(l)[1])
+        return {
+            "items": self.total.get("ALL", 0),
+            "failed_requests": self.errors,
+            "invalid_outputs": self.invalid,
+            "items_per_s": self.throughput(),
+            "languages": {l: {"items": self.total[l], "metrics": self.accuracy(l)[0], "overall_accuracy": self.accuracy(l)[1]}
+                          for l in languages + ["ALL"] if l in self.total},
+        }
+
+
+def make_record(item, result, elapsed_s):
+    gold = gold_fields(item)
+    record = {"id": item["id"], "language": item["language"], "transcript": item["transcript"], "gold": gold, "latency_s": elapsed_s}
+    if "error" in result and "raw" in result:
+        # The model answered but not with valid JSON: a wrong prediction, not a failed request
+        record["invalid_output"] = True
+    pred = predicted_fields(result)
+    matches = match_fields(pred, gold)
+    record.update(predicted=pred, matches=matches, is_exact_match=all(matches.values()), remarks=result.get("remarks"))
+    return record
+
+
+def print_mismatch(record):
+    gold, pred, m = record["gold"], record["predicted"], record["matches"]
+    print(f"❌ MISMATCH [{record['language']}]: {record['transcript'][:50]}...")
+    if not m["disposition"] or not m["payment"]:
+        print(f"   Exp: Disp={gold['disp']}, Pay={gold['pay']}")
+        print(f"   Got: Disp={pred['disp']}, Pay={pred['pay']}")
+    if not m["reason"]:
+        print(f"   Exp Reason: {gold['reason']} | Got: {pred['reason']}")
+    if not m["amount"] or not m["date"]:
+        print(f"   Exp PTP: {gold['amt']}, {gold['date']} | Got: {pred['amt']}, {pred['date']}")
+
+
+def load_model(args):
+    from inference import DispositionModel, get_model
+    return DispositionModel(model_path=args.model_path) if args.model_path else get_model()
+
+
+def run_model(items, args):
+    """Yield records, predicting --batch-rows items per predict_many() call."""
+    model = load_model(args)
+    if args.model_only:
+        # Score the model itself, not the prediction cache, near-duplicate reuse or rules
+        model.cache, model.near_dups, model.rules = None, None, None
+    for start in range(0, len(items), args.batch_rows):
+        chunk = items[start:start + args.batch_rows]
+        began = time.perf_counter()
+        results, _ = model.predict_many([item["transcript"] for item in chunk], current_date=args.date, mode=args.mode)
+        # Batched: the chunk's wall time is spread over its items
+        per_item = (time.perf_counter() - began) / len(chunk)
+        for item, result in zip(chunk, results):
+            yield make_record(item, result, per_item)
+
+
+def post_item(session, item, args):
+    """One item through the API, retrying refusals and transient failures; a record either way."""
+    payload = {"transcript": item["transcript"], "current_date": args.date, "mode": args.mode, "timeout_s": args.timeout}
+    began = time.perf_counter()
+    error = None
+    for attempt in range(args.retries + 1):
+        try:
+            response = session.post(args.url, json=payload, timeout=args.timeout + 5)
+            if response.status_code == 200:
+                return make_record(item, response.json(), time.perf_counter() - began)
+            if response.status_code == 500 and "valid JSON" in response.text:
+                return make_record(item, {"error": response.text, "raw": ""}, time.perf_counter() - began)
+            error = f"HTTP {response.status_code}: {response.text[:200]}"
+            wait = float(response.headers.get("Retry-After", 2 ** attempt))
+        except Exception as e:
+            error, wait = f"{type(e).__name__}: {e}", 2 ** attempt
+        if attempt < args.retries:
+            time.sleep(wait)
+    return {"id": item["id"], "language": item["language"], "error": error}
+
+
+def run_api(items, args):
+    """Yield records as they complete, with --concurrency requests in flight."""
+    import requests
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=args.concurrency, pool_maxsize=args.concurrency)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        futures = [pool.submit(post_item, session, item, args) for item in items]
+        for fut in as_completed(futures):
+            yield fut.result()
+
+
+def log_softmax(scores, temperature):
+    scaled = {label: score / temperature for label, score in scores.items()}
+    top = max(scaled.values())
+    norm = top + math.log(sum(math.exp(v - top) for v in scaled.values()))
+    return {label: v - norm for label, v in scaled.items()}
+
+
+def calibration(examples, temperature):
+    """Mean negative log-likelihood of the gold labels, and the mean confidence and
+    accuracy of the chosen (disposition, payment) pair, with scores scaled by `temperature`.
+
+    `examples` are (label_scores() entry, gold disposition, gold payment) triples."""
+    nll = confidence = correct = 0.0
+    for scores, disp, pay in examples:
+        d, p = log_softmax(scores["disposition"], temperature), log_softmax(scores["payment_disposition"], temperature)
+        nll -= d[disp] + p[pay]
+        best_d, best_p = max(d, key=d.get), max(p, key=p.get)
+        confidence += math.exp(d[best_d] + p[best_p])
+        correct += best_d == disp and best_p == pay
+    n = max(1, len(examples))
+    return nll / n, confidence / n, correct / n
+
+
+def fit_temperature(examples, grid=TEMPERATURE_GRID):
+    """The grid temperature with the lowest mean NLL of the gold labels."""
+    return min(grid, key=lambda t: calibration(examples, t)[0])
+
+
+def run_fit_temperature(items, args):
+    """Fit CLASSIFY_TEMPERATURE on the gold disposition / payment labels of `items`."""
+    from inference import CALL_LABELS, CLASSIFY_PAY_LABELS
+    model = load_model(args)
+    examples, skipped = [], 0
+    for start in range(0, len(items), args.batch_rows):
+        chunk = items[start:start + args.batch_rows]
+        scores = model.label_scores([item["transcript"] for item in chunk], current_date=args.date)
+        for item, row in zip(chunk, scores):
+            gold = gold_fields(item)
+            pay = "None" if is_none(gold["pay"]) else gold["pay"]
+            if gold["disp"] in CALL_LABELS and pay in CLASSIFY_PAY_LABELS:
+                examples.append((row, gold["disp"], pay))
+            else:
+                skipped += 1
+        print(f"  {len(examples) + skipped}/{len(items)} items scored")
+    if not examples:
+        print("No items with classify labels to fit on.")
+        return None
+
+    best = fit_temperature(examples)
+    report = {"items": len(examples), "skipped": skipped, "classify_temperature": round(best, 3)}
+    for name, t in (("unscaled", 1.0), ("fitted", best)):
+        nll, confidence, accuracy = calibration(examples, t)
+        report[name] = {"nll": nll, "mean_confidence": confidence, "pair_accuracy": accuracy}
+        print(f"T={t:<6.3f} NLL {nll:.4f} | mean confidence {confidence:.3f} | pair accuracy {accuracy:.3f}")
+    print(f"\nSet CLASSIFY_TEMPERATURE={report['classify_temperature']} ({len(examples)} items, {skipped} without classify labels)")
+    return report
+
+
+def print_table(summary):
+    print("\n=========================================================")
+    print(" COMPLEX MULTILINGUAL EVALUATION RESULTS ")
+    print("=========================================================\n")
+    print(f"{'Language':<10} | {'Disp':<6} | {'Pay':<6} | {'Reason':<6} | {'Amt':<6} | {'Date':<6} | {'Overall':<6} | {'Items':<5}")
+    print("-" * 73)
+    for language, r in summary["languages"].items():
+        m = r["metrics"]
+        print(f"{language.capitalize():<10} | {m['disposition']:>5.0f}% | {m['payment']:>5.0f}% | {m['reason']:>5.0f}% | "
+              f"{m['amount']:>5.0f}% | {m['date']:>5.0f}% | {r['overall_accuracy']:>5.0f}% | {r['items']:>5}")
+    print(f"\n{summary['items']} items scored, {summary['invalid_outputs']} invalid model outputs, "
+          f"{summary['failed_requests']} failed requests (rerun to retry them)")
+    print(f"Throughput this run: {summary['items_per_s']:.2f} items/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("datasets", nargs="*", default=[EVAL_DIR], help="Dataset directories or file globs")
+    parser.add_argument("--backend", choices=("model", "api"), default="api")
+    parser.add_argument("--url", default=API_URL)
+    parser.add_argument("--model-path", default=None, help="--backend model: checkpoint to load instead of QWEN_MODEL")
+    parser.add_argument("--model-only", action="store_true", help="--backend model: bypass the prediction cache, near-duplicates and rules")
+    parser.add_argument("--mode", default="generate")
+    parser.add_argument("--date", default=EVAL_DATE)
+    parser.add_argument("--concurrency", type=int, default=8, help="--backend api: requests in flight")
+    parser.add_argument("--timeout", type=float, default=120.0, help="--backend api: per-request time budget (s)")
+    parser.add_argument("--retries", type=int, default=2, help="--backend api: retries after a failed request")
+    parser.add_argument("--batch-rows", type=int, default=256, help="--backend model: items per predict_many() call")
+    parser.add_argument("--checkpoint", default="eval_checkpoint.jsonl", help="Per-item results (JSONL); resumed from if it exists")
+    parser.add_argument("--fresh", action="store_true", help="Ignore and overwrite an existing checkpoint")
+    parser.add_argument("--summary", default=None, help="Write the metrics as JSON here")
+    parser.add_argument("--limit", type=int, default=None, help="Evaluate only the first N items")
+    parser.add_argument("--verbose", action="store_true", help="Print every mismatch")
+    parser.add_argument("--fit-temperature", action="store_true",
+                        help="--backend model: fit CLASSIFY_TEMPERATURE on the gold labels instead of scoring")
+    args = parser.parse_args()
+
+    items = load_items(args.datasets)[:args.limit]
+    if not items:
+        print(f"No eval items found in {', '.join(args.datasets)}.")
+        return
+    if args.fit_temperature:
+        if args.backend != "model":
+            parser.error("--fit-temperature needs --backend model")
+        report = run_fit_temperature(items, args)
+        if report and args.summary:
+            with open(args.summary, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+            print(f"Summary written to {args.summary}")
+        return
+    if args.fresh and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+    done = read_checkpoint(args.checkpoint)
+    wanted = {item["id"] for item in items}
+    metrics = Metrics()
+    for record in done.values():
+        if record["id"] in wanted:
+            metrics.add(record, resumed=True)
+    pending = [item for item in items if item["id"] not in done]
+    print(f"Evaluating {len(items)} items ({len(items) - len(pending)} already in {args.checkpoint}) via {args.backend}...")
+
+    run = run_model if args.backend == "model" else run_api
+    finished, last_report = len(items) - len(pending), time.perf_counter()
+    with open(args.checkpoint, "a", encoding="utf-8") as checkpoint:
+        for record in run(pending, args):
+            checkpoint.write(json.dumps(record, ensure_ascii=False) + "\n")
+            checkpoint.flush()
+            metrics.add(record)
+            finished += 1
+            if args.verbose and "matches" in record and not record["is_exact_match"]:
+                print_mismatch(record)
+            if time.perf_counter() - last_report >= 10 or finished == len(items):
+                print(metrics.progress(finished, len(items)))
+                last_report = time.perf_counter()
+
+    summary = metrics.summary()
+    print_table(summary)
+    if args.summary:
+        with open(args.summary, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        print(f"Summary written to {args.summary}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Export the model as a local safetensors snapshot for fast API restarts.
+
+Loads QWEN_MODEL (or --model) with the configured INFERENCE_BACKEND, merges LoRA
+adapters into the weights and saves model and tokenizer to --out. The tokenizer
+artifacts the API builds at startup (stop criterion and grammar tables, see
+api/artifacts.py) are built here too, so the first start finds them cached. Point the
+API at the snapshot with MODEL_SNAPSHOT_DIR; it is only used while QWEN_MODEL still
+names the model it was exported from.
+
+Usage:
+    python export_snapshot.py                                    # QWEN_MODEL -> ~/.cache/disposition_model/snapshot
+    MODEL_SNAPSHOT_DIR=~/.cache/disposition_model/snapshot python api/app.py
+    INFERENCE_BACKEND=transformers python export_snapshot.py --model ./checkpoint --out ./snapshot
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "api")))
+
+from backends import MODEL_SNAPSHOT_DIR, get_backend
+
+DEFAULT_OUT = MODEL_SNAPSHOT_DIR or os.path.expanduser("~/.cache/disposition_model/snapshot")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=None, help="Model to export (default: QWEN_MODEL)")
+    parser.add_argument("--out", default=DEFAULT_OUT, help="Snapshot directory")
+    args = parser.parse_args()
+
+    # Imported after the path setup; inference pulls in unsloth first when that is the backend
+    from inference import CALL_LABELS, MAX_SEQ_LEN, MODEL_PATH, PAY_LABELS, REASON_LABELS, StopOnJson
+    from grammar import GrammarLogitsProcessor, disposition_grammar
+    from transformers import AutoTokenizer
+
+    source = args.model or MODEL_PATH
+    backend = get_backend()
+    print(f"Loading {source} ({backend.name} backend)...")
+    started = time.perf_counter()
+    backend.load(source, MAX_SEQ_LEN)
+    print(f"Loaded in {time.perf_counter() - started:.1f}s; writing snapshot to {args.out}...")
+    started = time.perf_counter()
+    backend.save_snapshot(args.out, source)
+    print(f"Saved in {time.perf_counter() - started:.1f}s")
+
+    # Build the artifacts from the tokenizer as the API will load it from the snapshot
+    tokenizer = AutoTokenizer.from_pretrained(args.out)
+    StopOnJson(tokenizer)
+    GrammarLogitsProcessor(disposition_grammar(CALL_LABELS, PAY_LABELS, REASON_LABELS), tokenizer)
+    size_gb = sum(os.path.getsize(os.path.join(args.out, f)) for f in os.listdir(args.out)) / 1e9
+    print(f"✅ Snapshot of {source} in {args.out} ({size_gb:.1f} GB); start the API with MODEL_SNAPSHOT_DIR={args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""Sharded synthetic call corpus for soak tests (/upload, caches) and large eval sets.
+
+Rows are built from the per-language templates in generate_multilingual_datasets.py
+and carry the same expected_* gold fields, so a corpus can be scored by evaluate.py
+as well as uploaded. On top of the templates:
+
+- scenario mix (--scenarios) and language mix (--languages) by weight
+- call length: log-normal filler turns before the deciding exchange, plus a share
+  of long calls (--long-call-rate) with hundreds of turns
+- code-mixed rows: the agent speaks English or Hinglish, the borrower answers in
+  the row's language
+- exact duplicates and near-duplicates (same call with ASR noise, filler words or
+  casing changed) of earlier rows, at --duplicate-rate / --near-duplicate-rate
+
+Each shard is written by one process from its own RNG seeded with (--seed, shard),
+so a corpus is the same whatever --workers is. Rows are streamed to disk; a process
+only holds its row group and a bounded pool of earlier rows to duplicate.
+
+Usage:
+    python generate_corpus.py --rows 1000000 --shards 16 --workers 8 --out corpus/
+    python generate_corpus.py --rows 50000 --format parquet --long-call-rate 0.05 --out corpus_pq/
+"""
+import argparse
+import gzip
+import json
+import math
+import os
+import random
+import time
+from datetime import date, timedelta
+from multiprocessing import Pool
+
+from generate_multilingual_datasets import AMOUNTS, LANGUAGES, SCENARIO_LABELS, SCENARIO_WEIGHTS, TEMPLATES
+
+# Turns that don't change a call's outcome: greetings, verification, hold, noise
+FILLER_TURNS = [
+    "Agent: Hello, am I audible? Borrower: Haan, boliye.",
+    "Agent: This call is recorded for quality and training purposes.",
+    "Agent: Sir, I am calling from the loan recovery department. Borrower: Ji, bataiye.",
+    "Agent: Hello? Hello? Borrower: Haan haan, sun raha hoon.",
+    "Agent: Can you confirm your date of birth for verification? Borrower: Haan, ek minute.",
+    "Agent: Please hold the line for a moment. Borrower: Okay.",
+    "[background noise]",
+    "Agent: Kya aap abhi baat kar sakte hain? Borrower: Haan, boliye.",
+    "Agent: Network thoda weak hai, aap sun pa rahe ho? Borrower: Haan, ab aawaz aa rahi hai.",
+    "Borrower: Hello? Agent: Ji sir, main loan ke baare mein call kar raha hoon.",
+]
+# Agent openings for code-mixed rows, per scenario
+CODE_MIX_AGENTS = {
+    "PTP": ["Agent: Sir aapki EMI pending hai, payment kab tak karenge?", "Agent: Hello, when can we expect the payment?"],
+    "PAID": ["Agent: Sir aapka loan amount abhi bhi pending dikha raha hai.", "Agent: Your EMI is due, sir."],
+    "WRONG_NUMBER": ["Agent: Kya main Rahul ji se baat kar raha hoon?", "Agent: Am I speaking to Rahul?"],
+    "DENIED": ["Agent: Sir please apni dues clear kar dijiye.", "Agent: Sir, please pay your dues."],
+    "VISIT": ["Agent: Payment kaise karenge aap?", "Agent: How will you pay?"],
+}
+NOISE_WORDS = ["umm", "haan", "acha", "hello?", "[inaudible]", "uh"]
+# Earlier rows kept per shard as duplicate sources (bounds memory)
+DUPLICATE_POOL = 2000
+
+
+def parse_weights(spec, allowed, name):
+    weights = {}
+    for part in spec.split(","):
+        key, _, weight = part.partition("=")
+        if key not in allowed:
+            raise SystemExit(f"Unknown {name} {key!r}; expected one of {', '.join(allowed)}")
+        weights[key] = float(weight or 1)
+    return weights
+
+
+def perturb(transcript, rng):
+    """A near-duplicate: the same call with ASR noise, filler words or casing changed."""
+    words = transcript.split(" ")
+    for _ in range(rng.randint(1, 3)):
+        edit = rng.random()
+        if edit < 0.5:
+            words.insert(rng.randrange(len(words) + 1), rng.choice(NOISE_WORDS))
+        elif edit < 0.8 and len(words) > 1:
+            i = rng.randrange(len(words))
+            words[i] = words[i].lower() if words[i] != words[i].lower() else words[i].upper()
+        else:
+            words.append(rng.choice(NOISE_WORDS))
+    return " ".join(words)
+
+
+class RowGenerator:
+    """Rows of one shard; deterministic given (seed, shard)."""
+    def __init__(self, args, shard):
+        self.args = args
+        self.shard = shard
+        self.rng = random.Random(f"{args.seed}-{shard}")
+        self.scenarios = parse_weights(args.scenarios, SCENARIO_LABELS, "scenario")
+        self.languages = parse_weights(args.languages, LANGUAGES, "language")
+        self.base_date = date.fromisoformat(args.base_date)
+        self.pool = []
+
+    def _filler_turns(self):
+        rng, args = self.rng, self.args
+        if rng.random() < args.long_call_rate:
+            return rng.randint(args.long_call_turns // 2, args.long_call_turns)
+        return min(args.long_call_turns, int(rng.lognormvariate(math.log(max(1.0, args.median_turns)), args.turn_sigma)))
+
+    def _fresh(self, row_id):
+        rng = self.rng
+        scenario = rng.choices(list(self.scenarios), list(self.scenarios.values()))[0]
+        language = rng.choices(list(self.languages), list(self.languages.values()))[0]
+        amount = rng.choice(AMOUNTS)
+        ptp_date = str(self.base_date + timedelta(days=rng.randint(5, 23)))
+        deciding = TEMPLATES.get(language, TEMPLATES["english"])[scenario].replace("{amount}", str(amount)).replace("{date}", ptp_date)
+        code_mixed = language != "english" and rng.random() < self.args.code_mix_rate
+        if code_mixed:
+            # English / Hinglish agent, borrower answering in the row's language
+            deciding = rng.choice(CODE_MIX_AGENTS[scenario]) + " Borrower:" + deciding.split("Borrower:", 1)[1]
+        turns = [rng.choice(FILLER_TURNS) for _ in range(self._filler_turns())]
+        disposition, payment, reason = SCENARIO_LABELS[scenario]
+        return {
+            "id": f"corpus_{row_id}",
+            "language": language,
+            "scenario": scenario,
+            "code_mixed": code_mixed,
+            "turns": len(turns) + 1,
+            "transcript": " ".join(turns + [deciding]),
+            "expected_disposition": disposition,
+            "expected_payment_disposition": payment,
+            "expected_reason_for_not_paying": reason,
+            "expected_amount": amount if scenario == "PTP" else None,
+            "expected_date": ptp_date if scenario == "PTP" else None,
+            "duplicate_of": None,
+            "near_duplicate_of": None,
+        }
+
+    def row(self, row_id):
+        rng, args = self.rng, self.args
+        r = rng.random()
+        if self.pool and r < args.duplicate_rate + args.near_duplicate_rate:
+            source = rng.choice(self.pool)
+            row = {**source, "id": f"corpus_{row_id}", "duplicate_of": source["id"], "near_duplicate_of": None}
+            if r >= args.duplicate_rate:
+                row.update(transcript=perturb(source["transcript"], rng), duplicate_of=None, near_duplicate_of=source["id"])
+            return row
+        row = self._fresh(row_id)
+        if len(self.pool) < DUPLICATE_POOL:
+            self.pool.append(row)
+        else:
+            self.pool[rng.randrange(DUPLICATE_POOL)] = row
+        return row
+
+
+class JsonlWriter:
+    def __init__(self, path, compress):
+        self.f = gzip.open(path, "wt", encoding="utf-8") if compress else open(path, "w", encoding="utf-8")
+
+    def write(self, rows):
+        self.f.writelines(json.dumps(row, ensure_ascii=False) + "\n" for row in rows)
+
+    def close(self):
+        self.f.close()
+
+
+class ParquetWriter:
+    def __init__(self, path, compress):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("--format parquet needs pyarrow (pip install pyarrow)")
+        self.pa, self.pq, self.path = pa, pq, path
+        self.compression = "zstd" if compress else "snappy"
+        self.writer = None
+
+    def write(self, rows):
+        table = self.pa.Table.from_pylist(rows)
+        if self.writer is None:
+            self.writer = self.pq.ParquetWriter(self.path, table.schema, compression=self.compression)
+        self.writer.write_table(table.cast(self.writer.schema))
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def shard_rows(args, shard):
+    """Row ids [start, end) of a shard; the remainder goes to the first shards."""
+    base, extra = divmod(args.rows, args.shards)
+    start = shard * base + min(shard, extra)
+    return start, start + base + (shard < extra)
+
+
+def write_shard(task):
+    args, shard = task
+    start, end = shard_rows(args, shard)
+    suffix = {"jsonl": ".jsonl.gz" if args.compress else ".jsonl", "parquet": ".parquet"}[args.format]
+    path = os.path.join(args.out, f"corpus-{shard:05d}-of-{args.shards:05d}{suffix}")
+    writer = (ParquetWriter if args.format == "parquet" else JsonlWriter)(path, args.compress)
+    generator = RowGenerator(args, shard)
+    began = time.perf_counter()
+    for group_start in range(start, end, args.row_group):
+        writer.write([generator.row(i) for i in range(group_start, min(end, group_start + args.row_group))])
+    writer.close()
+    return {"shard": shard, "path": os.path.basename(path), "rows": end - start, "bytes": os.path.getsize(path),
+            "seconds": time.perf_counter() - began}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--shards", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Processes writing shards")
+    parser.add_argument("--out", default="corpus")
+    parser.add_argument("--format", choices=("jsonl", "parquet"), default="jsonl")
+    parser.add_argument("--compress", action="store_true", help="gzip JSONL shards / zstd Parquet (default: plain / snappy)")
+    parser.add_argument("--row-group", type=int, default=10000, help="Rows generated and written at a time")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--scenarios", default=",".join(f"{k}={v}" for k, v in SCENARIO_WEIGHTS.items()))
+    parser.add_argument("--languages", default=",".join(LANGUAGES), help="name=weight pairs (weight defaults to 1)")
+    parser.add_argument("--median-turns", type=float, default=4, help="Median filler turns before the deciding exchange")
+    parser.add_argument("--turn-sigma", type=float, default=0.8, help="Spread of the log-normal turn count")
+    parser.add_argument("--long-call-rate", type=float, default=0.02, help="Share of calls with up to --long-call-turns turns")
+    parser.add_argument("--long-call-turns", type=int, default=300)
+    parser.add_argument("--code-mix-rate", type=float, default=0.3, help="Share of non-English rows with an English / Hinglish agent")
+    parser.add_argument("--duplicate-rate", type=float, default=0.05, help="Share of rows repeating an earlier row exactly")
+    parser.add_argument("--near-duplicate-rate", type=float, default=0.05, help="Share of rows repeating an earlier row with small edits")
+    parser.add_argument("--base-date", default="2026-03-05", help="Promise-to-pay dates fall 5-23 days after this")
+    args = parser.parse_args()
+    if args.duplicate_rate + args.near_duplicate_rate > 1:
+        raise SystemExit("--duplicate-rate plus --near-duplicate-rate must be at most 1")
+
+    os.makedirs(args.out, exist_ok=True)
+    print(f"Generating {args.rows} rows in {args.shards} {args.format} shards with {args.workers} workers -> {args.out}")
+    began = time.perf_counter()
+    shards = []
+    with Pool(min(args.workers, args.shards)) as pool:
+        for info in pool.imap_unordered(write_shard, [(args, shard) for shard in range(args.shards)]):
+            shards.append(info)
+            print(f"  shard {info['shard']:>5}: {info['rows']} rows, {info['bytes'] / 1e6:.1f} MB, "
+                  f"{info['rows'] / max(1e-9, info['seconds']):,.0f} rows/s")
+    elapsed = time.perf_counter() - began
+
+    manifest = {
+        "config": vars(args),
+        "shards": sorted(shards, key=lambda s: s["shard"]),
+        "rows": args.rows,
+        "bytes": sum(s["bytes"] for s in shards),
+        "seconds": elapsed,
+        "rows_per_s": args.rows / elapsed,
+    }
+    with open(os.path.join(args.out, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    print(f"✅ {args.rows} rows, {manifest['bytes'] / 1e6:.1f} MB in {elapsed:.1f}s ({manifest['rows_per_s']:,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
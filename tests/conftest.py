@@ -0,0 +1,50 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(ROOT, "api"))
+sys.path.insert(0, ROOT)
+
+# Tests run on CPU without unsloth; tokenizer artifacts go to a throwaway directory
+os.environ.setdefault("INFERENCE_BACKEND", "transformers")
+os.environ["ARTIFACT_CACHE_DIR"] = tempfile.mkdtemp(prefix="disposition-artifacts-")
+
+
+@pytest.fixture(scope="session")
+def tiny_lm():
+    """A randomly initialised 2-layer Qwen2 and a small BPE tokenizer trained on the prompt text."""
+    import torch
+    from tokenizers import Tokenizer, decoders, models, pre_tokenizers, trainers
+    from transformers import PreTrainedTokenizerFast, Qwen2Config, Qwen2ForCausalLM
+
+    with open(os.path.join(ROOT, "api", "inference.py"), encoding="utf-8") as f:
+        text = f.read()
+    with open(os.path.join(ROOT, "generate_multilingual_datasets.py"), encoding="utf-8") as f:
+        text += f.read()
+    tok = Tokenizer(models.BPE())
+    tok.pre_tokenizer = pre_tokenizers.ByteLevel(add_prefix_space=False)
+    tok.decoder = decoders.ByteLevel()
+    trainer = trainers.BpeTrainer(vocab_size=2000, special_tokens=["<|endoftext|>"],
+                                  initial_alphabet=pre_tokenizers.ByteLevel.alphabet())
+    tok.train_from_iterator([text], trainer)
+    tokenizer = PreTrainedTokenizerFast(tokenizer_object=tok, eos_token="<|endoftext|>", pad_token="<|endoftext|>")
+
+    torch.manual_seed(0)
+    config = Qwen2Config(vocab_size=len(tokenizer), hidden_size=64, intermediate_size=128, num_hidden_layers=2,
+                         num_attention_heads=4, num_key_value_heads=2, max_position_embeddings=16384,
+                         eos_token_id=tokenizer.eos_token_id, pad_token_id=tokenizer.eos_token_id)
+    return Qwen2ForCausalLM(config).eval(), tokenizer
+
+
+@pytest.fixture
+def tiny_model(tiny_lm, monkeypatch):
+    """DispositionModel on the tiny LM with short generations and no caches or rules."""
+    import inference
+    monkeypatch.setattr(inference, "MAX_NEW_TOKENS", 24)
+    model, tokenizer = tiny_lm
+    dm = inference.DispositionModel(model=model, tokenizer=tokenizer, device="cpu")
+    dm.cache, dm.near_dups, dm.rules = None, None, None
+    return dm
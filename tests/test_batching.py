@@ -0,0 +1,92 @@
+import threading
+import time
+
+from batching import MicroBatcher
+
+DATE = "2026-03-05"
+TRANSCRIPTS = [
+    "Agent: Hello, am I speaking to Rahul? Borrower: No, wrong number.",
+    "Agent: When will you pay your EMI? Borrower: I will pay 5000 rupees tomorrow, and the rest next week after my salary.",
+    "Agent: Your EMI is due. Borrower: Paid.",
+]
+
+
+class RecordingBatchFn:
+    """Stub batch_fn: echoes items and records the size of every batch it ran."""
+    def __init__(self, delay_s=0.0):
+        self.delay_s = delay_s
+        self.sizes = []
+
+    def __call__(self, items):
+        self.sizes.append(len(items))
+        time.sleep(self.delay_s)
+        return [f"out:{item}" for item in items]
+
+
+def test_batched_output_matches_single_rows(tiny_model):
+    # Left padding must not change what any row generates
+    singles = [tiny_model.predict_batch([(t, DATE)])[0] for t in TRANSCRIPTS]
+    batched = tiny_model.predict_batch([(t, DATE) for t in TRANSCRIPTS])
+    assert batched == singles
+
+
+def test_concurrent_predictions_share_a_batch(tiny_model):
+    results = [None] * len(TRANSCRIPTS)
+
+    def call(i):
+        results[i] = tiny_model.predict_with_meta(TRANSCRIPTS[i], DATE)
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(len(TRANSCRIPTS))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    singles = [tiny_model.predict_batch([(t, DATE)])[0] for t in TRANSCRIPTS]
+    assert [r for r, _ in results] == singles
+    assert max(meta["batch_size"] for _, meta in results) > 1
+
+
+def test_packed_rows_are_prepared_once(tiny_model, monkeypatch):
+    singles = [tiny_model.predict_batch([(t, DATE)])[0] for t in TRANSCRIPTS]
+    calls = []
+    prepare = tiny_model._prepare_with_stats
+    monkeypatch.setattr(tiny_model, "_prepare_with_stats", lambda t, d=None: calls.append(t) or prepare(t, d))
+    results, metas = tiny_model.predict_many(TRANSCRIPTS, current_date=DATE)
+    assert sorted(calls) == sorted(TRANSCRIPTS)
+    assert all(meta["tokenize_s"] > 0 and "transcript_tokens_out" in meta for meta in metas)
+    assert results == singles
+
+
+def test_flushes_when_max_batch_size_is_reached():
+    fn = RecordingBatchFn()
+    batcher = MicroBatcher(fn, max_batch_size=4, window_ms=5000)
+    started = time.monotonic()
+    futures = [batcher.submit(i) for i in range(8)]
+    assert [f.result(timeout=2) for f in futures] == [f"out:{i}" for i in range(8)]
+    # Full batches do not wait out the 5 s window
+    assert time.monotonic() - started < 2
+    assert fn.sizes == [4, 4]
+    assert all(f.batch_size == 4 for f in futures)
+
+
+def test_flushes_when_window_closes():
+    fn = RecordingBatchFn()
+    batcher = MicroBatcher(fn, max_batch_size=8, window_ms=100)
+    started = time.monotonic()
+    futures = [batcher.submit(i) for i in range(3)]
+    assert [f.result(timeout=2) for f in futures] == ["out:0", "out:1", "out:2"]
+    waited = time.monotonic() - started
+    assert 0.09 <= waited < 1.5
+    assert fn.sizes == [3]
+    assert futures[0].queue_wait >= 0.09
+
+
+def test_items_arriving_after_the_window_go_to_the_next_batch():
+    fn = RecordingBatchFn(delay_s=0.2)
+    batcher = MicroBatcher(fn, max_batch_size=8, window_ms=20)
+    first = batcher.submit("a")
+    time.sleep(0.1)  # first batch is running by now
+    second = [batcher.submit(x) for x in ("b", "c")]
+    assert first.result(timeout=2) == "out:a"
+    assert [f.result(timeout=2) for f in second] == ["out:b", "out:c"]
+    assert fn.sizes == [1, 2]
@@ -0,0 +1,95 @@
+import asyncio
+import threading
+import time
+
+from cache import PredictionCache
+
+
+def test_cancelled_follower_does_not_cancel_the_others():
+    cache = PredictionCache()
+    release = asyncio.Event()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await release.wait()
+        return {"disposition": "ANSWERED"}
+
+    async def main():
+        leader = asyncio.create_task(cache.get_or_compute_async("k", compute))
+        await asyncio.sleep(0)
+        followers = [asyncio.create_task(cache.get_or_compute_async("k", compute)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        followers[0].cancel()  # e.g. its client disconnected
+        await asyncio.sleep(0.01)
+        release.set()
+        return await leader, await asyncio.gather(*followers, return_exceptions=True)
+
+    (value, status), followers = asyncio.run(main())
+    assert (value, status) == ({"disposition": "ANSWERED"}, "miss")
+    assert isinstance(followers[0], asyncio.CancelledError)
+    assert followers[1:] == [({"disposition": "ANSWERED"}, "coalesced")] * 2
+    assert calls == [1]
+
+
+def test_entries_expire_after_ttl(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("cache.time.time", lambda: now[0])
+    cache = PredictionCache(ttl_s=60, db_path=str(tmp_path / "cache.db"))
+    cache.put("k", {"disposition": "BUSY"})
+    now[0] += 59
+    assert cache.get("k") == {"disposition": "BUSY"}
+    now[0] += 2
+    # Expired in memory and in SQLite
+    assert cache.get("k") is None
+    assert len(cache) == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = PredictionCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # "a" is now the most recently used
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+
+def test_sqlite_tier_survives_restart_and_is_promoted(tmp_path):
+    path = str(tmp_path / "cache.db")
+    PredictionCache(db_path=path).put("k", {"remarks": "from disk"})
+
+    restarted = PredictionCache(db_path=path)
+    assert len(restarted) == 0
+    calls = []
+    value, status = restarted.get_or_compute("k", lambda: calls.append(1) or {"remarks": "computed"})
+    assert (value, status, calls) == ({"remarks": "from disk"}, "hit", [])
+    # Promoted into the memory tier
+    assert len(restarted) == 1
+
+
+def test_uncacheable_results_are_not_stored():
+    cache = PredictionCache()
+    assert cache.get_or_compute("k", lambda: {"error": "bad json"}, cacheable=lambda r: "error" not in r)[1] == "miss"
+    assert cache.get("k") is None
+    assert cache.get_or_compute("k", lambda: {"disposition": "BUSY"})[1] == "miss"
+    assert cache.get_or_compute("k", lambda: {"disposition": "OTHER"}) == ({"disposition": "BUSY"}, "hit")
+
+
+def test_concurrent_misses_share_one_computation():
+    cache = PredictionCache()
+    calls, results = [], []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.2)
+        return {"disposition": "ANSWERED"}
+
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute("k", compute))) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert calls == [1]
+    assert sorted(status for _, status in results) == ["coalesced"] * 3 + ["miss"]
+    assert all(value == {"disposition": "ANSWERED"} for value, _ in results)
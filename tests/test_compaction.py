@@ -0,0 +1,22 @@
+from compaction import compact_transcript
+
+
+def test_hindi_filler_run_is_collapsed():
+    transcript = ("Agent: हेलो? Borrower: हाँ जी। Agent: हेलो? Borrower: हां, अच्छा। "
+                  "Agent: आपकी EMI बाकी है। Borrower: मैं कल 2000 दूंगा।")
+    assert compact_transcript(transcript) == "Agent: हेलो? Agent: आपकी EMI बाकी है। Borrower: मैं कल 2000 दूंगा।"
+
+
+def test_latin_filler_run_is_collapsed():
+    transcript = "Agent: Hello? Borrower: Haan ji. Agent: hello hello Borrower: Ok sir! Agent: When will you pay? Borrower: Tomorrow."
+    assert compact_transcript(transcript) == "Agent: Hello? Agent: When will you pay? Borrower: Tomorrow."
+
+
+def test_content_turns_are_kept():
+    transcript = "Agent: हेलो? Borrower: जी, मैं कल पैसे दूंगा। Agent: ठीक Borrower: हाँ, पक्का।"
+    assert compact_transcript(transcript) == transcript
+
+
+def test_noise_markers_and_repeated_turns_are_removed():
+    transcript = "[noise] Agent: Your EMI is due. Agent: Your EMI is due. Borrower: <inaudible> I paid yesterday."
+    assert compact_transcript(transcript) == "Agent: Your EMI is due. Borrower: I paid yesterday."
@@ -0,0 +1,65 @@
+import json
+
+import pytest
+from transformers import LogitsProcessorList
+
+import inference
+from decoding import JumpForwardDecoder, PromptLookupDecoder
+
+DATE = "2026-03-05"
+TRANSCRIPTS = [
+    "Agent: Hello, am I speaking to Rahul? Borrower: No, wrong number.",
+    "Agent: When will you pay your EMI? Borrower: I will pay 5000 rupees tomorrow.",
+]
+
+
+@pytest.mark.parametrize("budget", [5, 20, 60, 400])
+def test_jump_forward_stays_in_budget_and_grammar(tiny_model, monkeypatch, budget):
+    monkeypatch.setattr(inference, "MAX_NEW_TOKENS", budget)
+    grammar = tiny_model.grammar_processor.grammar
+    decoder = JumpForwardDecoder(tiny_model.backend.score, tiny_model.tokenizer, tiny_model.grammar_processor)
+    prepared = [tiny_model._prepare(t, DATE) for t in TRANSCRIPTS]
+    generated, stats = decoder.decode(tiny_model.model_inputs(prepared), budget)
+    constrained, constrained_stats = tiny_model._generate(tiny_model.model_inputs(prepared))
+
+    for ids, st, ref_st in zip(generated, stats, constrained_stats):
+        text = tiny_model.tokenizer.decode(ids)
+        # Forced scaffold counts against the budget like sampled tokens
+        assert len(ids) <= budget and st["generated_tokens"] == len(ids)
+        state = grammar.advance(grammar.start, text)
+        assert state is not None
+        if budget == 400:
+            # Room to finish: a complete object under the schema
+            assert grammar.complete(state)
+            assert set(json.loads(text)) == {"disposition", "payment_disposition", "reason_for_not_paying",
+                                              "ptp_details", "remarks", "confidence_score"}
+        if budget > 5:
+            assert st["decode_steps"] < ref_st["decode_steps"]
+
+
+# Amounts and dates the response copies from the transcript, vs text it never repeats
+ECHO = "Agent: Sir, will you pay 5000 rupees on 2026-03-20? Borrower: Yes, I will pay 5000 rupees on 2026-03-20. " * 3
+NOVEL = "Agent: ஹலோ? Borrower: ಹೌದು ಸರ್, ನಾಳೆ ಕೊಡುತ್ತೇನೆ."
+
+
+@pytest.mark.parametrize("constrained", [True, False])
+@pytest.mark.parametrize("transcript,num_draft", [(ECHO, 10), (NOVEL, 10), (ECHO, 0)])
+def test_prompt_lookup_matches_greedy_generate(tiny_model, monkeypatch, constrained, transcript, num_draft):
+    budget = 120
+    monkeypatch.setattr(inference, "MAX_NEW_TOKENS", budget)
+    if not constrained:
+        monkeypatch.setattr(tiny_model, "grammar_processor", None)
+        monkeypatch.setattr(tiny_model, "logits_processor", LogitsProcessorList())
+    decoder = PromptLookupDecoder(tiny_model.backend.score, tiny_model.tokenizer, tiny_model.grammar_processor,
+                                  num_draft=num_draft, max_ngram=3)
+    prepared = [tiny_model._prepare(transcript, DATE)]
+    generated, stats = decoder.decode(tiny_model.model_inputs(prepared), budget)
+    reference, _ = tiny_model._generate(tiny_model.model_inputs(prepared))
+
+    # Token for token what generate(do_sample=False) produces
+    assert generated == reference
+    if num_draft:
+        assert stats[0]["accepted_tokens"] > 0
+        assert stats[0]["decode_steps"] < len(reference[0])
+    else:
+        assert stats[0]["drafted_tokens"] == 0
@@ -0,0 +1,46 @@
+import math
+
+import pytest
+
+from evaluate import calibration, fit_temperature
+from inference import CALL_LABELS, CLASSIFY_PAY_LABELS
+
+
+def example(disp_margin, pay_margin, correct):
+    """Scores where the top label leads the others by a margin; gold is the top label or not."""
+    disp = {label: 0.0 for label in ("ANSWERED", "BUSY", "SWITCHED_OFF")}
+    pay = {label: 0.0 for label in ("PTP", "DENIED_TO_PAY", "None")}
+    disp["ANSWERED"], pay["PTP"] = disp_margin, pay_margin
+    return ({"disposition": disp, "payment_disposition": pay},
+            "ANSWERED" if correct else "BUSY", "PTP")
+
+
+def test_overconfident_scores_get_a_temperature_above_one():
+    # Margins of 8 nats but right only 60% of the time
+    examples = [example(8.0, 8.0, i % 5 < 3) for i in range(50)]
+    best = fit_temperature(examples)
+    assert best > 1.0
+    assert calibration(examples, best)[0] < calibration(examples, 1.0)[0]
+    # Fitted confidence is close to the accuracy
+    _, confidence, accuracy = calibration(examples, best)
+    assert accuracy == pytest.approx(0.6) and abs(confidence - accuracy) < 0.05
+
+
+def test_underconfident_scores_get_a_temperature_below_one():
+    examples = [example(0.5, 0.5, True) for _ in range(20)]
+    assert fit_temperature(examples) < 1.0
+
+
+def test_label_scores_match_classify_confidence(tiny_model):
+    transcript = "Agent: Sir, your EMI is pending. Borrower: I will pay 2500 tomorrow."
+    scores = tiny_model.label_scores([transcript], current_date="2026-03-05")[0]
+    assert list(scores["disposition"]) == CALL_LABELS
+    assert list(scores["payment_disposition"]) == CLASSIFY_PAY_LABELS
+
+    result, _ = tiny_model.generate_batch([(transcript, "2026-03-05", "classify")])[0]
+    disp, pay = result["disposition"], result["payment_disposition"] or "None"
+    d, p = scores["disposition"], scores["payment_disposition"]
+    assert disp == max(d, key=d.get)
+    # At CLASSIFY_TEMPERATURE=1.0 the confidence is the plain softmax of the scores
+    prob = math.exp(d[disp] - math.log(sum(map(math.exp, d.values()))) + p[pay] - math.log(sum(map(math.exp, p.values()))))
+    assert result["confidence_score"] == pytest.approx(prob, abs=1e-3)
@@ -0,0 +1,85 @@
+import json
+import random
+import re
+
+import pytest
+
+from grammar import GrammarLogitsProcessor, disposition_grammar
+from inference import CALL_LABELS, PAY_LABELS, REASON_LABELS
+
+VALID = ('{"disposition": "ANSWERED", "payment_disposition": "PTP", "reason_for_not_paying": null, '
+         '"ptp_details": {"amount": 2500.5, "date": "2026-03-20"}, "remarks": "will pay on 20th", "confidence_score": 0.92}')
+
+
+@pytest.fixture(scope="module")
+def processor(tiny_lm):
+    return GrammarLogitsProcessor(disposition_grammar(CALL_LABELS, PAY_LABELS, REASON_LABELS), tiny_lm[1])
+
+
+def check_schema(text):
+    out = json.loads(text)
+    assert list(out) == ["disposition", "payment_disposition", "reason_for_not_paying", "ptp_details", "remarks", "confidence_score"]
+    assert out["disposition"] in CALL_LABELS
+    assert out["payment_disposition"] is None or out["payment_disposition"] in PAY_LABELS
+    assert out["reason_for_not_paying"] is None or out["reason_for_not_paying"] in REASON_LABELS
+    amount, date = out["ptp_details"]["amount"], out["ptp_details"]["date"]
+    assert amount is None or (isinstance(amount, (int, float)) and amount >= 0)
+    assert date is None or re.fullmatch(r"\d{4}-\d{2}-\d{2}", date)
+    assert isinstance(out["remarks"], str) and len(out["remarks"]) <= 160
+    assert 0 <= out["confidence_score"] < 10
+
+
+def test_grammar_accepts_schema_objects_only():
+    grammar = disposition_grammar(CALL_LABELS, PAY_LABELS, REASON_LABELS)
+    assert grammar.complete(grammar.advance(grammar.start, VALID))
+    assert grammar.forced_text(grammar.start) == '{"disposition": "'
+    for bad in [
+        VALID.replace('"ANSWERED"', '"MAYBE"'),           # label outside the set
+        VALID.replace("2500.5", "02500"),                # leading zero
+        VALID.replace("2026-03-20", "20th March"),       # date not YYYY-MM-DD
+        VALID.replace("will pay", "will {pay}"),         # braces in free text
+        VALID.replace('"ptp_details": {', '"ptp": {'),    # wrong key
+    ]:
+        assert grammar.advance(grammar.start, bad) is None
+
+
+def test_allowed_tokens_are_exactly_the_valid_ones(processor):
+    grammar, index = processor.grammar, processor.index
+    prefixes = ['{"disposition": "', '{"disposition": "ANS', VALID[:VALID.index("2500") + 2], VALID[:VALID.index("will") + 4]]
+    for prefix in prefixes:
+        state = grammar.advance(grammar.start, prefix)
+        allowed = set(index.allowed(state).tolist())
+        valid = {tid for tid, text in enumerate(index.strings)
+                 if text and tid in index.sorted_ids and grammar.advance(state, text) is not None}
+        assert allowed == valid, prefix
+
+
+def test_remarks_budget_cuts_long_tokens(processor):
+    grammar, index = processor.grammar, processor.index
+    remarks_at = VALID.index('"remarks": "') + len('"remarks": "')
+    for used in (150, 158, 160):
+        state = grammar.advance(grammar.start, VALID[:remarks_at] + "x" * used)
+        assert grammar.in_free_string(state) == 160 - used
+        for tid in index.allowed(state).tolist():
+            text = index.strings[tid]
+            assert grammar.advance(state, text) is not None
+            # Only tokens that fit the remaining characters, or that close the string in time
+            assert len(text) <= 160 - used or '"' in text
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_every_constrained_output_parses(processor, seed):
+    """Random walks over the allowed tokens always end in a schema-valid object."""
+    rng = random.Random(seed)
+    grammar, index = processor.grammar, processor.index
+    state, text = grammar.start, ""
+    for _ in range(400):
+        if grammar.complete(state):
+            break
+        allowed = processor.allowed_ids(state).tolist()
+        assert allowed
+        token = index.strings[rng.choice(allowed)]
+        state, text = grammar.advance(state, token), text + token
+        assert state is not None
+    assert grammar.complete(state)
+    check_schema(text)
@@ -0,0 +1,63 @@
+import json
+import os
+import time
+
+from jobs import JobManager
+
+CSV = b"transcript\na\nb\nc\nd\ne\n"
+
+
+def wait_for(jobs, job_id, timeout=20):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        info = jobs.status(job_id)
+        if info["status"] in ("done", "failed"):
+            return info
+        time.sleep(0.05)
+    raise AssertionError(f"job still {info['status']}")
+
+
+def test_failed_block_is_not_checkpointed_and_reruns_on_resume(tmp_path):
+    failing = {"on": True}
+    calls = []
+
+    def process_rows(texts, mode, priority):
+        calls.append(texts)
+        if failing["on"] and len(calls) > 1:
+            raise RuntimeError("CUDA out of memory")
+        return [{"text": t} for t in texts]
+
+    jobs = JobManager(process_rows, job_dir=str(tmp_path), block_rows=2, block_retries=1)
+    job_id = jobs.submit("calls.csv", CSV, "json", "generate", total=5)["id"]
+    info = wait_for(jobs, job_id)
+    assert info["status"] == "failed" and "out of memory" in info["error"]
+    # The first block finished; the failing one (tried twice) left nothing in the checkpoint
+    assert len(calls) == 3
+    with open(os.path.join(tmp_path, job_id, "results.jsonl"), encoding="utf-8") as f:
+        assert [json.loads(line)["row"] for line in f] == [0, 1]
+
+    failing["on"] = False
+    calls.clear()
+    resumed = JobManager(process_rows, job_dir=str(tmp_path), block_rows=2)
+    info = wait_for(resumed, job_id)
+    assert info["status"] == "done" and info["done"] == 5
+    assert calls == [["c", "d"], ["e"]]
+    with open(resumed.output_path(job_id), encoding="utf-8") as f:
+        assert [row["text"] for row in json.load(f)] == ["a", "b", "c", "d", "e"]
+
+
+def test_failed_job_is_resumed_a_limited_number_of_times(tmp_path):
+    def process_rows(texts, mode, priority):
+        raise ValueError("row crashes the model")
+
+    jobs = JobManager(process_rows, job_dir=str(tmp_path), block_rows=2, block_retries=0, resume_attempts=1)
+    job_id = jobs.submit("calls.csv", CSV, "json", "generate", total=5)["id"]
+    assert wait_for(jobs, job_id)["status"] == "failed"
+
+    # The first restart tries again; the next one leaves the job failed with its error
+    resumed = JobManager(process_rows, job_dir=str(tmp_path), block_rows=2, block_retries=0, resume_attempts=1)
+    info = wait_for(resumed, job_id)
+    assert info["status"] == "failed" and info["resume_attempts"] == 1
+    again = JobManager(process_rows, job_dir=str(tmp_path), block_rows=2, block_retries=0, resume_attempts=1)
+    info = again.status(job_id)
+    assert info["status"] == "failed" and "crashes the model" in info["error"]
@@ -0,0 +1,123 @@
+import pytest
+
+import inference
+from longform import merge_window_results, window_spans
+
+PTP_LABELS = inference.PTP_LABELS
+
+
+def result(disposition="ANSWERED", payment="None", reason="None", amount=None, date=None, confidence=0.9, remarks=""):
+    return {
+        "disposition": disposition, "payment_disposition": payment, "reason_for_not_paying": reason,
+        "ptp_details": {"amount": amount, "date": date}, "remarks": remarks, "confidence_score": confidence,
+    }
+
+
+@pytest.mark.parametrize("n_tokens,size,overlap", [(10000, 2048, 256), (4097, 2048, 256), (2049, 2048, 0), (9000, 1000, 999)])
+def test_window_spans_overlap_and_cover_every_token(n_tokens, size, overlap):
+    spans = window_spans(n_tokens, size, overlap, max_windows=10000)
+    assert spans[0][0] == 0
+    assert spans[-1][1] == n_tokens
+    assert all(0 < end - start <= size for start, end in spans)
+    for (s1, e1), (s2, _) in zip(spans, spans[1:]):
+        # Consecutive windows share exactly `overlap` tokens
+        assert s2 == s1 + (size - overlap)
+        assert e1 - s2 == overlap
+
+
+def test_window_spans_short_transcript_is_one_window():
+    assert window_spans(100, 2048, 256, 32) == [(0, 100)]
+    assert window_spans(2048, 2048, 256, 32) == [(0, 2048)]
+
+
+def test_window_spans_keep_first_and_latest_windows():
+    full = window_spans(100000, 1000, 100, max_windows=10000)
+    kept = window_spans(100000, 1000, 100, max_windows=4)
+    assert kept == [full[0]] + full[-3:]
+    assert kept[-1][1] == 100000
+
+
+def test_latest_ptp_wins():
+    windows = [
+        result(payment="PTP", amount=2000, date="2026-03-10", remarks="first promise"),
+        result(payment="None"),
+        result(payment="PTP", amount=5000, date="2026-03-20", remarks="revised promise"),
+        result(payment="None", confidence=0.95),
+    ]
+    merged = merge_window_results(windows, PTP_LABELS)
+    assert merged["payment_disposition"] == "PTP"
+    assert merged["ptp_details"] == {"amount": 5000, "date": "2026-03-20"}
+
+
+def test_disposition_comes_from_most_informative_window():
+    windows = [
+        result(disposition="ANSWERED", confidence=0.99),
+        result(disposition="ANSWERED_BY_FAMILY_MEMBER", payment="DENIED_TO_PAY", reason="UNEMPLOYED", confidence=0.8, remarks="lost job"),
+        result(disposition="ANSWERED", confidence=0.99),
+    ]
+    merged = merge_window_results(windows, PTP_LABELS)
+    assert merged["disposition"] == "ANSWERED_BY_FAMILY_MEMBER"
+    assert merged["payment_disposition"] == "DENIED_TO_PAY"
+    assert merged["reason_for_not_paying"] == "UNEMPLOYED"
+    assert merged["remarks"] == "lost job"
+
+
+def test_failed_windows_are_ignored():
+    windows = [result(payment="PTP", amount=1500, date="2026-03-12"), {"error": "invalid JSON"}]
+    assert merge_window_results(windows, PTP_LABELS)["ptp_details"]["amount"] == 1500
+
+
+class StubBatch:
+    """Stands in for generate_batch: labels a window by the phrases in it and records batches."""
+    def __init__(self, model):
+        self.model = model
+        self.batches = []
+
+    def __call__(self, items):
+        # Packed windows arrive already prepared
+        assert all(len(item) == 4 for item in items)
+        self.batches.append(self.model.prompt_lengths([item[3][0] for item in items]))
+        outputs = []
+        for text, _, _, _ in items:
+            if "pay 5000" in text:
+                out = result(payment="PTP", amount=5000, date="2026-03-20", remarks="promise")
+            elif "lost my job" in text:
+                out = result(payment="DENIED_TO_PAY", reason="UNEMPLOYED", remarks="job loss")
+            else:
+                out = result(confidence=0.5)
+            outputs.append((out, {"generated_tokens": 10, "decode_steps": 10, "transcript_tokens_in": 1}))
+        return outputs
+
+
+def long_transcript():
+    turns = ["Agent: Sir, your EMI is overdue. Borrower: I lost my job last month, I cannot pay now."]
+    turns += [f"Agent: Reference {i} shows branch letter {i * 7} was sent. Borrower: I received letter {i * 7} on day {i}."
+              for i in range(700)]
+    turns.append("Agent: Final offer on the dues? Borrower: Okay, I will pay 5000 on the 20th.")
+    return " ".join(turns)
+
+
+def test_split_windows_end_to_end(tiny_model, monkeypatch):
+    monkeypatch.setattr(inference, "LONG_TRANSCRIPT_MODE", "map_reduce")
+    transcript = long_transcript()
+    windows, n_tokens = tiny_model.split_windows(transcript)
+    assert n_tokens > 8192
+    size = min(inference.LONG_WINDOW_TOKENS, tiny_model.transcript_budget)
+    assert len(windows) == len(window_spans(n_tokens, size, inference.LONG_WINDOW_OVERLAP, inference.LONG_MAX_WINDOWS))
+    assert all(len(tiny_model.encode(w)) <= size + 2 for w in windows)
+    assert windows[0].startswith("Agent: Sir, your EMI is overdue.")
+    assert windows[-1].endswith("I will pay 5000 on the 20th.")
+    # Consecutive windows overlap
+    assert all(a[-40:] in b for a, b in zip(windows, windows[1:]))
+
+    stub = StubBatch(tiny_model)
+    monkeypatch.setattr(tiny_model.batcher, "batch_fn", stub)
+    merged, meta = tiny_model._infer(transcript, "2026-03-05", "generate")
+    assert meta["windows"] == len(windows)
+    assert meta["transcript_tokens_in"] == n_tokens
+    assert merged["payment_disposition"] == "PTP"
+    assert merged["ptp_details"] == {"amount": 5000, "date": "2026-03-20"}
+    # Window batches stay within LONG_WINDOW_BATCH_TOKENS padded tokens
+    assert sum(len(b) for b in stub.batches) == len(windows)
+    assert len(stub.batches) > 1
+    assert all(len(b) * max(b) <= inference.LONG_WINDOW_BATCH_TOKENS for b in stub.batches)
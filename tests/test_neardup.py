@@ -0,0 +1,78 @@
+import re
+
+import pytest
+
+from inference import DispositionModel
+from neardup import NearDuplicateIndex
+
+PROMISE = "Agent: Sir, your EMI of this month is pending, when will you pay? Borrower: I will pay {amount} rupees on the {day}th, sure."
+REFUSAL = "Agent: Sir, your EMI of this month is pending, when will you pay? Borrower: I lost my job, I cannot pay anything now {n}."
+
+
+def result(payment, amount=None, date=None):
+    return {
+        "disposition": "ANSWERED", "payment_disposition": payment, "reason_for_not_paying": None,
+        "ptp_details": {"amount": amount, "date": date}, "remarks": "", "confidence_score": 0.9,
+    }
+
+
+@pytest.fixture
+def model(tiny_model, monkeypatch):
+    """tiny_model with a near-duplicate index and a batch_fn that answers by keyword."""
+    tiny_model.near_dups = NearDuplicateIndex()
+    calls = []
+
+    def batch_fn(items):
+        calls.append(len(items))
+        outputs = []
+        for text, _, _ in items:
+            promise = re.search(r"I will pay (\d+)", text)
+            if promise:
+                out = result("PTP", int(promise.group(1)), "2026-03-20")
+            else:
+                out = result("DENIED_TO_PAY")
+            outputs.append((out, {"generated_tokens": 10, "decode_steps": 10}))
+        return outputs
+
+    monkeypatch.setattr(tiny_model.batcher, "batch_fn", batch_fn)
+    tiny_model.calls = calls
+    return tiny_model
+
+
+def test_non_ptp_result_is_reused_for_near_duplicates(model):
+    first, meta = model.predict_with_meta(REFUSAL.format(n=1), "2026-03-05")
+    assert meta["path"] == "model"
+    again, meta = model.predict_with_meta(REFUSAL.format(n=2), "2026-03-05")
+    assert meta["path"] == "near_dup" and again == first
+    assert len(model.calls) == 1
+
+
+def test_ptp_amounts_and_dates_are_never_reused(model):
+    # Digits are ignored by the fingerprint, so these two are near-duplicates
+    first, _ = model.predict_with_meta(PROMISE.format(amount=5000, day=20), "2026-03-05")
+    second, meta = model.predict_with_meta(PROMISE.format(amount=2000, day=25), "2026-03-05")
+    assert meta["path"] == "model" and meta["near_dup"] == "miss"
+    assert first["ptp_details"]["amount"] == 5000 and second["ptp_details"]["amount"] == 2000
+    assert len(model.calls) == 2
+
+
+@pytest.mark.parametrize("value,reusable", [
+    (result("DENIED_TO_PAY"), True),
+    (result("None"), True),
+    (result("PTP"), False),
+    (result("PARTIAL_PAYMENT", amount=1000), False),
+    (result("DENIED_TO_PAY", date="2026-03-20"), False),
+    (result("NO_PAYMENT_COMMITMENT", amount=0), False),
+    ({"error": "invalid JSON"}, False),
+])
+def test_reusable(value, reusable):
+    assert DispositionModel._reusable(value) is reusable
+
+
+def test_index_is_per_namespace_and_skips_short_transcripts():
+    index = NearDuplicateIndex()
+    index.add(REFUSAL.format(n=1), {"disposition": "ANSWERED"}, namespace="generate")
+    assert index.lookup(REFUSAL.format(n=9), namespace="generate") == {"disposition": "ANSWERED"}
+    assert index.lookup(REFUSAL.format(n=9), namespace="classify") is None
+    index.add("Agent: hi", {"disposition": "BUSY"})
+    assert index.lookup("Agent: hi") is None
@@ -0,0 +1,77 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from pool import ModelPool, PoolUnavailable
+
+LONG = "x" * 8000  # ~2000 estimated tokens, about 1 s in StubModel
+SHORT = "Agent: Your EMI is due. Borrower: Paid."
+
+
+def wait_until(condition, timeout=30):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not reached")
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def pool():
+    pool = ModelPool(n_workers=2, devices=["cpu"], factory="pool:StubModel", ready_timeout_s=60)
+    yield pool
+    pool.close()
+
+
+def test_requests_go_to_the_least_loaded_worker(pool):
+    results = {}
+    long_call = threading.Thread(target=lambda: results.update(long=pool.predict_with_meta(LONG)))
+    long_call.start()
+    wait_until(lambda: any(s["in_flight"] for s in pool.stats()))
+    busy = next(s["worker"] for s in pool.stats() if s["in_flight"])
+    assert pool.stats()[busy]["in_flight_tokens"] > 1000
+
+    # While the long call runs, short ones all go to the idle worker
+    short_workers = {pool.predict_with_meta(SHORT)[1]["worker"] for _ in range(5)}
+    assert short_workers == {1 - busy}
+    long_call.join()
+    assert results["long"][1]["worker"] == busy
+    assert [s["in_flight"] for s in pool.stats()] == [0, 0]
+
+
+def test_killed_worker_is_restarted(pool):
+    failed = {}
+
+    def call():
+        try:
+            pool.predict_with_meta(LONG)
+        except RuntimeError as e:
+            failed["error"] = e
+
+    long_call = threading.Thread(target=call)
+    long_call.start()
+    wait_until(lambda: any(s["in_flight"] for s in pool.stats()))
+    victim = next(s["worker"] for s in pool.stats() if s["in_flight"])
+    restarts = pool.stats()[victim]["restarts"]
+    pool._workers[victim].proc.kill()
+    long_call.join(timeout=10)
+    # The request on the dead worker fails instead of hanging
+    assert "exited" in str(failed["error"])
+
+    # Meanwhile the other worker keeps serving
+    assert pool.predict_with_meta(SHORT)[1]["worker"] == 1 - victim
+    wait_until(lambda: pool.stats()[victim]["restarts"] == restarts + 1 and pool.stats()[victim]["ready"])
+    assert pool.wait_ready(2, timeout=0) == 2
+
+
+def test_pool_unavailable_when_no_worker_is_ready(pool):
+    for w in pool._workers:
+        w.proc.kill()
+    wait_until(lambda: not any(s["ready"] for s in pool.stats()))
+    with pytest.raises(PoolUnavailable):
+        asyncio.run(pool.predict_async(SHORT))
+    # Both come back and serve again
+    assert pool.wait_ready(2, timeout=30) == 2
+    assert pool.predict_with_meta(SHORT)[0]["remarks"] == "stub"
@@ -0,0 +1,48 @@
+import pytest
+
+from rules import RuleClassifier
+
+classifier = RuleClassifier()
+
+
+@pytest.mark.parametrize("transcript,rule", [
+    ("The number you are calling is switched off. Please try again later.", "switched_off"),
+    ("Agent: Hello? Borrower: The number you are calling is switched off, please try again later.", "switched_off"),
+    ("Agent: Hello? Hello? Borrower: switched off", "switched_off"),
+    ("Agent: हेलो? Borrower: स्विच ऑफ है", "switched_off"),
+    ("Agent: Hello? Borrower: The number you are calling is not reachable.", "out_of_network"),
+    ("Agent: Hello? Borrower: हेलो... पहुंच से बाहर", "out_of_network"),
+    ("Agent: Hello sir? Borrower: The number you are calling is busy.", "busy"),
+    ("Agent: हेलो? Borrower: आप जिस नंबर पर कॉल कर रहे हैं वह अभी व्यस्त है", "busy"),
+    ("Agent: Hello? Borrower: Please leave your message after the beep.", "automated_voice"),
+    ("Agent: Hello? [beep] after the tone", "automated_voice"),
+    ("Agent: Am I speaking to Rahul? Borrower: No, you have the wrong number.", "wrong_number"),
+    ("Agent: राहुल जी? Borrower: गलत नंबर है", "wrong_number"),
+])
+def test_announcements_are_claimed(transcript, rule):
+    match = classifier.match(transcript)
+    assert match is not None and match.rule.name == rule
+
+
+@pytest.mark.parametrize("transcript", [
+    # Borrowers using the same words about their own phone or time
+    "Agent: Sir, your EMI is pending. Borrower: My phone was switched off, I will give it on the 5th.",
+    "Agent: Hello? Borrower: I had to switch off my phone yesterday, call me tomorrow.",
+    "Agent: Hello? Borrower: मेरा फ़ोन बंद है इसलिए कल बात करते हैं",
+    "Agent: Why were you not reachable? Borrower: I was travelling, I will call back.",
+    "Agent: Hello? Borrower: Sorry I was not reachable, network problem in my village.",
+    "Agent: हेलो? Borrower: अभी व्यस्त है",
+    "Agent: हेलो? Borrower: वो अभी व्यस्त है, बाद में बात करो",
+    "Agent: Can you talk? Borrower: The line is busy at the shop, call me after the tone of the evening prayer.",
+    "Agent: Hello? Borrower: I got your voicemail, I will visit the branch.",
+    # Payment talk always goes to the model
+    "Agent: Hello? Borrower: switched off, I will pay 5000 tomorrow.",
+    "Agent: Is this Rahul? Borrower: Not a wrong number, but I already paid.",
+])
+def test_human_speech_goes_to_the_model(transcript):
+    assert classifier.match(transcript) is None
+
+
+def test_long_calls_go_to_the_model():
+    transcript = "Agent: Hello? Borrower: switched off. " + "Agent: Hello? " * 60
+    assert classifier.match(transcript) is None
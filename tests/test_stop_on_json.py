@@ -0,0 +1,54 @@
+import torch
+
+from inference import StopOnJson
+
+
+def first_stops(tokenizer, texts):
+    """Feed each text's tokens one step at a time, as generate() does; returns, per row,
+    the text decoded up to the step StopOnJson first stopped it (None if it never did)."""
+    stop = StopOnJson(tokenizer)
+    stop.reset(len(texts))
+    rows = [tokenizer(t, add_special_tokens=False)["input_ids"] for t in texts]
+    width = max(map(len, rows))
+    # Finished rows are padded, like generate() pads sequences that already stopped
+    ids = torch.tensor([r + [tokenizer.pad_token_id] * (width - len(r)) for r in rows])
+    stopped = [None] * len(texts)
+    for step in range(1, width + 1):
+        flags = stop(ids[:, :step], None)
+        for row, flag in enumerate(flags.tolist()):
+            if flag and stopped[row] is None:
+                stopped[row] = tokenizer.decode(rows[row][:step])
+    return stopped
+
+
+def test_each_row_stops_when_its_own_object_closes(tiny_lm):
+    _, tokenizer = tiny_lm
+    texts = [
+        '{"disposition": "BUSY"}',
+        '{"disposition": "ANSWERED", "ptp_details": {"amount": 500, "date": null}, "remarks": "ok"} trailing',
+        '{"disposition": "ANSWERED", "remarks": "still',
+    ]
+    assert first_stops(tokenizer, texts) == [
+        '{"disposition": "BUSY"}',
+        '{"disposition": "ANSWERED", "ptp_details": {"amount": 500, "date": null}, "remarks": "ok"}',
+        None,
+    ]
+
+
+def test_braces_inside_remarks_do_not_stop_the_row(tiny_lm):
+    _, tokenizer = tiny_lm
+    texts = [
+        '{"remarks": "said {} twice {}", "confidence_score": 0.5}',
+        '{"remarks": "{{x}}"}',
+        '{"remarks": "{}',
+    ]
+    assert first_stops(tokenizer, texts) == [
+        '{"remarks": "said {} twice {}", "confidence_score": 0.5}',
+        '{"remarks": "{{x}}"}',
+        None,
+    ]
+
+
+def test_nothing_stops_before_the_first_brace(tiny_lm):
+    _, tokenizer = tiny_lm
+    assert first_stops(tokenizer, ['Sure, here it is: {"a": 1}', "no json at all"]) == ['Sure, here it is: {"a": 1}', None]